@@ -0,0 +1,108 @@
+"""
+Benchmark de latencia bajo carga mixta: acceso async (aiosqlite) vs. sesión síncrona en el
+threadpool (QRIZATE_ASYNC_DB=0). Mezcla lecturas de la API (detalle, página, estadísticas),
+consultas del relay sin caché y escrituras masivas concurrentes.
+
+Uso (desde la carpeta app/):
+    python -m bench.bench_async_db --filas 20000 --clientes 32 --segundos 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+from fastapi import FastAPI
+
+from bench.bench_bulk_upsert import generar_filas
+from models import db as database
+from models.bulk import upsert_activos
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))]
+
+
+def preparar_base(filas: int) -> str:
+    ruta = os.path.join(tempfile.mkdtemp(), "bench.db")
+    database.init_db(ruta)
+    with database.get_engine().begin() as conn:
+        upsert_activos(conn, generar_filas(filas))
+    return ruta
+
+
+async def ejecutar_carga(ruta: str, modo_async: bool, filas: int, clientes: int, segundos: float):
+    os.environ["QRIZATE_ASYNC_DB"] = "1" if modo_async else "0"
+    database.init_db(ruta)
+
+    from page_cache import cache_paginas
+    from relay import get_asset_html_async
+    from routers.activos import router
+
+    app = FastAPI()
+    app.include_router(router)
+    latencias = defaultdict(list)
+    ids = [f"C{i:07d}A{i % 40}S{i % 5}" for i in range(filas)]
+    fin = time.perf_counter() + segundos
+
+    async def medir(nombre, corrutina):
+        inicio = time.perf_counter()
+        await corrutina
+        latencias[nombre].append((time.perf_counter() - inicio) * 1000)
+
+    async def lector(cliente):
+        while time.perf_counter() < fin:
+            sorteo = random.random()
+            if sorteo < 0.5:
+                await medir("GET /activos/{id}", cliente.get(f"/activos/{random.choice(ids)}"))
+            elif sorteo < 0.7:
+                await medir("GET /activos/ (cursor)", cliente.get("/activos/", params={"sede": f"S{random.randrange(5)}"}))
+            elif sorteo < 0.8:
+                await medir("GET /activos/stats/", cliente.get("/activos/stats/"))
+            else:
+                asset_id = random.choice(ids)
+                cache_paginas.invalidar([asset_id])
+                await medir("relay get_asset", get_asset_html_async(asset_id))
+
+    async def escritor(cliente):
+        lote = 0
+        while time.perf_counter() < fin:
+            filas_lote = [
+                {"id": f"W{lote}-{i}", "correlativo": f"W{lote}-{i}", "area": "A1", "sede": "S1"}
+                for i in range(500)
+            ]
+            await medir("POST /activos/bulk-upsert (500)", cliente.post("/activos/bulk-upsert", json=filas_lote))
+            lote += 1
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        await asyncio.gather(escritor(cliente), *[lector(cliente) for _ in range(clientes)])
+    await database.cerrar_db_async()
+    return latencias
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=20000)
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--segundos", type=float, default=10)
+    args = parser.parse_args()
+
+    ruta = preparar_base(args.filas)
+    for modo_async in (False, True):
+        latencias = asyncio.run(ejecutar_carga(ruta, modo_async, args.filas, args.clientes, args.segundos))
+        print(f"\n== {'async (aiosqlite)' if modo_async else 'síncrono en threadpool'} ==")
+        print(f"{'operación':<34} {'n':>7} {'p50 ms':>9} {'p99 ms':>9} {'media ms':>9}")
+        for nombre, valores in sorted(latencias.items()):
+            print(f"{nombre:<34} {len(valores):>7} {percentil(valores, 50):>9.2f} "
+                  f"{percentil(valores, 99):>9.2f} {statistics.mean(valores):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
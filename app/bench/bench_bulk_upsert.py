@@ -0,0 +1,86 @@
+"""
+Benchmark de carga masiva: algoritmo anterior (ORM fila por fila) vs. upsert por lotes.
+
+Uso (desde la carpeta app/):
+    python -m bench.bench_bulk_upsert --filas 20000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.activo import Activo, Base
+from models.bulk import COLUMNAS_ACTIVO, buscar_repetidos, upsert_activos
+
+
+def generar_filas(n: int, sufijo: str = ""):
+    filas = []
+    for i in range(n):
+        fila = {nombre: None for nombre in COLUMNAS_ACTIVO}
+        fila.update(
+            id=f"C{i:07d}A{i % 40}S{i % 5}",
+            correlativo=f"C{i:07d}",
+            area=f"A{i % 40}",
+            sede=f"S{i % 5}",
+            estado=("Bueno", "Regular", "Malo")[i % 3],
+            descripcion=f"Activo de prueba {i}{sufijo}",
+        )
+        filas.append(fila)
+    return filas
+
+
+def nueva_sesion():
+    ruta = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def carga_anterior(db, filas):
+    """Réplica del algoritmo previo: count() por correlativo y un SELECT por fila."""
+    correlativos = [f["correlativo"] for f in filas]
+    set([c for c in correlativos if correlativos.count(c) > 1])
+    for data in filas:
+        db_activo = db.query(Activo).filter(Activo.id == data["id"]).first()
+        if db_activo:
+            for key, value in data.items():
+                setattr(db_activo, key, value)
+        else:
+            db.add(Activo(**data))
+    db.commit()
+
+
+def carga_por_lotes(db, filas):
+    buscar_repetidos(f["correlativo"] for f in filas)
+    upsert_activos(db.connection(), filas)
+    db.commit()
+
+
+def medir(nombre, funcion, db, filas):
+    inicio = time.perf_counter()
+    funcion(db, filas)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<45} {duracion:8.2f} s  {len(filas) / duracion:10.0f} filas/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=20000)
+    args = parser.parse_args()
+
+    filas = generar_filas(args.filas)
+    modificadas = generar_filas(args.filas, sufijo=" (editado)")
+    for nombre, funcion in (("anterior", carga_anterior), ("por lotes", carga_por_lotes)):
+        db = nueva_sesion()
+        medir(f"{nombre}: inserción inicial", funcion, db, filas)
+        medir(f"{nombre}: reimportación sin cambios", funcion, db, filas)
+        medir(f"{nombre}: reimportación con cambios", funcion, db, modificadas)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
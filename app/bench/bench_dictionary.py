@@ -0,0 +1,99 @@
+"""
+Benchmark del almacenamiento por diccionario (models/dictionary.py): tamaño del archivo y
+tiempo de consultas agregadas con la base en modo texto y después de migrarla.
+
+Uso (desde la carpeta app/):
+    python -m bench.bench_dictionary --filas 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from models import db
+from models.activo import Activo
+from models.bulk import COLUMNAS_ACTIVO, upsert_activos
+from models.dictionary import migrar_almacenamiento
+
+SEDES = ["Sede Central Lima", "Planta Arequipa Norte", "Oficina Regional Trujillo", "Almacén Piura", "Sucursal Cusco"]
+AREAS = [f"Área de {nombre}" for nombre in (
+    "Contabilidad", "Tesorería", "Recursos Humanos", "Logística", "Tecnologías de la Información",
+    "Mantenimiento", "Producción", "Control de Calidad", "Ventas", "Gerencia General",
+)]
+ESTADOS = ["Bueno", "Regular", "Malo", "En reparación", "Dado de baja"]
+CATEGORIAS = ["EQUIPOS DE CÓMPUTO", "MUEBLES Y ENSERES", "EQUIPOS DIVERSOS", "VEHÍCULOS", "MAQUINARIA"]
+
+
+def generar_filas(n: int):
+    filas = []
+    for i in range(n):
+        fila = {nombre: None for nombre in COLUMNAS_ACTIVO}
+        central = 100 + i % 60
+        fila.update(
+            id=f"D{i:08d}",
+            correlativo=f"D{i:08d}",
+            sede=SEDES[i % len(SEDES)],
+            area=AREAS[(i // 3) % len(AREAS)],
+            estado=ESTADOS[i % 7 % len(ESTADOS)],
+            categoria=CATEGORIAS[(i // 11) % len(CATEGORIAS)],
+            central_de_costos=f"CC-{central}",
+            nombre_central_costos=f"Centro de costos {central} - {AREAS[central % len(AREAS)]}",
+            cuenta_contable=f"33{(i % 25):04d}",
+            descripcion=f"Activo {i}",
+            marca=("HP", "Dell", "Lenovo")[i % 3],
+        )
+        filas.append(fila)
+    return filas
+
+
+CONSULTAS = {
+    "sede x estado": lambda: select(Activo.sede, Activo.estado, func.count()).group_by(Activo.sede, Activo.estado),
+    "centro de costos": lambda: select(
+        Activo.central_de_costos, Activo.nombre_central_costos, func.count()
+    ).group_by(Activo.central_de_costos, Activo.nombre_central_costos),
+    "cuenta (filtro)": lambda: select(Activo.cuenta_contable, func.count())
+        .where(Activo.categoria == CATEGORIAS[0]).group_by(Activo.cuenta_contable),
+}
+
+
+def medir(etiqueta: str, repeticiones: int):
+    tamano = os.path.getsize(db.DB_PATH) / 1e6
+    print(f"[{etiqueta}] archivo: {tamano:.1f} MB")
+    resultados = {}
+    with db.get_engine().connect() as conn:
+        for nombre, consulta in CONSULTAS.items():
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                filas = conn.execute(consulta()).all()
+                tiempos.append(time.perf_counter() - inicio)
+            resultados[nombre] = sorted(map(tuple, filas))
+            print(f"  {nombre:18s} {min(tiempos) * 1000:8.1f} ms ({len(filas)} grupos)")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=200000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    db.init_db(os.path.join(tempfile.mkdtemp(), "bench_diccionario.db"))
+    with db.get_engine().begin() as conn:
+        upsert_activos(conn, generar_filas(args.filas))
+    with db.get_engine().connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+
+    antes = medir("texto", args.repeticiones)
+    inicio = time.perf_counter()
+    migrar_almacenamiento(db.get_engine(), "diccionario")
+    print(f"migración: {time.perf_counter() - inicio:.1f} s")
+    despues = medir("diccionario", args.repeticiones)
+    print("resultados iguales:", antes == despues)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark de los endpoints de activos con un cliente ASGI en proceso (httpx, sin red):
+listado, página, detalle, búsqueda, estadísticas, facetas, alta masiva, exportación y
+QR en lote sobre un inventario sintético (bench/inventario.py).
+
+Uso (desde la carpeta app/):
+    python -m bench.bench_endpoints --filas 100000 --repeticiones 200
+    python -m bench.bench_endpoints --filas 1000000 --db /tmp/inventario-1m.db   # reutiliza la base
+
+Los resultados se guardan en bench/resultados/ (o en --salida) como JSON.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from bench.inventario import (
+    AREAS, SEDES, cargar_inventario, generar_inventario, guardar_resultados, ids_inventario,
+    resumen_latencias,
+)
+from models import db as database
+from models.activo import Activo
+
+
+def preparar_base(ruta: str, filas: int) -> Dict:
+    database.init_db(ruta)
+    with database.get_engine().connect() as conn:
+        existentes = conn.execute(select(func.count()).select_from(Activo)).scalar()
+    if existentes >= filas:
+        return {"reutilizada": True, "filas": existentes}
+    segundos = cargar_inventario(database.get_engine(), filas)
+    return {"reutilizada": False, "filas": filas, "carga_s": round(segundos, 2),
+            "carga_filas_por_s": round(filas / segundos)}
+
+
+def crear_app() -> FastAPI:
+    from routers.activos import router
+    app = FastAPI()
+    app.state.PUBLIC_URL_BASE = "https://qrizate.example/activo"
+    app.state.SEDE_ID = "bench"
+    app.include_router(router)
+    return app
+
+
+async def medir(cliente: httpx.AsyncClient, repeticiones: int, concurrencia: int,
+                peticion: Callable[[httpx.AsyncClient, int], "asyncio.Future"]) -> Dict:
+    latencias = []
+    errores = 0
+    siguiente = iter(range(repeticiones))
+
+    async def trabajador():
+        nonlocal errores
+        for i in siguiente:
+            inicio = time.perf_counter()
+            respuesta = await peticion(cliente, i)
+            if respuesta.status_code >= 400:
+                errores += 1
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabajador() for _ in range(concurrencia)])
+    resumen = resumen_latencias(latencias, time.perf_counter() - inicio)
+    resumen["errores"] = errores
+    return resumen
+
+
+async def ejecutar(args, filas: int) -> Dict:
+    rng = random.Random(7)
+    ids = ids_inventario(filas)
+    sedes = list(SEDES)
+    escenarios = {
+        "GET /activos/ (sede, 100)": (args.repeticiones, lambda c, i: c.get(
+            "/activos/", params={"sede": rng.choice(sedes), "skip": rng.randrange(0, 2000, 100)})),
+        "GET /activos/ (area)": (args.repeticiones, lambda c, i: c.get(
+            "/activos/", params={"area": rng.choice(AREAS), "limit": 100})),
+        "GET /activos/{id}": (args.repeticiones * 5, lambda c, i: c.get(f"/activos/{rng.choice(ids)}")),
+        "GET /activos/search": (args.repeticiones, lambda c, i: c.get(
+            "/activos/search", params={"q": rng.choice(["laptop hp", "silla", "proyector epson", "monitor"])})),
+        "GET /activos/stats/": (args.repeticiones, lambda c, i: c.get("/activos/stats/")),
+        "GET /activos/stats/resumen": (args.repeticiones, lambda c, i: c.get(
+            "/activos/stats/resumen", params={"agrupar": ["sede", "estado"]})),
+        "GET /activos/facets": (args.repeticiones, lambda c, i: c.get(
+            "/activos/facets", params={"sede": rng.choice(sedes)})),
+        "POST /activos/bulk-create (500)": (max(1, args.repeticiones // 20), lambda c, i: c.post(
+            "/activos/bulk-create", json=[
+                {k: v for k, v in fila.items() if v is not None and k != "id"}
+                for fila in generar_inventario(500, prefijo=f"N{i:04d}-")
+            ])),
+        "GET /activos/export (csv, completo)": (args.exportaciones, lambda c, i: c.get(
+            "/activos/export", params={"formato": "csv"})),
+        f"POST /activos/qr/batch ({args.qr})": (args.exportaciones, lambda c, i: c.post(
+            "/activos/qr/batch", json={"ids": rng.sample(ids, min(args.qr, len(ids)))})),
+    }
+    resultados = {}
+    transporte = httpx.ASGITransport(app=crear_app())
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        for nombre, (repeticiones, peticion) in escenarios.items():
+            if args.solo and not any(parte in nombre for parte in args.solo):
+                continue
+            concurrencia = 1 if "export" in nombre or "qr" in nombre or "bulk" in nombre else args.concurrencia
+            resultados[nombre] = await medir(cliente, repeticiones, concurrencia, peticion)
+            resultados[nombre]["concurrencia"] = concurrencia
+            print(f"{nombre:<38} n={resultados[nombre]['n']:>5} p50={resultados[nombre]['p50_ms']:>9.2f} ms "
+                  f"p99={resultados[nombre]['p99_ms']:>9.2f} ms  {resultados[nombre]['por_segundo']:>8.1f}/s")
+    await database.cerrar_db_async()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100000, help="Tamaño del inventario (10k a 1M)")
+    parser.add_argument("--db", default=None, help="Base a usar o reutilizar (por defecto, una temporal)")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--exportaciones", type=int, default=3)
+    parser.add_argument("--qr", type=int, default=200, help="Activos por lote de QR")
+    parser.add_argument("--solo", nargs="*", help="Solo los escenarios que contengan estos textos")
+    parser.add_argument("--salida", default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    ruta = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+    base = preparar_base(ruta, args.filas)
+    print(f"inventario: {base}")
+    resultados = asyncio.run(ejecutar(args, base["filas"]))
+    parametros = {**vars(args), "base": base, "async_db": os.environ.get("QRIZATE_ASYNC_DB", "0")}
+    print("resultados en", guardar_resultados("endpoints", parametros, resultados, args.salida))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark del relay: el VPS falso (bench/fake_vps.py) y connect_to_vps_and_listen corren
+en el mismo proceso sobre un WebSocket local real, así que se mide el camino completo
+(JSON, socket, caché de páginas, consulta y render) sin depender de la red.
+
+Escenarios: caché fría (ids distintos, cada uno va a la base), caché caliente (un
+conjunto pequeño que cabe en cache_paginas) y activos "virales" (muchas solicitudes
+concurrentes al mismo id, que comparten una sola consulta).
+
+Uso (desde la carpeta app/):
+    python -m bench.bench_relay --filas 100000 --solicitudes 5000 --concurrencia 32
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+from typing import Dict
+
+from bench.bench_endpoints import preparar_base
+from bench.fake_vps import VPSFalso
+from bench.inventario import guardar_resultados, ids_inventario
+from models import db as database
+
+
+async def ejecutar(args, filas: int) -> Dict:
+    import relay
+    from page_cache import cache_paginas
+
+    rng = random.Random(11)
+    ids = ids_inventario(filas)
+    vps = VPSFalso()
+    await vps.iniciar()
+    sede = asyncio.create_task(relay.connect_to_vps_and_listen("bench", vps.url))
+    await vps.esperar_sede()
+
+    resultados = {}
+    try:
+        cache_paginas.invalidar_todo()
+        frios = rng.sample(ids, min(args.solicitudes, len(ids)))
+        resultados["cache_fria"] = await vps.rafaga(frios, len(frios), args.concurrencia)
+
+        calientes = rng.sample(ids, min(args.calientes, len(ids)))
+        await vps.rafaga(calientes, len(calientes), args.concurrencia)  # precarga
+        resultados["cache_caliente"] = await vps.rafaga(calientes, args.solicitudes, args.concurrencia)
+
+        cache_paginas.invalidar_todo()
+        virales = rng.sample(ids, 5)
+        resultados["virales_sin_cache"] = await vps.rafaga(virales, args.solicitudes, args.concurrencia)
+        resultados["cache_paginas"] = cache_paginas.estadisticas()
+        resultados["consultas_compartidas"] = relay.consultas_en_vuelo.estadisticas(top=5)
+    finally:
+        sede.cancel()
+        try:
+            await sede
+        except asyncio.CancelledError:
+            pass
+        await vps.detener()
+        await database.cerrar_db_async()
+
+    for nombre in ("cache_fria", "cache_caliente", "virales_sin_cache"):
+        r = resultados[nombre]
+        print(f"{nombre:<20} n={r['n']:>6} p50={r['p50_ms']:>8.2f} ms p99={r['p99_ms']:>8.2f} ms  "
+              f"{r['por_segundo']:>9.1f}/s  errores={r['errores']}")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100000)
+    parser.add_argument("--db", default=None, help="Base a usar o reutilizar (por defecto, una temporal)")
+    parser.add_argument("--solicitudes", type=int, default=5000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--calientes", type=int, default=200, help="Activos distintos en el escenario con caché")
+    parser.add_argument("--salida", default=None)
+    args = parser.parse_args()
+    # relay registra cada mensaje en INFO; aquí solo interesan los errores
+    logging.basicConfig(level=logging.WARNING)
+
+    ruta = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+    base = preparar_base(ruta, args.filas)
+    print(f"inventario: {base}")
+    resultados = asyncio.run(ejecutar(args, base["filas"]))
+    parametros = {**vars(args), "base": base, "async_db": os.environ.get("QRIZATE_ASYNC_DB", "0")}
+    print("resultados en", guardar_resultados("relay", parametros, resultados, args.salida))
+
+
+if __name__ == "__main__":
+    main()
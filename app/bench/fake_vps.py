@@ -0,0 +1,126 @@
+"""
+VPS de prueba: servidor WebSocket local que hace el papel del VPS real frente a relay.py.
+Acepta la conexión de la sede en /<sede_id>, le envía solicitudes get_asset y correlaciona
+las respuestas por request_id para medir latencia de ida y vuelta.
+
+Uso independiente (la sede se conecta con VPS_URL=ws://127.0.0.1:8765/):
+    python -m bench.fake_vps --puerto 8765 --solicitudes 5000 --ids B0000000 B0000001
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+import websockets
+
+
+class VPSFalso:
+    def __init__(self, host: str = "127.0.0.1", puerto: int = 0):
+        self.host, self.puerto = host, puerto
+        self.sede: Optional[str] = None
+        self._conexion = None
+        self._conectada = asyncio.Event()
+        self._pendientes: Dict[str, asyncio.Future] = {}
+        self._contador = itertools.count()
+        self._servidor = None
+
+    @property
+    def url(self) -> str:
+        """Base para connect_to_vps_and_listen (que le agrega el sede_id)."""
+        return f"ws://{self.host}:{self.puerto}/"
+
+    async def iniciar(self):
+        self._servidor = await websockets.serve(self._atender, self.host, self.puerto, max_size=None)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+
+    async def detener(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+
+    async def esperar_sede(self, timeout: float = 10.0):
+        await asyncio.wait_for(self._conectada.wait(), timeout)
+
+    async def _atender(self, websocket, path: Optional[str] = None):
+        ruta = path if path is not None else websocket.request.path
+        self.sede = ruta.lstrip("/")
+        self._conexion = websocket
+        self._conectada.set()
+        try:
+            async for mensaje in websocket:
+                data = json.loads(mensaje)
+                futuro = self._pendientes.pop(data.get("request_id"), None)
+                if futuro is not None and not futuro.done():
+                    futuro.set_result((time.perf_counter(), data))
+        except websockets.ConnectionClosed:
+            pass  # la sede se desconectó (o se canceló su tarea al terminar el benchmark)
+        finally:
+            self._conectada.clear()
+            for futuro in self._pendientes.values():
+                if not futuro.done():
+                    futuro.set_exception(ConnectionError("La sede se desconectó"))
+            self._pendientes.clear()
+
+    async def solicitar(self, asset_id: str) -> float:
+        """Envía un get_asset y devuelve la latencia de ida y vuelta en ms."""
+        request_id = f"r{next(self._contador)}"
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendientes[request_id] = futuro
+        inicio = time.perf_counter()
+        await self._conexion.send(json.dumps({"action": "get_asset", "asset_id": asset_id, "request_id": request_id}))
+        fin, data = await futuro
+        if "html" not in data.get("data", {}):
+            raise ValueError(f"Respuesta sin html para {asset_id}")
+        return (fin - inicio) * 1000
+
+    async def rafaga(self, ids: List[str], solicitudes: int, concurrencia: int) -> Dict:
+        """`solicitudes` get_asset con hasta `concurrencia` en vuelo; latencias y duración total."""
+        from bench.inventario import resumen_latencias
+        latencias, errores = [], 0
+        secuencia = iter(range(solicitudes))
+
+        async def cliente():
+            nonlocal errores
+            for i in secuencia:
+                try:
+                    latencias.append(await self.solicitar(ids[i % len(ids)]))
+                except (ValueError, ConnectionError):
+                    errores += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*[cliente() for _ in range(concurrencia)])
+        resumen = resumen_latencias(latencias, time.perf_counter() - inicio)
+        resumen["errores"] = errores
+        return resumen
+
+
+async def _principal(args):
+    vps = VPSFalso(args.host, args.puerto)
+    await vps.iniciar()
+    print(f"VPS falso escuchando en {vps.url}; esperando a la sede...")
+    await vps.esperar_sede(timeout=args.espera)
+    print(f"Sede conectada: {vps.sede}")
+    resumen = await vps.rafaga(args.ids, args.solicitudes, args.concurrencia)
+    print(json.dumps(resumen, indent=2))
+    await vps.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--solicitudes", type=int, default=5000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--espera", type=float, default=120.0, help="Segundos esperando a que se conecte la sede")
+    parser.add_argument("--ids", nargs="+", required=True)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_principal(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Inventario sintético reproducible y utilidades comunes de los benchmarks: carga de la
+base, percentiles y resultados en JSON para comparar corridas entre commits.
+
+Las distribuciones imitan una empresa con varias sedes: pocas sedes concentran la mayoría
+de los activos, las áreas siguen una cola larga (Zipf) y la mayor parte está en buen estado.
+"""
+
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from models.bulk import COLUMNAS_ACTIVO, upsert_activos
+
+SEDES = {
+    "Sede Central Lima": 40, "Planta Arequipa": 20, "Oficinas-AJ": 15, "Almacén Piura": 10,
+    "Sucursal Trujillo": 8, "Sucursal Cusco": 5, "Oficina Iquitos": 2,
+}
+AREAS = [
+    "Tecnologías de la Información", "Contabilidad", "Logística", "Recursos Humanos", "Producción",
+    "Mantenimiento", "Ventas", "Tesorería", "Control de Calidad", "Gerencia General", "Legal",
+    "Seguridad", "Compras", "Marketing", "Auditoría Interna", "Proyectos", "Archivo", "Comedor",
+    "Laboratorio", "Atención al Cliente",
+]
+ESTADOS = {"Bueno": 70, "Regular": 20, "Malo": 6, "En reparación": 3, "Dado de baja": 1}
+CATEGORIAS = {
+    "EQUIPOS DE CÓMPUTO": 35, "MUEBLES Y ENSERES": 30, "EQUIPOS DIVERSOS": 20,
+    "MAQUINARIA": 10, "VEHÍCULOS": 5,
+}
+BIENES = {
+    "EQUIPOS DE CÓMPUTO": [("Laptop", ["HP", "Dell", "Lenovo"]), ("Monitor", ["LG", "Samsung", "Dell"]),
+                           ("Impresora", ["Epson", "HP", "Brother"])],
+    "MUEBLES Y ENSERES": [("Escritorio", ["Muebles Perú", "Tugo"]), ("Silla ergonómica", ["Tugo", "Ofisillas"]),
+                          ("Archivador", ["Muebles Perú"])],
+    "EQUIPOS DIVERSOS": [("Aire acondicionado", ["LG", "Midea"]), ("Proyector", ["Epson", "BenQ"]),
+                         ("Teléfono IP", ["Grandstream", "Yealink"])],
+    "MAQUINARIA": [("Compresora", ["Atlas Copco"]), ("Montacargas", ["Toyota", "Hyster"])],
+    "VEHÍCULOS": [("Camioneta", ["Toyota", "Nissan"]), ("Motocicleta", ["Honda"])],
+}
+PESOS_AREAS = [1 / (rango + 1) for rango in range(len(AREAS))]
+
+
+def _sorteo(rng: random.Random, pesos: Dict[str, int]) -> str:
+    return rng.choices(list(pesos), weights=list(pesos.values()))[0]
+
+
+def generar_inventario(n: int, semilla: int = 42, prefijo: str = "B", inicio: int = 0) -> List[Dict]:
+    """`n` filas listas para upsert_activos; la misma semilla produce el mismo inventario."""
+    rng = random.Random(semilla + inicio)
+    filas = []
+    for i in range(inicio, inicio + n):
+        categoria = _sorteo(rng, CATEGORIAS)
+        bien, marcas = rng.choice(BIENES[categoria])
+        marca = rng.choice(marcas)
+        sede = _sorteo(rng, SEDES)
+        area = rng.choices(AREAS, weights=PESOS_AREAS)[0]
+        centro = 100 + AREAS.index(area)
+        correlativo = f"{prefijo}{i:07d}"
+        fila = {nombre: None for nombre in COLUMNAS_ACTIVO}
+        fila.update(
+            id=correlativo,
+            correlativo=correlativo,
+            categoria=categoria,
+            estado=_sorteo(rng, ESTADOS),
+            sede=sede,
+            area=area,
+            central_de_costos=f"CC-{centro}",
+            nombre_central_costos=f"Centro de costos {area}",
+            numero_central_costo=str(centro),
+            cuenta_contable=f"33{list(CATEGORIAS).index(categoria) + 1}{rng.randrange(10):02d}",
+            descripcion=f"{bien} {marca} {rng.choice(['nuevo', 'usado', 'asignado', 'de reserva', ''])}".strip(),
+            marca=marca,
+            modelo=f"{marca[:3].upper()}-{rng.randrange(100, 999)}",
+            numero_serie=f"SN{rng.getrandbits(40):010X}",
+            codigo_activo=f"{correlativo}-{centro}",
+            url=f"https://qrizate.example/activo?id={correlativo}",
+        )
+        filas.append(fila)
+    return filas
+
+
+def cargar_inventario(engine, n: int, semilla: int = 42, bloque: int = 50000) -> float:
+    """Carga `n` filas por bloques (sin materializar el millón de una vez); devuelve segundos."""
+    inicio = time.perf_counter()
+    for desde in range(0, n, bloque):
+        with engine.begin() as conn:
+            upsert_activos(conn, generar_inventario(min(bloque, n - desde), semilla, inicio=desde))
+    return time.perf_counter() - inicio
+
+
+def ids_inventario(n: int, prefijo: str = "B") -> List[str]:
+    return [f"{prefijo}{i:07d}" for i in range(n)]
+
+# --- Resultados ---
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))]
+
+
+def resumen_latencias(valores_ms: List[float], segundos: Optional[float] = None) -> Dict:
+    resumen = {
+        "n": len(valores_ms),
+        "p50_ms": round(percentil(valores_ms, 50), 3),
+        "p95_ms": round(percentil(valores_ms, 95), 3),
+        "p99_ms": round(percentil(valores_ms, 99), 3),
+        "max_ms": round(max(valores_ms), 3),
+        "media_ms": round(sum(valores_ms) / len(valores_ms), 3),
+    }
+    if segundos:
+        resumen["por_segundo"] = round(len(valores_ms) / segundos, 1)
+    return resumen
+
+
+def entorno() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def guardar_resultados(nombre: str, parametros: Dict, resultados: Dict, salida: Optional[str] = None) -> str:
+    """Escribe bench/resultados/<nombre>-<commit>-<fecha>.json (o `salida`) y devuelve la ruta."""
+    datos = {"benchmark": nombre, "entorno": entorno(), "parametros": parametros, "resultados": resultados}
+    if salida is None:
+        carpeta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+        os.makedirs(carpeta, exist_ok=True)
+        marca = datetime.now().strftime("%Y%m%d-%H%M%S")
+        salida = os.path.join(carpeta, f"{nombre}-{datos['entorno']['commit'] or 'sin-commit'}-{marca}.json")
+    with open(salida, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, indent=2, ensure_ascii=False)
+    return salida
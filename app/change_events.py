@@ -0,0 +1,173 @@
+"""
+Notificaciones de cambios en vivo para los clientes de la red local (SSE / WebSocket).
+Las rutas de escritura solo marcan que hubo cambios; un hilo publicador lee el registro
+de revisiones (models/sync.py) y reparte eventos compactos {id, op, revision} a cada
+suscriptor. Cada suscriptor tiene su propia cola acotada en la que los cambios del mismo
+activo se combinan; si un cliente lento la desborda, recibe un único evento "resync"
+en vez de frenar a los demás o a quien escribe.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, select
+
+MAX_PENDIENTES_POR_SUSCRIPTOR = 1000
+MAX_EVENTOS_POR_PUBLICACION = 1000  # más cambios que esto en una ronda se anuncian como "resync"
+
+
+class Suscriptor:
+    """Cola de un cliente. Sus métodos corren en el event loop del servidor."""
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self._pendientes: "OrderedDict[str, dict]" = OrderedDict()
+        self._resync: Optional[int] = None
+        self._hay_datos = asyncio.Event()
+        self.descartados = 0
+
+    def agregar(self, eventos: List[dict]):
+        for evento in eventos:
+            if evento["op"] == "resync":
+                self._resincronizar(evento["revision"])
+                continue
+            if self._resync is not None:
+                self._resync = evento["revision"]
+                continue
+            self._pendientes.pop(evento["id"], None)
+            self._pendientes[evento["id"]] = evento
+            if len(self._pendientes) > MAX_PENDIENTES_POR_SUSCRIPTOR:
+                self._resincronizar(evento["revision"])
+        self._hay_datos.set()
+
+    def _resincronizar(self, revision: int):
+        self.descartados += len(self._pendientes)
+        self._pendientes.clear()
+        self._resync = max(revision, self._resync or 0)
+
+    async def siguiente(self, espera: float) -> Optional[List[dict]]:
+        """Eventos acumulados desde la última llamada, o None si pasó `espera` sin cambios."""
+        try:
+            await asyncio.wait_for(self._hay_datos.wait(), espera)
+        except asyncio.TimeoutError:
+            return None
+        self._hay_datos.clear()
+        if self._resync is not None:
+            eventos = [{"op": "resync", "revision": self._resync}]
+            self._resync = None
+        else:
+            eventos = list(self._pendientes.values())
+        self._pendientes.clear()
+        return eventos
+
+
+class CanalCambios:
+    def __init__(self):
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+        self._pendiente = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.ultima_revision: Optional[int] = None
+        self.publicaciones = 0
+        self.eventos_enviados = 0
+
+    def suscribir(self, loop: asyncio.AbstractEventLoop) -> Suscriptor:
+        """Registra un cliente (lee la base: llamar fuera del event loop)."""
+        suscriptor = Suscriptor(loop)
+        with self._lock:
+            if self.ultima_revision is None:
+                self.ultima_revision = leer_revision_actual()
+            self._suscriptores.add(suscriptor)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name="publicador-cambios", daemon=True)
+                self._hilo.start()
+        return suscriptor
+
+    def desuscribir(self, suscriptor: Suscriptor):
+        with self._lock:
+            self._suscriptores.discard(suscriptor)
+            if not self._suscriptores:
+                # Sin clientes no se sigue el registro; el próximo parte de la revisión de ese momento
+                self.ultima_revision = None
+
+    def notificar(self):
+        """Llamar después de confirmar una escritura. No bloquea ni consulta la base."""
+        if self._suscriptores:
+            self._pendiente.set()
+
+    def _bucle(self):
+        while True:
+            self._pendiente.wait()
+            self._pendiente.clear()
+            try:
+                self._publicar()
+            except Exception as e:
+                logging.error(f"Error al publicar cambios: {e}")
+
+    def _publicar(self):
+        with self._lock:
+            desde = self.ultima_revision
+            if desde is None:
+                return
+            hasta, eventos = leer_eventos(desde)
+            self.ultima_revision = hasta
+            suscriptores = list(self._suscriptores)
+        if not eventos:
+            return
+        self.publicaciones += 1
+        for suscriptor in suscriptores:
+            try:
+                suscriptor.loop.call_soon_threadsafe(suscriptor.agregar, eventos)
+                self.eventos_enviados += len(eventos)
+            except RuntimeError:
+                # El event loop del cliente ya se cerró
+                self.desuscribir(suscriptor)
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        return {
+            "suscriptores": len(suscriptores),
+            "ultima_revision": self.ultima_revision or 0,
+            "publicaciones": self.publicaciones,
+            "eventos_enviados": self.eventos_enviados,
+            "eventos_descartados": sum(suscriptor.descartados for suscriptor in suscriptores),
+        }
+
+
+def leer_revision_actual() -> int:
+    from models.db import get_engine
+    from models.sync import revision_activos
+    with get_engine().connect() as conn:
+        return conn.execute(select(revision_activos.c.valor).where(revision_activos.c.id == 1)).scalar() or 0
+
+def leer_eventos(desde: int):
+    """(revisión alcanzada, eventos) de los cambios posteriores a `desde`, en orden de revisión."""
+    from models.activo import Activo
+    from models.db import get_engine
+    from models.sync import activos_eliminados, revision_activos
+    tabla = Activo.__table__
+    with get_engine().connect() as conn:
+        hasta = conn.execute(select(revision_activos.c.valor).where(revision_activos.c.id == 1)).scalar() or 0
+        if hasta <= desde:
+            return desde, []
+        limite = MAX_EVENTOS_POR_PUBLICACION + 1
+        modificados = conn.execute(
+            select(tabla.c.id, tabla.c.revision)
+            .where(and_(tabla.c.revision > desde, tabla.c.revision <= hasta)).limit(limite)
+        ).all()
+        eliminados = conn.execute(
+            select(activos_eliminados.c.id, activos_eliminados.c.revision)
+            .where(and_(activos_eliminados.c.revision > desde, activos_eliminados.c.revision <= hasta)).limit(limite)
+        ).all()
+    if len(modificados) + len(eliminados) > MAX_EVENTOS_POR_PUBLICACION:
+        return hasta, [{"op": "resync", "revision": hasta}]
+    eventos = [{"id": fila.id, "op": "upsert", "revision": fila.revision} for fila in modificados]
+    eventos += [{"id": fila.id, "op": "delete", "revision": fila.revision} for fila in eliminados]
+    eventos.sort(key=lambda evento: evento["revision"])
+    return hasta, eventos
+
+
+canal_cambios = CanalCambios()
@@ -0,0 +1,330 @@
+"""
+Worker de importaciones masivas.
+Un hilo en segundo plano toma los trabajos de la cola, normaliza el archivo subido a un
+JSONL de filas y lo aplica en lotes. Cada lote y el avance del trabajo se confirman en la
+misma transacción, por lo que tras un corte el trabajo se reanuda desde el último lote
+confirmado sin duplicar ni perder filas.
+"""
+
+import csv
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.bulk import COLUMNAS_ACTIVO, buscar_ids_por, completar_datos_activo, upsert_activos
+from models.db import get_data_dir, get_db
+from models.import_job import ImportJob
+from invalidation import invalidar_activos
+
+TAMANO_LOTE_IMPORTACION = 500
+MAX_ERRORES_GUARDADOS = 1000
+CAMPOS_OBLIGATORIOS = ("correlativo", "sede", "area")
+ESTADOS_REANUDABLES = ("pendiente", "preparando", "procesando")
+
+# Mismos encabezados que acepta la carga de Excel del frontend (fieldMap en renderer.js)
+MAPA_COLUMNAS = {
+    'ID': 'id',
+    'CATEGORIA': 'categoria',
+    'CENTRAL DE COSTOS': 'central_de_costos',
+    'NOMBRE DE CENTRAL DE COSTOS': 'nombre_central_costos',
+    'NOMBRE CENTRAL DE COSTOS': 'nombre_central_costos',
+    'AREA': 'area',
+    'CORRELATIVO': 'correlativo',
+    'CUENTA CONTABLE': 'cuenta_contable',
+    'ESTADO': 'estado',
+    'DESCRIPCION': 'descripcion',
+    'DESCRIPCIÓN': 'descripcion',
+    'MARCA': 'marca',
+    'MODELO': 'modelo',
+    'NUMERO DE SERIE': 'numero_serie',
+    'NÚMERO DE SERIE': 'numero_serie',
+    'SERIE': 'numero_serie',
+    'SEDE': 'sede',
+    'URL': 'url',
+    'NUMERO CENTRAL COSTO': 'numero_central_costo',
+}
+
+cola_trabajos: "queue.Queue[str]" = queue.Queue()
+_hilo_worker: Optional[threading.Thread] = None
+
+
+def carpeta_importaciones() -> str:
+    carpeta = os.path.join(get_data_dir(), "imports")
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+
+# --- Lectura y normalización de archivos ---
+
+def normalizar_valor(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    texto = str(valor).strip()
+    return texto or None
+
+
+def normalizar_fila(fila: dict) -> dict:
+    """Traduce los encabezados del archivo a los campos de Activo y descarta columnas desconocidas."""
+    datos = {}
+    for clave, valor in fila.items():
+        if clave is None:
+            continue
+        limpia = str(clave).strip()
+        campo = MAPA_COLUMNAS.get(limpia.upper(), limpia.lower())
+        if campo in COLUMNAS_ACTIVO:
+            datos[campo] = normalizar_valor(valor)
+    return datos
+
+
+def leer_filas_archivo(ruta: str, formato: str) -> Iterator[dict]:
+    if formato == "csv":
+        with open(ruta, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+    elif formato == "jsonl":
+        with open(ruta, encoding="utf-8-sig") as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    fila = json.loads(linea)
+                except json.JSONDecodeError as e:
+                    fila = {"__error__": f"JSON inválido: {e}"}
+                yield fila if isinstance(fila, dict) else {"__error__": "La línea no es un objeto JSON"}
+    elif formato == "xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise RuntimeError("Se requiere el paquete 'openpyxl' para importar archivos XLSX")
+        libro = load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            filas = libro.worksheets[0].iter_rows(values_only=True)
+            encabezado = next(filas, None) or ()
+            for valores in filas:
+                if all(v is None for v in valores):
+                    continue
+                yield dict(zip(encabezado, valores))
+        finally:
+            libro.close()
+    else:
+        raise RuntimeError(f"Formato de importación no soportado: {formato}")
+
+
+def ruta_chunk(job: ImportJob, secuencia: int) -> str:
+    return f"{job.archivo_filas}.{secuencia:06d}.part"
+
+
+def escribir_atomico(ruta: str, filas: Iterator[dict]) -> int:
+    """Escribe las filas como JSONL en un temporal y lo renombra; retorna la cantidad escrita."""
+    temporal = ruta + ".tmp"
+    total = 0
+    with open(temporal, "w", encoding="utf-8") as f:
+        for fila in filas:
+            f.write(json.dumps(fila, ensure_ascii=False) + "\n")
+            total += 1
+    os.replace(temporal, ruta)
+    return total
+
+
+def filas_de_chunks(job: ImportJob) -> Iterator[dict]:
+    for secuencia in range(job.chunks_recibidos):
+        with open(ruta_chunk(job, secuencia), encoding="utf-8") as f:
+            for linea in f:
+                yield json.loads(linea)
+
+
+def preparar_job(db: Session, job: ImportJob):
+    """Genera el JSONL de filas normalizadas a partir del archivo subido o de los chunks."""
+    job.estado = "preparando"
+    job.actualizado_en = time.time()
+    db.commit()
+
+    if job.formato == "chunks":
+        filas = filas_de_chunks(job)
+    else:
+        filas = (fila if "__error__" in fila else normalizar_fila(fila)
+                 for fila in leer_filas_archivo(job.archivo_original, job.formato))
+    job.total_filas = escribir_atomico(job.archivo_filas, filas)
+    job.preparado = True
+    job.actualizado_en = time.time()
+    db.commit()
+
+    if job.formato == "chunks":
+        for secuencia in range(job.chunks_recibidos):
+            os.remove(ruta_chunk(job, secuencia))
+
+
+# --- Aplicación por lotes ---
+
+def validar_lote(conn, job: ImportJob, lote: List[dict], inicio: int):
+    """Separa las filas aplicables de las que tienen error. `inicio` es el índice de la primera fila."""
+    validas, errores = [], []
+    correlativos_vistos, ids_vistos = set(), set()
+    for desplazamiento, fila in enumerate(lote):
+        numero = inicio + desplazamiento + 1
+        if "__error__" in fila:
+            errores.append({"fila": numero, "correlativo": None, "error": fila["__error__"]})
+            continue
+        faltan = [campo for campo in CAMPOS_OBLIGATORIOS if not fila.get(campo)]
+        if faltan:
+            errores.append({"fila": numero, "correlativo": fila.get("correlativo"),
+                            "error": f"Faltan campos obligatorios: {', '.join(faltan)}"})
+            continue
+        data = completar_datos_activo({c: fila.get(c) for c in COLUMNAS_ACTIVO}, job.url_base or "", job.sede_id or "")
+        if data["correlativo"] in correlativos_vistos or data["id"] in ids_vistos:
+            errores.append({"fila": numero, "correlativo": data["correlativo"], "error": "Fila repetida en el archivo"})
+            continue
+        correlativos_vistos.add(data["correlativo"])
+        ids_vistos.add(data["id"])
+        validas.append((numero, data))
+
+    ids_por_correlativo = buscar_ids_por(conn, "correlativo", correlativos_vistos)
+    aplicables = []
+    for numero, data in validas:
+        propietario = ids_por_correlativo.get(data["correlativo"])
+        if propietario is not None and propietario != data["id"]:
+            errores.append({"fila": numero, "correlativo": data["correlativo"],
+                            "error": f"El correlativo ya pertenece al activo {propietario}"})
+        else:
+            aplicables.append(data)
+    return aplicables, errores
+
+
+def aplicar_lote(db: Session, job: ImportJob, lote: List[dict], inicio: int):
+    conn = db.connection()
+    aplicables, errores = validar_lote(conn, job, lote, inicio)
+    resultado = upsert_activos(conn, aplicables)
+
+    job.creados += len(resultado["creados"])
+    job.actualizados += len(resultado["actualizados"])
+    job.sin_cambios += len(resultado["sin_cambios"])
+    if errores:
+        guardados = json.loads(job.errores or "[]")
+        guardados.extend(errores[:max(0, MAX_ERRORES_GUARDADOS - len(guardados))])
+        job.errores = json.dumps(guardados, ensure_ascii=False)
+        job.filas_con_error += len(errores)
+    job.filas_confirmadas = inicio + len(lote)
+    job.actualizado_en = time.time()
+    # Las filas del lote y el avance del trabajo se confirman juntos
+    db.commit()
+    invalidar_activos(resultado["creados"] + resultado["actualizados"])
+
+
+def leer_lotes(ruta: str, desde: int, tamano: int) -> Iterator[List[dict]]:
+    with open(ruta, encoding="utf-8") as f:
+        lineas = itertools.islice(f, desde, None)
+        while True:
+            lote = [json.loads(linea) for linea in itertools.islice(lineas, tamano)]
+            if not lote:
+                return
+            yield lote
+
+
+def procesar_job(job_id: str):
+    db_session: Session = next(get_db())
+    try:
+        job = db_session.get(ImportJob, job_id)
+        if job is None or job.estado not in ESTADOS_REANUDABLES:
+            return
+        if not job.preparado:
+            preparar_job(db_session, job)
+
+        job.estado = "procesando"
+        job.iniciado_en = time.time()
+        job.filas_al_iniciar = job.filas_confirmadas
+        db_session.commit()
+        logging.info(f"Importación {job_id}: aplicando desde la fila {job.filas_confirmadas + 1} de {job.total_filas}")
+
+        inicio = job.filas_confirmadas
+        for lote in leer_lotes(job.archivo_filas, inicio, TAMANO_LOTE_IMPORTACION):
+            aplicar_lote(db_session, job, lote, inicio)
+            inicio += len(lote)
+
+        job.estado = "completado"
+        job.finalizado_en = time.time()
+        db_session.commit()
+        logging.info(f"Importación {job_id} completada: {job.creados} creados, {job.actualizados} actualizados, "
+                     f"{job.sin_cambios} sin cambios, {job.filas_con_error} con error")
+    except Exception as e:
+        db_session.rollback()
+        logging.error(f"Importación {job_id} fallida: {e}")
+        job = db_session.get(ImportJob, job_id)
+        if job is not None:
+            job.estado = "fallido"
+            job.mensaje = str(e)
+            job.actualizado_en = time.time()
+            db_session.commit()
+    finally:
+        db_session.close()
+
+
+# --- Hilo del worker ---
+
+def _bucle_worker():
+    while True:
+        job_id = cola_trabajos.get()
+        try:
+            procesar_job(job_id)
+        except Exception as e:
+            logging.error(f"Error inesperado en el worker de importaciones: {e}")
+        finally:
+            cola_trabajos.task_done()
+
+
+def encolar_job(job_id: str):
+    cola_trabajos.put(job_id)
+
+
+def iniciar_worker_importaciones():
+    """Arranca el hilo del worker y reencola los trabajos que quedaron a medias."""
+    global _hilo_worker
+    if _hilo_worker is not None and _hilo_worker.is_alive():
+        return
+    _hilo_worker = threading.Thread(target=_bucle_worker, name="importaciones", daemon=True)
+    _hilo_worker.start()
+
+    db_session: Session = next(get_db())
+    try:
+        pendientes = (db_session.query(ImportJob.id)
+                      .filter(ImportJob.estado.in_(ESTADOS_REANUDABLES))
+                      .order_by(ImportJob.creado_en).all())
+    finally:
+        db_session.close()
+    for (job_id,) in pendientes:
+        logging.info(f"Reanudando importación pendiente {job_id}")
+        encolar_job(job_id)
+
+
+def resumen_job(job: ImportJob) -> Dict:
+    """Estado del trabajo con avance y velocidad de la ejecución en curso."""
+    filas_por_segundo = None
+    if job.iniciado_en:
+        fin = job.finalizado_en or job.actualizado_en or time.time()
+        transcurrido = fin - job.iniciado_en
+        if transcurrido > 0:
+            filas_por_segundo = round((job.filas_confirmadas - job.filas_al_iniciar) / transcurrido, 1)
+    porcentaje = round(100.0 * job.filas_confirmadas / job.total_filas, 1) if job.total_filas else 0.0
+    return {
+        "id": job.id,
+        "estado": job.estado,
+        "formato": job.formato,
+        "nombre_archivo": job.nombre_archivo,
+        "total_filas": job.total_filas,
+        "filas_procesadas": job.filas_confirmadas,
+        "porcentaje": porcentaje,
+        "filas_por_segundo": filas_por_segundo,
+        "creados": job.creados,
+        "actualizados": job.actualizados,
+        "sin_cambios": job.sin_cambios,
+        "filas_con_error": job.filas_con_error,
+        "errores": json.loads(job.errores or "[]"),
+        "mensaje": job.mensaje,
+    }
@@ -0,0 +1,23 @@
+"""
+Lo que hay que descartar o avisar después de escribir en `activos`: páginas del relay
+(page_cache.py), facetas (result_cache.py) y los clientes en vivo (change_events.py).
+Lo usan tanto los endpoints como el worker de importaciones.
+"""
+
+from typing import Iterable
+
+from change_events import canal_cambios
+from page_cache import cache_paginas
+from result_cache import cache_facetas
+
+
+def invalidar_activos(ids: Iterable[str]):
+    """Descarta lo derivado de los activos modificados. Llamar después del commit."""
+    cache_paginas.invalidar(ids)
+    cache_facetas.invalidar_todo()
+    canal_cambios.notificar()
+
+def invalidar_todos_los_activos():
+    cache_paginas.invalidar_todo()
+    cache_facetas.invalidar_todo()
+    canal_cambios.notificar()
@@ -0,0 +1,182 @@
+"""
+Hojas de etiquetas en PDF generadas página por página. El QR se dibuja como rectángulos
+vectoriales a partir de la matriz de módulos (sin imágenes) y el texto usa Helvetica,
+una de las fuentes estándar del PDF, así que el archivo no incrusta nada y cada página
+se escribe y se envía antes de armar la siguiente.
+"""
+
+import zlib
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List
+
+PUNTOS_POR_MM = 72 / 25.4
+TAMANOS_PAGINA_MM = {"A4": (210.0, 297.0), "Letter": (215.9, 279.4)}
+ANCHO_MEDIO_HELVETICA = 0.55  # ancho promedio de un carácter, en em; para recortar texto
+INTERLINEADO = 1.2
+RELLENO_MM = 1.5
+
+def numero(valor: float) -> str:
+    return f"{valor:.2f}".rstrip("0").rstrip(".")
+
+def texto_pdf(texto: str) -> bytes:
+    # Helvetica con WinAnsiEncoding: cp1252 cubre tildes y ñ; lo demás se reemplaza por "?"
+    crudo = texto.encode("cp1252", errors="replace")
+    return b"(" + crudo.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def recortar(texto: str, ancho: float, tamano_fuente: float) -> str:
+    maximo = max(1, int(ancho / (tamano_fuente * ANCHO_MEDIO_HELVETICA)))
+    return texto if len(texto) <= maximo else texto[:maximo - 1] + "…"
+
+# --- Escritura del PDF ---
+
+class EscritorPDF:
+    """Serializa objetos llevando la cuenta de sus posiciones para la tabla xref final."""
+    def __init__(self):
+        self.posicion = 0
+        self.posiciones: Dict[int, int] = {}
+
+    def _emitir(self, datos: bytes) -> bytes:
+        self.posicion += len(datos)
+        return datos
+
+    def cabecera(self) -> bytes:
+        return self._emitir(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def objeto(self, numero_objeto: int, cuerpo: bytes) -> bytes:
+        self.posiciones[numero_objeto] = self.posicion
+        return self._emitir(b"%d 0 obj\n" % numero_objeto + cuerpo + b"\nendobj\n")
+
+    def flujo(self, numero_objeto: int, contenido: bytes) -> bytes:
+        comprimido = zlib.compress(contenido, 6)
+        cuerpo = b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(comprimido) + comprimido + b"\nendstream"
+        return self.objeto(numero_objeto, cuerpo)
+
+    def cierre(self, raiz: int) -> bytes:
+        total = max(self.posiciones) + 1
+        lineas = [b"xref\n0 %d\n" % total, b"0000000000 65535 f \n"]
+        for numero_objeto in range(1, total):
+            lineas.append(b"%010d 00000 n \n" % self.posiciones[numero_objeto])
+        lineas.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (total, raiz, self.posicion))
+        return self._emitir(b"".join(lineas))
+
+# --- Diseño de la hoja ---
+
+def calcular_grilla(diseno: dict) -> dict:
+    """
+    Posiciones (en puntos, origen abajo a la izquierda) de cada celda de la página.
+    Sin tamaño de etiqueta explícito, las celdas reparten el área útil de la página.
+    """
+    ancho_pagina, alto_pagina = diseno["ancho_pagina_mm"], diseno["alto_pagina_mm"]
+    filas, columnas = diseno["filas"], diseno["columnas"]
+    margen, espacio = diseno["margen_mm"], diseno["espacio_mm"]
+    ancho = diseno.get("ancho_etiqueta_mm") or (ancho_pagina - 2 * margen - (columnas - 1) * espacio) / columnas
+    alto = diseno.get("alto_etiqueta_mm") or (alto_pagina - 2 * margen - (filas - 1) * espacio) / filas
+    if ancho <= 0 or alto <= 0 or \
+            margen + columnas * ancho + (columnas - 1) * espacio > ancho_pagina + 0.01 or \
+            margen + filas * alto + (filas - 1) * espacio > alto_pagina + 0.01:
+        raise ValueError("Las etiquetas no caben en la página con esa grilla y márgenes")
+    celdas = []
+    for fila in range(filas):
+        for columna in range(columnas):
+            x = margen + columna * (ancho + espacio)
+            y_superior = alto_pagina - margen - fila * (alto + espacio)
+            celdas.append((x * PUNTOS_POR_MM, (y_superior - alto) * PUNTOS_POR_MM))
+    return {
+        "pagina": (ancho_pagina * PUNTOS_POR_MM, alto_pagina * PUNTOS_POR_MM),
+        "celda": (ancho * PUNTOS_POR_MM, alto * PUNTOS_POR_MM),
+        "celdas": celdas,
+    }
+
+def dibujar_qr(matriz: List[List[bool]], x: float, y: float, lado: float) -> List[bytes]:
+    # Un rectángulo por tramo horizontal de módulos oscuros; se rellenan todos con un solo "f"
+    modulo = lado / len(matriz)
+    rectangulos = []
+    for fila_indice, fila in enumerate(matriz):
+        y_fila = y + lado - (fila_indice + 1) * modulo
+        columna = 0
+        while columna < len(fila):
+            if not fila[columna]:
+                columna += 1
+                continue
+            inicio = columna
+            while columna < len(fila) and fila[columna]:
+                columna += 1
+            rectangulos.append(
+                f"{numero(x + inicio * modulo)} {numero(y_fila)} {numero((columna - inicio) * modulo)} {numero(modulo)} re\n".encode("ascii")
+            )
+    return rectangulos + [b"f\n"] if rectangulos else []
+
+def dibujar_etiqueta(fila, matriz, x: float, y: float, grilla: dict, diseno: dict) -> List[bytes]:
+    ancho, alto = grilla["celda"]
+    relleno = RELLENO_MM * PUNTOS_POR_MM
+    tamano_fuente = diseno["tamano_fuente"]
+    campos = diseno["campos"]
+    alto_texto = len(campos) * tamano_fuente * INTERLINEADO
+
+    if ancho > alto:
+        # Etiqueta apaisada: QR a la izquierda, texto a la derecha (con al menos la mitad del ancho)
+        lado = min(alto - 2 * relleno, (ancho - 3 * relleno) / 2)
+        x_texto, y_texto = x + 2 * relleno + lado, y + (alto + alto_texto) / 2 - tamano_fuente
+        ancho_texto = ancho - 3 * relleno - lado
+        partes = dibujar_qr(matriz, x + relleno, y + (alto - lado) / 2, lado)
+    else:
+        # Etiqueta vertical: QR arriba centrado, texto debajo
+        lado = max(0.0, min(ancho - 2 * relleno, alto - 3 * relleno - alto_texto))
+        x_texto, y_texto = x + relleno, y + relleno + alto_texto - tamano_fuente
+        ancho_texto = ancho - 2 * relleno
+        partes = dibujar_qr(matriz, x + (ancho - lado) / 2, y + alto - relleno - lado, lado)
+
+    if campos and ancho_texto > 0:
+        partes.append(b"BT\n/F1 %s Tf\n%s TL\n%s %s Td\n" % (
+            numero(tamano_fuente).encode(), numero(tamano_fuente * INTERLINEADO).encode(),
+            numero(x_texto).encode(), numero(y_texto).encode()))
+        for campo in campos:
+            valor = getattr(fila, campo, None)
+            partes.append(texto_pdf(recortar("" if valor is None else str(valor), ancho_texto, tamano_fuente)) + b" Tj T*\n")
+        partes.append(b"ET\n")
+    return partes
+
+def generar_pdf_etiquetas(
+    bloques: Iterable[list], diseno: dict, calcular_matrices: Callable[[List[str], str], list]
+) -> Iterator[bytes]:
+    """
+    Recibe bloques de filas de activos y produce el PDF por partes: una página por vez.
+    `calcular_matrices(urls, ecc)` devuelve las matrices QR de un bloque completo, para
+    que el cálculo se reparta en el pool de procesos.
+    """
+    grilla = calcular_grilla(diseno)
+    por_pagina = len(grilla["celdas"])
+    pdf = EscritorPDF()
+    yield pdf.cabecera()
+    yield pdf.objeto(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    yield pdf.objeto(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    def etiquetas():
+        for filas in bloques:
+            matrices = calcular_matrices([fila.url or fila.id for fila in filas], diseno["ecc"])
+            yield from zip(filas, matrices)
+
+    paginas = []
+    siguiente = 4
+    caja = b"[0 0 %s %s]" % (numero(grilla["pagina"][0]).encode(), numero(grilla["pagina"][1]).encode())
+    pendientes = etiquetas()
+    while True:
+        pagina = list(islice(pendientes, por_pagina))
+        if not pagina and paginas:
+            break
+        contenido = []
+        for (fila, matriz), (x, y) in zip(pagina, grilla["celdas"]):
+            contenido.extend(dibujar_etiqueta(fila, matriz, x, y, grilla, diseno))
+        yield pdf.flujo(siguiente, b"".join(contenido))
+        yield pdf.objeto(siguiente + 1, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox %s /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (caja, siguiente)
+        ))
+        paginas.append(siguiente + 1)
+        siguiente += 2
+        if len(pagina) < por_pagina:
+            break
+
+    hijos = b" ".join(b"%d 0 R" % numero_objeto for numero_objeto in paginas)
+    yield pdf.objeto(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (hijos, len(paginas)))
+    yield pdf.cierre(1)
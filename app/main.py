@@ -2,31 +2,48 @@
 
 import os
 import sys
+
+# Antes que el resto de importaciones, para poder medirlas con --profile-startup
+from startup import arranque
+arranque.activar_si_pedido()
+
 import socket
 import logging
 import argparse
+import multiprocessing
 from contextlib import asynccontextmanager
 import asyncio
-import websockets
 import json
+from typing import Optional
 from fastapi import Body, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
 
 # NUEVOS IMPORTS para archivos estáticos
 from fastapi.staticfiles import StaticFiles
-from starlette.responses import FileResponse
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse
 
 # Importaciones de tu proyecto
-from models.db import init_db, get_db, Base, engine
+from models import db as database
+from models.db import APP_DATA_DIR, get_app_db_path, init_db, cerrar_db_async, estado_base_datos, get_engine, get_async_engine
 from routers.activos import router as activos_router
-from models.activo import Activo # Necesario para la consulta
-import uvicorn
-
-# --- NUEVOS IMPORTS PARA LA BANDEJA DEL SISTEMA ---
+from routers.imports import router as imports_router
+from routers.diagnostics import router as diagnostics_router
+from import_worker import iniciar_worker_importaciones
+from relay import connect_to_vps_and_listen, consultas_en_vuelo, estado_relay
+from page_cache import cache_paginas
+from change_events import canal_cambios
+from qr_render import cerrar_pool_qr
+from result_cache import cache_facetas
+from metrics import MedirPeticiones, estadisticas_pool, instrumentar_engine, registro
+from profiling import PerfilarPeticiones, carpeta_diagnostico, consultas_lentas
+from readiness import EstadoServidor, ejecutar_uvicorn
+
+# uvicorn, pystray y PIL se importan al usarlos (run_server, setup_and_run_tray_icon)
 import threading
-from pystray import MenuItem as item, Icon as icon
-from PIL import Image
+
+# En el ejecutable de PyInstaller, los procesos del pool de QR vuelven a lanzar este
+# programa; freeze_support los desvía a su tarea antes de que abran puertos o la bandeja.
+multiprocessing.freeze_support()
 # =============================================================================
 
 
@@ -57,15 +74,19 @@ def get_local_ip():
     finally: s.close()
     return ip
 
-parser = argparse.ArgumentParser()
-parser.add_argument("--port", type=int, default=8000)
-parser.add_argument("--public-url", type=str, default="http://qrizate.systempiura.com/asset.html")
-args = parser.parse_args()
-local_hostname = get_local_ip()
+def leer_argumentos():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--public-url", type=str, default="http://qrizate.systempiura.com/asset.html")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Reporta los tiempos de importación y de cada fase del arranque")
+    parser.add_argument("--ready-file", type=str, default=None,
+                        help="Archivo donde escribir el puerto cuando el servidor esté listo")
+    args, _ = parser.parse_known_args()  # los procesos del pool de QR reciben argumentos propios
+    return args
 
-APP_DATA_DIR = os.path.join(os.path.expanduser("~"), "AppData", "Local", "QRizate")
 os.makedirs(APP_DATA_DIR, exist_ok=True)
-DATABASE_PATH = os.path.join(APP_DATA_DIR, "QRizate.db")
+DATABASE_PATH = get_app_db_path()
 
 # --- 1. CONFIGURACIÓN ---
 VPS_WEBSOCKET_URL = "wss://qrizate.systempiura.com/ws/"
@@ -98,113 +119,52 @@ def save_config(config_data):
     with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
         json.dump(config_data, f, indent=4)
 
-config = load_config()
-vps_connection_task = None
-
-
+# Antes de cualquier logging.*: el primer mensaje sin handlers configura el root en WARNING
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
                     handlers=[logging.FileHandler(os.path.join(APP_DATA_DIR, 'qrizate_backend.log')),
                               logging.StreamHandler(sys.stdout)])
 
-# --- 2. LÓGICA DEL CLIENTE WEBSOCKET (Tu código original) ---
-def get_asset_html_from_db(asset_id: str) -> str:
-    db_session: Session = next(get_db())
-    try:
-        activo = db_session.query(Activo).filter(Activo.id == asset_id).first()
-        if not activo:
-            return "<h2>Activo no encontrado</h2>"
-        html = f"""
-        <html>
-        <head>
-            <title>Detalle del Activo</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1">
-            <style>
-                body {{ font-family: 'Segoe UI', Arial, sans-serif; background: #f8fafc; margin: 0; padding: 0; }}
-                .container {{ max-width: 520px; margin: 40px auto; background: #fff; border-radius: 18px; box-shadow: 0 4px 24px #003cb322; padding: 32px 28px; }}
-                h2 {{ color: #003cb3; margin-bottom: 24px; font-size: 2rem; text-align: center; letter-spacing: 1px; }}
-                table {{ border-collapse: collapse; width: 100%; background: #f8fafc; border-radius: 12px; overflow: hidden; box-shadow: 0 2px 8px #003cb312; }}
-                th, td {{ padding: 12px 14px; text-align: left; font-size: 1rem; }}
-                th {{ background-color: #e5eef4; color: #003cb3; font-weight: 600; width: 38%; border-bottom: 1.5px solid #dbe2ea; }}
-                td {{ background: #fff; color: #222; border-bottom: 1px solid #f0f4f8; }}
-                tr:last-child th, tr:last-child td {{ border-bottom: none; }}
-                @media (max-width: 600px) {{
-                    .container {{ padding: 16px 4px; }}
-                    h2 {{ font-size: 1.3rem; }}
-                    th, td {{ padding: 8px 6px; font-size: 0.95rem; }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Detalle del Activo</h2>
-                <table>
-                    <tr><th>ID</th><td>{activo.id}</td></tr>
-                    <tr><th>Correlativo</th><td>{activo.correlativo}</td></tr>
-                    <tr><th>Área</th><td>{activo.area}</td></tr>
-                    <tr><th>Sede</th><td>{activo.sede}</td></tr>
-                    <tr><th>Código Activo</th><td>{activo.codigo_activo}</td></tr>
-                    <tr><th>Categoría</th><td>{activo.categoria}</td></tr>
-                    <tr><th>Nombre Central de Costos</th><td>{getattr(activo, 'nombre_central_costos', '')}</td></tr>
-                    <tr><th>Cuenta Contable</th><td>{activo.cuenta_contable}</td></tr>
-                    <tr><th>Estado</th><td>{activo.estado}</td></tr>
-                    <tr><th>Descripción</th><td>{activo.descripcion}</td></tr>
-                    <tr><th>Marca</th><td>{activo.marca}</td></tr>
-                    <tr><th>Modelo</th><td>{activo.modelo}</td></tr>
-                    <tr><th>Número Serie</th><td>{activo.numero_serie}</td></tr>
-                    <tr><th>Número Central Costo</th><td>{getattr(activo, 'numero_central_costo', '')}</td></tr>
-                </table>
-            </div>
-        </body>
-        </html>
-        """
-        return html
-    finally:
-        db_session.close()
-
-async def connect_to_vps_and_listen(sede_id, vps_url):
-    uri = f"{vps_url}{sede_id}"
-    while True:
-        try:
-            async with websockets.connect(uri) as websocket:
-                logging.info(f" Conectado al VPS como sede '{sede_id}'")
-                async for message in websocket:
-                    logging.info(f"<- Mensaje recibido del VPS: {message}")
-                    try:
-                        data = json.loads(message)
-                        if data.get("action") == "get_asset":
-                            asset_id = data.get("asset_id")
-                            asset_html = get_asset_html_from_db(asset_id)
-                            response = {
-                                "request_id": data.get("request_id"),
-                                "data": {"html": asset_html}
-                            }
-                            await websocket.send(json.dumps(response))
-                            logging.info(f"-> Respuesta enviada al VPS: {response}")
-                    except Exception as e:
-                        logging.error(f"Error procesando mensaje: {e}")
-        except Exception as e:
-            logging.error(f" Desconectado del VPS. Error: {e}. Reintentando en 5 segundos...")
-            await asyncio.sleep(5)
+config = load_config()
+vps_connection_task = None
+
+# --- 2. LÓGICA DEL CLIENTE WEBSOCKET: ver relay.py ---
 
 # --- 3. LIFESPAN (Tu código original) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global vps_connection_task
+    arranque.hito("lifespan")
     logging.info(f"Iniciando base de datos en: {DATABASE_PATH}")
-    init_db(DATABASE_PATH)
+    with arranque.fase("init_db"):
+        init_db(DATABASE_PATH)
+    arranque.detalle["init_db"] = dict(database.TIEMPOS_INICIO)
+    with arranque.fase("instrumentacion"):
+        instrumentar_engine(get_engine(), "sync")
+        consultas_lentas.instalar(get_engine(), "sync")
+        if get_async_engine() is not None:
+            instrumentar_engine(get_async_engine().sync_engine, "async")
+            consultas_lentas.instalar(get_async_engine().sync_engine, "async")
+    with arranque.fase("worker_importaciones"):
+        iniciar_worker_importaciones()
     
-    saved_config = load_config()
-    if saved_config.get("sede_id"):
-        logging.info(f"Configuración encontrada. Conectando automáticamente como Sede: {saved_config['sede_id']}")
-        app.state.SEDE_ID = saved_config['sede_id']
-        app.state.PUBLIC_URL_BASE = "https://qrizate.systempiura.com/activo"
-        vps_connection_task = asyncio.create_task(connect_to_vps_and_listen(saved_config['sede_id'], VPS_WEBSOCKET_URL)) # Usar la URL constante
-    else:
-        logging.warning("No se encontró configuración de sede. Esperando configuración desde el frontend...")
+    with arranque.fase("config_y_relay"):
+        saved_config = load_config()
+        if saved_config.get("sede_id"):
+            logging.info(f"Configuración encontrada. Conectando automáticamente como Sede: {saved_config['sede_id']}")
+            app.state.SEDE_ID = saved_config['sede_id']
+            app.state.PUBLIC_URL_BASE = "https://qrizate.systempiura.com/activo"
+            vps_connection_task = asyncio.create_task(connect_to_vps_and_listen(saved_config['sede_id'], VPS_WEBSOCKET_URL)) # Usar la URL constante
+        else:
+            logging.warning("No se encontró configuración de sede. Esperando configuración desde el frontend...")
+    arranque.marcar_listo()
+    if arranque.perfilando:
+        arranque.registrar_reporte(os.path.join(carpeta_diagnostico(), "arranque.json"))
     yield
     if vps_connection_task:
         logging.info("Cerrando conexión con VPS...")
         vps_connection_task.cancel()
+    cerrar_pool_qr()
+    await cerrar_db_async()
 
 # --- Aplicación FastAPI ---
 app = FastAPI(
@@ -252,7 +212,10 @@ async def reload_config():
         vps_connection_task = asyncio.create_task(connect_to_vps_and_listen(config['sede_id'], config.get('vps_websocket_url', VPS_WEBSOCKET_URL)))
     return {"status": "config reloaded", "config": config}
 
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+                   expose_headers=["X-Next-Cursor"])
+app.add_middleware(PerfilarPeticiones)
+app.add_middleware(MedirPeticiones)
 
 app.mount("/assets", StaticFiles(directory=resource_path("assets")), name="assets")
 
@@ -261,6 +224,58 @@ async def favicon():
     return FileResponse(resource_path('favicon.ico'))
 
 app.include_router(activos_router)
+app.include_router(imports_router)
+app.include_router(diagnostics_router)
+
+@app.get("/relay/stats")
+def relay_stats():
+    """Contadores del relay con el VPS: caché de páginas y consultas compartidas."""
+    return {
+        "cache_paginas": cache_paginas.estadisticas(),
+        "consultas_compartidas": consultas_en_vuelo.estadisticas(),
+        "notificaciones": canal_cambios.estadisticas(),
+    }
+
+# Valores que ya llevan otros módulos; se leen al exportar
+registro.recolector("qrizate_db_pool", "Conexiones del pool síncrono", lambda: estadisticas_pool(get_engine()))
+registro.recolector("qrizate_db_async_pool", "Conexiones del pool async (con QRIZATE_ASYNC_DB)",
+                    lambda: estadisticas_pool(get_async_engine().sync_engine) if get_async_engine() else {})
+registro.recolector("qrizate_page_cache", "Caché de páginas del relay", cache_paginas.estadisticas)
+registro.recolector("qrizate_relay_shared", "Consultas compartidas del relay", consultas_en_vuelo.estadisticas)
+registro.recolector("qrizate_facets_cache", "Caché de facetas", cache_facetas.estadisticas)
+registro.recolector("qrizate_change_events", "Notificaciones de cambios en vivo", canal_cambios.estadisticas)
+registro.recolector("qrizate_slow_queries", "Registro de consultas lentas", consultas_lentas.estadisticas)
+
+def motivo_no_listo(base: dict) -> Optional[str]:
+    """None si se puede atender; si no, el motivo. Mismo criterio para /health/ready y QRIZATE_READY."""
+    if arranque.listo_en is None:
+        return "El arranque no terminó"
+    if not base["abierta"]:
+        return base.get("error") or "La base de datos no responde"
+    if not base["esquema_aplicado"]:
+        return "No se pudo aplicar el esquema de la base de datos (ver el log)"
+    return None
+
+@app.get("/health/ready")
+def health_ready():
+    """
+    Listo para atender: terminó el arranque, la base responde y el esquema está aplicado.
+    El relay se informa pero no cuenta: la sede funciona en la red local aunque no haya VPS.
+    """
+    base = estado_base_datos()
+    listo = motivo_no_listo(base) is None
+    contenido = {
+        "listo": listo,
+        "base_datos": base,
+        "relay": estado_relay(),
+        "arranque_ms": arranque.reporte()["total_ms"] if arranque.listo_en is not None else None,
+    }
+    return JSONResponse(contenido, status_code=200 if listo else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def metricas():
+    """Métricas en formato de texto de Prometheus."""
+    return PlainTextResponse(registro.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/", include_in_schema=False)
 def read_root():
@@ -270,13 +285,26 @@ def read_root():
 # ===== NUEVA LÓGICA DE INICIO CON HILOS E ÍCONO DE BANDEJA =================
 # =============================================================================
 
-def run_server():
-    """Función que ejecuta el servidor uvicorn."""
-    logging.info(f"Iniciando servidor FastAPI en http://{local_hostname}:{args.port}")
-    uvicorn.run(app, host="0.0.0.0", port=args.port, reload=False)
+def run_server(args):
+    """
+    Ejecuta uvicorn; al quedar escuchando imprime QRIZATE_READY (y escribe --ready-file).
+    Si no llega a estar listo termina el proceso: el ícono de la bandeja lo mantendría vivo
+    y Electron esperaría la señal hasta agotar el tiempo.
+    """
+    logging.info(f"Iniciando servidor FastAPI en http://{get_local_ip()}:{args.port}")
+    estado = EstadoServidor()
+    try:
+        ejecutar_uvicorn(app, "0.0.0.0", args.port, estado=estado, archivo_listo=args.ready_file,
+                         comprobar_listo=lambda: motivo_no_listo(estado_base_datos()), reload=False)
+    finally:
+        if not estado.listo.is_set():
+            logging.error(f"El servidor no llegó a estar listo: {estado.error}. Cerrando.")
+            os._exit(1)
 
 def setup_and_run_tray_icon():
     """Configura y ejecuta el ícono en la bandeja del sistema."""
+    from pystray import MenuItem as item, Icon as icon
+    from PIL import Image
     try:
         image = Image.open(resource_path("favicon.ico"))
     except Exception as e:
@@ -292,8 +320,11 @@ def setup_and_run_tray_icon():
     icon_obj = icon("QRizateServer", image, "QRizate Server", menu)
     icon_obj.run()
 
+arranque.hito("modulo_main")
+
 if __name__ == "__main__":
-    server_thread = threading.Thread(target=run_server)
+    args = leer_argumentos()
+    server_thread = threading.Thread(target=run_server, args=(args,))
     server_thread.daemon = True
     server_thread.start()
     
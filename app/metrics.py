@@ -0,0 +1,235 @@
+"""
+Métricas del servidor en formato de texto de Prometheus (GET /metrics), sin dependencias.
+Contadores e histogramas en memoria con pocas etiquetas (plantilla de ruta, no la URL;
+tipo de sentencia, no el SQL), así que registrar una observación cuesta un bisect y un
+lock y se pueden dejar activas en producción. Los valores que ya llevan otros módulos
+(pool de conexiones, cachés) se leen solo al momento de exportar.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import event
+
+# Segundos; cubren desde una lectura en caché hasta una exportación grande
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _etiquetas(nombres: Tuple[str, ...], valores: Tuple[str, ...]) -> str:
+    if not nombres:
+        return ""
+    pares = []
+    for nombre, valor in zip(nombres, valores):
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pares.append(f'{nombre}="{valor}"')
+    return "{" + ",".join(pares) + "}"
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self._valores: Dict[Tuple[str, ...], float] = {} if etiquetas else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores_etiquetas, cantidad: float = 1):
+        with self._lock:
+            self._valores[valores_etiquetas] = self._valores.get(valores_etiquetas, 0) + cantidad
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {valor}" for clave, valor in valores]
+
+
+class Medidor(Contador):
+    """Valor que sube y baja (ej. solicitudes en curso)."""
+    tipo = "gauge"
+
+    def dec(self, *valores_etiquetas, cantidad: float = 1):
+        self.inc(*valores_etiquetas, cantidad=-cantidad)
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (), buckets=BUCKETS_LATENCIA):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # etiquetas -> [conteos por bucket..., suma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *valores_etiquetas):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores_etiquetas)
+            if serie is None:
+                serie = self._series[valores_etiquetas] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            serie[indice] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            series = [(clave, list(serie)) for clave, serie in self._series.items()]
+        lineas = []
+        for clave, serie in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), serie):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                etiquetas = _etiquetas(self.etiquetas + ("le",), clave + (le,))
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {serie[-2]}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {serie[-1]}")
+        return lineas
+
+
+class Registro:
+    def __init__(self):
+        self._metricas = []
+        self._recolectores: List[Tuple[str, str, Callable[[], Dict]]] = []
+
+    def contador(self, nombre, ayuda, etiquetas=()) -> Contador:
+        metrica = Contador(nombre, ayuda, tuple(etiquetas))
+        self._metricas.append(metrica)
+        return metrica
+
+    def medidor(self, nombre, ayuda, etiquetas=()) -> Medidor:
+        metrica = Medidor(nombre, ayuda, tuple(etiquetas))
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA) -> Histograma:
+        metrica = Histograma(nombre, ayuda, tuple(etiquetas), buckets)
+        self._metricas.append(metrica)
+        return metrica
+
+    def recolector(self, prefijo: str, ayuda: str, funcion: Callable[[], Dict]):
+        """Exporta como gauges `<prefijo>_<clave>` los valores numéricos de un dict de estadísticas."""
+        self._recolectores.append((prefijo, ayuda, funcion))
+
+    def exportar(self) -> str:
+        lineas = []
+        for metrica in self._metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.exportar())
+        for prefijo, ayuda, funcion in self._recolectores:
+            try:
+                valores = funcion()
+            except Exception as e:
+                # Se omite solo ese recolector; el resto de /metrics sigue saliendo
+                logging.error(f"Error en el recolector de métricas {prefijo}: {e!r}")
+                continue
+            for clave, valor in valores.items():
+                if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                    continue
+                nombre = f"{prefijo}_{clave}"
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} gauge")
+                lineas.append(f"{nombre} {valor}")
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
+
+# --- Métricas de la aplicación ---
+
+peticiones_http = registro.histograma(
+    "qrizate_http_request_duration_seconds", "Duración de las peticiones HTTP por ruta",
+    ("method", "route", "status"),
+)
+peticiones_en_curso = registro.medidor("qrizate_http_requests_in_progress", "Peticiones HTTP en curso")
+consultas_db = registro.histograma(
+    "qrizate_db_query_duration_seconds", "Duración de las sentencias SQL por tipo", ("engine", "operation"),
+)
+errores_db = registro.contador("qrizate_db_query_errors_total", "Sentencias SQL que fallaron", ("engine",))
+
+relay_mensajes_recibidos = registro.contador("qrizate_relay_messages_received_total", "Mensajes recibidos del VPS")
+relay_mensajes_enviados = registro.contador("qrizate_relay_messages_sent_total", "Respuestas enviadas al VPS")
+relay_errores = registro.contador("qrizate_relay_errors_total", "Mensajes del VPS que no se pudieron atender")
+relay_reconexiones = registro.contador("qrizate_relay_reconnects_total", "Reconexiones al VPS tras un error")
+relay_conectado = registro.medidor("qrizate_relay_connected", "1 mientras hay conexión con el VPS")
+relay_en_curso = registro.medidor("qrizate_relay_requests_in_progress", "Solicitudes del VPS atendiéndose")
+relay_consultas = registro.histograma(
+    "qrizate_relay_lookup_duration_seconds", "Tiempo para obtener la página de un activo", ("cache",),
+)
+
+# --- Instrumentación ---
+
+class MedirPeticiones:
+    """
+    Middleware ASGI: duración y estado de cada petición HTTP, etiquetada con la plantilla
+    de la ruta (ej. /activos/{activo_id}). Los WebSocket y el propio /metrics no se miden.
+    """
+    def __init__(self, app, excluir=("/metrics",)):
+        self.app = app
+        self.excluir = set(excluir)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluir:
+            await self.app(scope, receive, send)
+            return
+        estado = [500]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado[0] = mensaje["status"]
+            await send(mensaje)
+
+        inicio = time.perf_counter()
+        peticiones_en_curso.inc()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            peticiones_en_curso.dec()
+            ruta = scope.get("route")
+            plantilla = getattr(ruta, "path", None) or "sin_ruta"
+            if scope.get("root_path") and plantilla != "sin_ruta":
+                plantilla = scope["root_path"] + plantilla
+            peticiones_http.observar(time.perf_counter() - inicio, scope["method"], plantilla, str(estado[0]))
+
+
+OPERACIONES_SQL = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+def _operacion(sentencia: str) -> str:
+    palabra = sentencia.lstrip()[:6].upper()
+    return palabra if palabra in OPERACIONES_SQL else "OTRA"
+
+def instrumentar_engine(engine, nombre: str):
+    """Mide cada sentencia del engine (sync; para uno async, pasar engine.sync_engine)."""
+    if getattr(engine, "_metricas_instaladas", False):
+        return
+    engine._metricas_instaladas = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def despues(conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get("metricas_inicio")
+        if inicios:
+            consultas_db.observar(time.perf_counter() - inicios.pop(), nombre, _operacion(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def error(contexto):
+        inicios = contexto.connection.info.get("metricas_inicio") if contexto.connection is not None else None
+        if inicios:
+            inicios.pop()
+        errores_db.inc(nombre)
+
+
+def estadisticas_pool(engine) -> Dict[str, int]:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
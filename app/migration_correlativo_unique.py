@@ -91,7 +91,14 @@ def migrate_correlativo_unique():
         # Crear índices
         cursor.execute("CREATE INDEX idx_activos_correlativo ON activos(correlativo)")
         cursor.execute("CREATE INDEX idx_activos_id ON activos(id)")
-        
+
+        # La tabla se reconstruyó sin triggers ni índices: el próximo arranque verifica el esquema
+        existe_config = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='configuracion_db'"
+        ).fetchone()
+        if existe_config:
+            cursor.execute("DELETE FROM configuracion_db WHERE clave = 'version_esquema'")
+
         conn.commit()
         print("✅ Migración completada exitosamente!")
         print("El campo correlativo ahora es único en la base de datos.")
@@ -1,23 +1,48 @@
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, Index, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 
+from models.encoding import TextoDiccionario
+
 Base = declarative_base()
 
 class Activo(Base):
     __tablename__ = 'activos'
-    id = Column(String(30), primary_key=True, index=True)
-    categoria = Column(Text, nullable=True)
-    central_de_costos = Column(Text, nullable=True)
-    nombre_central_costos = Column(Text, nullable=True)  # <-- AGREGADO
-    area = Column(Text, nullable=True)
+    id = Column(String(30), primary_key=True)  # la clave primaria ya tiene su índice
+    categoria = Column(TextoDiccionario("categoria"), nullable=True)
+    central_de_costos = Column(TextoDiccionario("central_de_costos"), nullable=True)
+    nombre_central_costos = Column(TextoDiccionario("nombre_central_costos"), nullable=True)  # <-- AGREGADO
+    area = Column(TextoDiccionario("area"), nullable=True)
     correlativo = Column(Text, nullable=True, unique=True, index=True)
-    cuenta_contable = Column(Text, nullable=True)
-    estado = Column(Text, nullable=True)
+    cuenta_contable = Column(TextoDiccionario("cuenta_contable"), nullable=True)
+    estado = Column(TextoDiccionario("estado"), nullable=True)
     descripcion = Column(Text, nullable=True)
     marca = Column(Text, nullable=True)
     modelo = Column(Text, nullable=True)
     numero_serie = Column(Text, nullable=True)
     codigo_activo = Column(Text, nullable=True)
     numero_central_costo = Column(Text, nullable=True)
-    sede = Column(Text, nullable=True)
-    url = Column(Text, nullable=True)
\ No newline at end of file
+    sede = Column(TextoDiccionario("sede"), nullable=True)
+    url = Column(Text, nullable=True)
+    # Asignada por los triggers de models/sync.py en cada cambio; no se escribe desde la aplicación
+    revision = Column(Integer, nullable=True)
+
+    # Plan de índices: cada consulta de las rutas, el relay y las importaciones está
+    # registrada en query_plans.py, que verifica que ninguna recorra la tabla completa.
+    __table_args__ = (
+        # Índices para el listado filtrado: igualdad en el filtro y orden estable por id,
+        # de modo que cada página del cursor sea un único recorrido por rango del índice.
+        Index('ix_activos_sede_id', 'sede', 'id'),
+        Index('ix_activos_area_id', 'area', 'id'),
+        Index('ix_activos_estado_id', 'estado', 'id'),
+        Index('ix_activos_categoria_id', 'categoria', 'id'),
+        Index('ix_activos_sede_area_id', 'sede', 'area', 'id'),
+        Index('ix_activos_descripcion_id', 'descripcion', 'id'),
+        # Cubre /changes y el publicador de eventos (id, revision) sin leer la tabla
+        Index('ix_activos_revision_id', 'revision', 'id'),
+        # Búsquedas directas por código y número de serie (no son únicos), ya ordenadas por id
+        Index('ix_activos_codigo_activo_id', 'codigo_activo', 'id'),
+        Index('ix_activos_numero_serie_id', 'numero_serie', 'id'),
+        # Facetas por marca (el resto de las facetas sale del resumen de estadísticas)
+        Index('ix_activos_marca', 'marca'),
+        Index('ix_activos_sede_marca', 'sede', 'marca'),
+    )
@@ -0,0 +1,98 @@
+"""
+Operaciones masivas sobre la tabla de activos con SQLAlchemy Core.
+Evitan cargar objetos ORM fila por fila: las búsquedas se hacen con un IN por lote
+y las escrituras con un único INSERT ... ON CONFLICT ejecutado como executemany.
+"""
+
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.activo import Activo
+
+# Tamaño de lote: mantiene cada IN por debajo del límite de variables de SQLite
+TAMANO_LOTE_UPSERT = 500
+
+# `revision` la mantienen los triggers del registro de cambios
+COLUMNAS_ACTIVO = [columna.name for columna in Activo.__table__.columns if columna.name != "revision"]
+
+
+def en_lotes(valores: List, tamano: int = TAMANO_LOTE_UPSERT):
+    for inicio in range(0, len(valores), tamano):
+        yield valores[inicio:inicio + tamano]
+
+
+def buscar_ids_por(conn, campo: str, valores: Iterable[str]) -> Dict[str, str]:
+    """Devuelve {valor: id} de los activos cuyo `campo` está en `valores`."""
+    tabla = Activo.__table__
+    columna = tabla.c[campo]
+    encontrados = {}
+    for lote in en_lotes(list(set(valores))):
+        for valor, activo_id in conn.execute(select(columna, tabla.c.id).where(columna.in_(lote))):
+            encontrados[valor] = activo_id
+    return encontrados
+
+
+def buscar_repetidos(valores: Iterable[str]) -> set:
+    """Valores que aparecen más de una vez, en una sola pasada."""
+    vistos, repetidos = set(), set()
+    for valor in valores:
+        if valor in vistos:
+            repetidos.add(valor)
+        else:
+            vistos.add(valor)
+    return repetidos
+
+
+def completar_datos_activo(data: dict, public_url_base: str, sede_id_global: str) -> dict:
+    """Genera id, codigo_activo y url cuando no vienen informados."""
+    correlativo = data.get('correlativo', '')
+    area = data.get('area', '')
+    sede = data.get('sede', '')
+    if not data.get('id'):
+        data['id'] = f"{correlativo}{area}{sede}"
+    if not data.get('codigo_activo'):
+        data['codigo_activo'] = f"{correlativo}-{area}-{sede}"
+    if not data.get('url'):
+        data['url'] = f"{public_url_base}?sede={sede_id_global}&id={data['id']}"
+    return data
+
+
+def upsert_activos(conn, filas: List[dict], tamano_lote: int = TAMANO_LOTE_UPSERT) -> Dict[str, List[str]]:
+    """
+    Inserta o actualiza `filas` (diccionarios con todas las columnas del activo, incluido `id`).
+    Por cada lote se leen las filas existentes con un solo SELECT ... IN, se descartan las que
+    no cambian y el resto se escribe con INSERT ... ON CONFLICT(id) DO UPDATE vía executemany.
+    No hace commit: la transacción la controla quien llama.
+    Retorna los ids clasificados en 'creados', 'actualizados' y 'sin_cambios'.
+    """
+    tabla = Activo.__table__
+    stmt = sqlite_insert(tabla)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabla.c.id],
+        set_={nombre: stmt.excluded[nombre] for nombre in COLUMNAS_ACTIVO if nombre != "id"},
+    )
+
+    resultado = {"creados": [], "actualizados": [], "sin_cambios": []}
+    for lote in en_lotes(filas, tamano_lote):
+        ids = [fila["id"] for fila in lote]
+        existentes = {
+            fila.id: fila._mapping
+            for fila in conn.execute(select(tabla).where(tabla.c.id.in_(ids)))
+        }
+        a_escribir = []
+        for fila in lote:
+            valores = {nombre: fila.get(nombre) for nombre in COLUMNAS_ACTIVO}
+            actual = existentes.get(valores["id"])
+            if actual is None:
+                resultado["creados"].append(valores["id"])
+            elif any(actual[nombre] != valores[nombre] for nombre in COLUMNAS_ACTIVO):
+                resultado["actualizados"].append(valores["id"])
+            else:
+                resultado["sin_cambios"].append(valores["id"])
+                continue
+            a_escribir.append(valores)
+        if a_escribir:
+            conn.execute(stmt, a_escribir)
+    return resultado
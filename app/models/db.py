@@ -1,15 +1,89 @@
 import os
+import re
 import sys
+import time
+import hashlib
 import logging
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, select
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateIndex, CreateTable
 from models.activo import Base
+from models.dictionary import CLAVE_VERSION_ESQUEMA, activar_almacenamiento, configuracion_db
+from models.import_job import ImportJob  # registra la tabla en Base.metadata
+from models.search import DDL_BUSQUEDA, crear_indice_busqueda
+from models.stats import DDL_RESUMEN, crear_resumen_estadisticas
+from models.sync import DDL_REGISTRO_CAMBIOS, crear_registro_cambios
 
 # Variables globales para la configuración de base de datos
 engine = None
 SessionLocal = None
 DB_PATH = None
 DATABASE_URL = None
+PERFIL_EFECTIVO = {}
+# Duración (ms) de cada fase del último init_db, para --profile-startup
+TIEMPOS_INICIO = {}
+# Huella del esquema ya aplicado (o verificado) en esta ejecución; None hasta entonces
+VERSION_ESQUEMA = None
+
+# Motor async opcional (aiosqlite, QRIZATE_ASYNC_DB=1) para las rutas de lectura y el relay
+async_engine = None
+AsyncSessionLocal = None
+
+# Perfil de rendimiento aplicado a cada conexión nueva. Cada valor se puede sobrescribir
+# con una variable de entorno QRIZATE_SQLITE_<PRAGMA> (ej. QRIZATE_SQLITE_SYNCHRONOUS=FULL)
+# o con el parámetro `perfil` de init_db.
+PERFIL_SQLITE = {
+    "journal_mode": "WAL",       # los lectores no se bloquean mientras hay una escritura
+    "synchronous": "NORMAL",     # seguro con WAL; evita un fsync por cada commit
+    "cache_size": -65536,        # en KiB (negativo): 64 MiB de caché de páginas
+    "mmap_size": 268435456,      # 256 MiB mapeados en memoria
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,        # ms esperando un bloqueo antes de fallar con "database is locked"
+}
+
+# Pool de conexiones: cubre el threadpool de FastAPI, el relay y el worker de importaciones
+POOL_SQLITE = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+}
+
+def resolver_perfil(perfil=None):
+    """Combina el perfil por defecto con las variables de entorno y los valores recibidos."""
+    resultado = dict(PERFIL_SQLITE)
+    for pragma in PERFIL_SQLITE:
+        valor = os.environ.get(f"QRIZATE_SQLITE_{pragma.upper()}")
+        if valor is not None:
+            resultado[pragma] = valor
+    resultado.update(perfil or {})
+    for pragma, valor in resultado.items():
+        # Los PRAGMA no admiten parámetros enlazados; se valida antes de interpolar
+        if pragma not in PERFIL_SQLITE or not re.fullmatch(r"-?[A-Za-z0-9_]+", str(valor)):
+            raise ValueError(f"Valor no permitido para PRAGMA {pragma}: {valor}")
+    return resultado
+
+def registrar_perfil_sqlite(engine, perfil):
+    @event.listens_for(engine, "connect")
+    def aplicar_perfil(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, valor in perfil.items():
+            cursor.execute(f"PRAGMA {pragma}={valor}")
+        cursor.close()
+
+def leer_perfil_efectivo(engine):
+    """Lee de vuelta cada PRAGMA para confirmar lo que SQLite realmente aplicó."""
+    with engine.connect() as conn:
+        return {pragma: conn.exec_driver_sql(f"PRAGMA {pragma}").scalar() for pragma in PERFIL_SQLITE}
+
+# Carpeta de datos de la aplicación de escritorio (main.py, lanzado por Electron)
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), "AppData", "Local", "QRizate")
+
+def get_app_db_path():
+    """Ruta de la base que abre main.py"""
+    return os.path.join(APP_DATA_DIR, "QRizate.db")
 
 def get_default_db_path():
     """Obtiene la ruta por defecto de la base de datos"""
@@ -22,13 +96,56 @@ def get_default_db_path():
     
     return os.path.join(application_path, "QRizate.db")
 
-def init_db(db_path=None):
+@contextmanager
+def _fase(nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIEMPOS_INICIO[nombre] = round((time.perf_counter() - inicio) * 1000, 2)
+
+def huella_esquema():
+    """
+    Hash del DDL declarado (tablas, índices, triggers e índices obsoletos). Cualquier cambio
+    en los modelos la cambia, así que no hace falta numerar versiones a mano.
+    """
+    partes = [str(CreateTable(tabla).compile(dialect=engine.dialect)) for tabla in Base.metadata.sorted_tables]
+    partes += [
+        str(CreateIndex(indice).compile(dialect=engine.dialect))
+        for tabla in Base.metadata.sorted_tables for indice in sorted(tabla.indexes, key=lambda i: i.name)
+    ]
+    partes += list(DDL_BUSQUEDA) + list(DDL_REGISTRO_CAMBIOS) + list(DDL_RESUMEN) + list(INDICES_OBSOLETOS)
+    return hashlib.sha256("\n".join(partes).encode("utf-8")).hexdigest()[:16]
+
+def leer_version_esquema():
+    """Huella guardada por el último init_db completo, o None (base nueva o anterior a la huella)."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(configuracion_db.c.valor).where(configuracion_db.c.clave == CLAVE_VERSION_ESQUEMA)
+            ).scalar()
+    except Exception:
+        return None
+
+def guardar_version_esquema(version):
+    with engine.begin() as conn:
+        conn.execute(configuracion_db.delete().where(configuracion_db.c.clave == CLAVE_VERSION_ESQUEMA))
+        conn.execute(configuracion_db.insert().values(clave=CLAVE_VERSION_ESQUEMA, valor=version))
+
+def init_db(db_path=None, perfil=None):
     """
     Inicializa la base de datos con la ruta especificada
     Args:
         db_path: Ruta personalizada para la base de datos. Si es None, usa la ruta por defecto.
+        perfil: PRAGMAs que reemplazan a los de PERFIL_SQLITE.
+
+    Si la huella del esquema guardada coincide con la de los modelos, se omiten create_all,
+    la reflexión y la verificación de índices y triggers (QRIZATE_VERIFICAR_ESQUEMA=1 la fuerza).
     """
-    global engine, SessionLocal, DB_PATH, DATABASE_URL
+    global engine, SessionLocal, DB_PATH, DATABASE_URL, PERFIL_EFECTIVO, VERSION_ESQUEMA
+    TIEMPOS_INICIO.clear()
+    VERSION_ESQUEMA = None
+    perfil = resolver_perfil(perfil)
     
     # Usar ruta personalizada o la por defecto
     if db_path is None:
@@ -45,16 +162,52 @@ def init_db(db_path=None):
     
     # Crear engine y sessionmaker
     engine = create_engine(
-        DATABASE_URL, connect_args={"check_same_thread": False}
+        DATABASE_URL, connect_args={"check_same_thread": False},
+        poolclass=QueuePool, **POOL_SQLITE
     )
+    registrar_perfil_sqlite(engine, perfil)
+    with _fase("conexion"):
+        PERFIL_EFECTIVO = leer_perfil_efectivo(engine)
+    logging.info(f"Perfil SQLite efectivo: {PERFIL_EFECTIVO} | pool: {POOL_SQLITE}")
     
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with _fase("engine_async"):
+        init_async_db(perfil)
+
+    with _fase("huella_esquema"):
+        version = huella_esquema()
+        al_dia = leer_version_esquema() == version and os.environ.get("QRIZATE_VERIFICAR_ESQUEMA") != "1"
+    if al_dia:
+        with _fase("activar_almacenamiento"):
+            activar_almacenamiento(engine)
+        VERSION_ESQUEMA = version
+        logging.info(f"Esquema al día (versión {version}); se omite la verificación")
+        return
     
     # Crear las tablas
     try:
         # Siempre intentar crear las tablas (no falla si ya existen)
-        Base.metadata.create_all(bind=engine)
-        
+        with _fase("create_all"):
+            Base.metadata.create_all(bind=engine)
+        # Antes que el resto: el resumen y el índice de búsqueda leen columnas codificadas
+        with _fase("activar_almacenamiento"):
+            activar_almacenamiento(engine)
+
+        # create_all no agrega columnas ni índices nuevos a tablas que ya existen
+        with _fase("columnas_e_indices"):
+            agregar_columnas_faltantes()
+            eliminar_indices_obsoletos()
+            indices_completos = crear_indices_faltantes()
+        with _fase("busqueda_cambios_resumen"):
+            crear_indice_busqueda(engine)
+            crear_registro_cambios(engine)
+            crear_resumen_estadisticas(engine)
+        # Con algún índice pendiente no se guarda: el próximo arranque lo vuelve a intentar
+        if indices_completos:
+            guardar_version_esquema(version)
+            logging.info(f"Esquema verificado y guardado como versión {version}")
+        VERSION_ESQUEMA = version
+
         if not os.path.exists(DB_PATH):
             logging.info(f"Base de datos '{DB_PATH}' creada exitosamente.")
         else:
@@ -72,6 +225,95 @@ def init_db(db_path=None):
         Base.metadata.create_all(bind=engine)
         logging.info("Base de datos creada con éxito después del error.")
 
+def init_async_db(perfil):
+    """
+    Crea el engine async sobre la misma base solo con QRIZATE_ASYNC_DB=1 y aiosqlite
+    instalado; si no, get_async_db usa la sesión síncrona en el threadpool. Queda apagado
+    por defecto: en bench/bench_async_db.py las lecturas por id fueron más lentas con
+    aiosqlite (p50 31 -> 73 ms) y el engine agrega un segundo pool de conexiones.
+    """
+    global async_engine, AsyncSessionLocal
+    async_engine = None
+    AsyncSessionLocal = None
+    if os.environ.get("QRIZATE_ASYNC_DB", "0") != "1":
+        logging.info("Acceso async a la base de datos desactivado (QRIZATE_ASYNC_DB=1 lo habilita)")
+        return
+    try:
+        import aiosqlite  # noqa: F401
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+    except ImportError:
+        logging.warning("aiosqlite no está instalado; las rutas async usarán la sesión síncrona en el threadpool")
+        return
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{DB_PATH}", poolclass=AsyncAdaptedQueuePool, **POOL_SQLITE
+    )
+    registrar_perfil_sqlite(async_engine.sync_engine, perfil)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    logging.info("Acceso async a la base de datos habilitado (aiosqlite)")
+
+def agregar_columnas_faltantes():
+    """Agrega con ALTER TABLE las columnas (opcionales) declaradas en los modelos que falten."""
+    from sqlalchemy import inspect
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existentes = {columna["name"] for columna in inspector.get_columns(table.name)}
+            for columna in table.columns:
+                if columna.name not in existentes and columna.nullable:
+                    tipo = columna.type.compile(dialect=engine.dialect)
+                    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{columna.name}" {tipo}')
+                    logging.info(f"Columna agregada: {table.name}.{columna.name}")
+
+# Índices reemplazados en el plan de models/activo.py (duplicados o sin la columna id)
+INDICES_OBSOLETOS = (
+    "ix_activos_id", "ix_activos_revision", "ix_activos_codigo_activo", "ix_activos_numero_serie",
+)
+
+def eliminar_indices_obsoletos():
+    with engine.begin() as conn:
+        for nombre in INDICES_OBSOLETOS:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {nombre}")
+
+def crear_indices_faltantes():
+    """Crea los índices declarados en los modelos que aún no existan; False si alguno falló."""
+    completos = True
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # Ej.: un índice único sobre datos antiguos con duplicados
+                logging.warning(f"No se pudo crear el índice '{index.name}': {e}")
+                completos = False
+    return completos
+
+def get_data_dir():
+    """Carpeta donde vive la base de datos; se usa también para archivos auxiliares."""
+    if DB_PATH is None:
+        raise RuntimeError("Base de datos no inicializada. Llama a init_db() primero.")
+    return os.path.dirname(DB_PATH)
+
+def estado_base_datos():
+    """Para /health/ready: si la base responde y si init_db terminó de aplicar el esquema."""
+    estado = {"abierta": False, "esquema_aplicado": VERSION_ESQUEMA is not None, "version_esquema": VERSION_ESQUEMA}
+    if engine is None:
+        estado["error"] = "Base de datos no inicializada"
+        return estado
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1").scalar()
+        estado["abierta"] = True
+    except Exception as e:
+        estado["error"] = str(e)
+    return estado
+
+def get_engine():
+    """Engine activo, para las consultas que no pasan por una sesión ORM."""
+    if engine is None:
+        raise RuntimeError("Base de datos no inicializada. Llama a init_db() primero.")
+    return engine
+
 def get_db():
     """Dependencias para obtener una sesión de base de datos para cada solicitud."""
     if SessionLocal is None:
@@ -83,3 +325,46 @@ def get_db():
     finally:
         db.close()
         logging.debug("Sesión de base de datos cerrada correctamente.")
+
+class SesionSincronaEnHilo:
+    """
+    Respaldo de AsyncSession cuando no hay engine async: ejecuta la consulta en el
+    threadpool con la sesión síncrona y devuelve el resultado ya materializado.
+    """
+    def __init__(self, db):
+        self._db = db
+
+    async def execute(self, stmt):
+        from starlette.concurrency import run_in_threadpool
+        congelado = await run_in_threadpool(lambda: self._db.execute(stmt).freeze())
+        return congelado()
+
+    async def scalar(self, stmt):
+        return (await self.execute(stmt)).scalar()
+
+def get_async_engine():
+    """Engine async (aiosqlite), o None si el acceso async no está habilitado."""
+    return async_engine
+
+def get_async_sessionmaker():
+    """Fábrica de AsyncSession, o None si el acceso async no está habilitado."""
+    return AsyncSessionLocal
+
+async def cerrar_db_async():
+    """Cierra las conexiones del engine async; aiosqlite mantiene un hilo por conexión."""
+    if async_engine is not None:
+        await async_engine.dispose()
+
+async def get_async_db():
+    """Dependencia async: AsyncSession (aiosqlite) o, en su defecto, la sesión síncrona en hilo."""
+    if AsyncSessionLocal is None:
+        if SessionLocal is None:
+            raise RuntimeError("Base de datos no inicializada. Llama a init_db() primero.")
+        db = SessionLocal()
+        try:
+            yield SesionSincronaEnHilo(db)
+        finally:
+            db.close()
+        return
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -0,0 +1,301 @@
+"""
+Modo de almacenamiento por diccionario (opcional) para las columnas de baja cardinalidad
+de `activos` (models/encoding.py): tablas de valores más códigos enteros en cada fila.
+
+El modo queda guardado en la propia base (configuracion_db) y se activa al iniciar. Una
+base existente se convierte, en cualquiera de los dos sentidos, con:
+
+    python -m models.dictionary --modo diccionario [--db ruta/activos.db]
+    python -m models.dictionary --modo texto [--db ruta/activos.db]
+
+En modo diccionario el orden por sede, area, estado o categoria (listados y cursores)
+sigue el código de cada valor y no el alfabético; es estable, pero no alfabético.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+
+from sqlalchemy import Column, Integer, String, Table, Text, UniqueConstraint, event, select
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.util import await_only
+
+from models import encoding
+from models.activo import Activo, Base
+from models.encoding import CAMPOS_DICCIONARIO, ColisionDiccionario, TextoDiccionario, codigo_valor
+
+diccionario_activos = Table(
+    "diccionario_activos", Base.metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("campo", String(50), nullable=False),
+    Column("valor", Text, nullable=False),
+    UniqueConstraint("campo", "valor"),
+)
+
+configuracion_db = Table(
+    "configuracion_db", Base.metadata,
+    Column("clave", String(50), primary_key=True),
+    Column("valor", Text, nullable=True),
+)
+
+MODOS_ALMACENAMIENTO = ("texto", "diccionario")
+# Huella del esquema del último init_db completo (models/db.py); sin ella se vuelve a verificar
+CLAVE_VERSION_ESQUEMA = "version_esquema"
+
+_INSERTAR_VALOR = "INSERT OR IGNORE INTO diccionario_activos (id, campo, valor) VALUES (?, ?, ?)"
+
+# --- Modo activo ---
+
+def leer_modo(conn) -> str:
+    modo = conn.execute(
+        select(configuracion_db.c.valor).where(configuracion_db.c.clave == "almacenamiento")
+    ).scalar()
+    return modo or "texto"
+
+def cargar_diccionario(engine=None):
+    if engine is None:
+        from models.db import get_engine
+        engine = get_engine()
+    with engine.connect() as conn:
+        filas = conn.execute(
+            select(diccionario_activos.c.id, diccionario_activos.c.campo, diccionario_activos.c.valor)
+        ).all()
+    encoding.cargar_valores(filas)
+    return len(filas)
+
+async def cargar_diccionario_async(engine_async):
+    async with engine_async.connect() as conn:
+        filas = (await conn.execute(
+            select(diccionario_activos.c.id, diccionario_activos.c.campo, diccionario_activos.c.valor)
+        )).all()
+    encoding.cargar_valores(filas)
+    return len(filas)
+
+def recargar_diccionario():
+    """
+    Relee el diccionario ante un código desconocido. En el event loop (rutas async con
+    aiosqlite) la lectura se espera con await_only dentro de la consulta en curso en vez
+    de bloquear el loop con el engine síncrono.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        cargar_diccionario()  # hilo del threadpool o del relay: puede esperar
+        return
+    from models.db import get_async_engine
+    engine_async = get_async_engine()
+    if engine_async is not None:
+        lectura = cargar_diccionario_async(engine_async)
+        try:
+            await_only(lectura)
+            return
+        except MissingGreenlet:
+            lectura.close()
+    # Fuera de una consulta async no se puede esperar: el valor llega en la próxima lectura
+    logging.warning("Código de diccionario desconocido en el event loop; se recarga en segundo plano")
+    threading.Thread(target=cargar_diccionario, name="recarga-diccionario", daemon=True).start()
+
+def activar_almacenamiento(engine):
+    """Lee el modo guardado en la base y prepara la codificación. Llamar desde init_db."""
+    with engine.connect() as conn:
+        modo = leer_modo(conn)
+    encoding.reiniciar()
+    encoding.activar(modo == "diccionario")
+    if modo == "diccionario":
+        valores = cargar_diccionario(engine)
+        registrar_internado(engine)
+        logging.info(f"Almacenamiento por diccionario activo ({valores} valores)")
+    return modo
+
+def registrar_internado(engine):
+    """
+    Antes de cada INSERT/UPDATE, agrega al diccionario los códigos nuevos que usa, en la
+    misma conexión y transacción; se dan por confirmados solo cuando esta se confirma.
+    """
+    if getattr(engine, "_internado_diccionario", False):
+        return
+    engine._internado_diccionario = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def internar(conn, cursor, statement, parameters, context, executemany):
+        if not encoding.MODO_DICCIONARIO or context is None or context.compiled is None:
+            return
+        if not (context.isinsert or context.isupdate):
+            return
+        # Con insertmanyvalues se llama una vez por tanda, con los parámetros de toda la sentencia
+        if getattr(context, "_diccionario_internado", False):
+            return
+        context._diccionario_internado = True
+        nuevos = encoding.internar(_valores_escritos(context))
+        if not nuevos:
+            return
+        filas = encoding.filas_de(nuevos)
+        cursor_dicc = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor_dicc.executemany(_INSERTAR_VALOR, filas)
+            for codigo, _, valor in filas:
+                guardado = cursor_dicc.execute(
+                    "SELECT valor FROM diccionario_activos WHERE id = ?", (codigo,)
+                ).fetchone()[0]
+                _verificar_codigo(codigo, valor, guardado)
+        finally:
+            cursor_dicc.close()
+        conn.info.setdefault("diccionario_pendientes", set()).update(nuevos)
+
+    @event.listens_for(engine, "commit")
+    def confirmar(conn):
+        encoding.confirmar(conn.info.pop("diccionario_pendientes", ()))
+
+    @event.listens_for(engine, "rollback")
+    def descartar(conn):
+        conn.info.pop("diccionario_pendientes", None)
+
+def _valores_escritos(context):
+    """
+    (campo, texto) de las columnas codificadas que la sentencia escribe, tomados antes de
+    convertirlos a código. Los parámetros de VALUES y SET llevan el nombre de su columna;
+    los del WHERE (sede_1, ...) son filtros y no se internan.
+    """
+    binds = context.compiled.binds
+    for parametros in context.compiled_parameters:
+        for clave, valor in parametros.items():
+            if not isinstance(valor, str) or valor == "":
+                continue
+            bind = binds.get(clave)
+            if bind is not None and isinstance(bind.type, TextoDiccionario) and clave == bind.type.campo:
+                yield clave, valor
+
+def _verificar_codigo(codigo: int, valor: str, guardado: str):
+    # Dos valores con el mismo código de 31 bits: improbable con cientos de valores, pero se detecta
+    if guardado != valor:
+        raise ColisionDiccionario(f"El código {codigo} de '{valor}' ya corresponde a '{guardado}'")
+
+# --- Migración ---
+
+def _ddl_sin_tipo(tabla, columnas) -> str:
+    """CREATE TABLE de `tabla` con `columnas` sin tipo declarado (afinidad BLOB): con TEXT,
+    SQLite convertiría los códigos enteros de vuelta a texto."""
+    from models.db import get_engine
+    ddl = str(CreateTable(tabla).compile(dialect=get_engine().dialect))
+    for columna in columnas:
+        ddl = re.sub(rf"(\n\s*{columna}) TEXT", r"\1", ddl)
+    return ddl
+
+def _triggers_activos(conn):
+    return [fila[0] for fila in conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type='trigger' AND tbl_name='activos'"
+    )]
+
+def _convertir_a_diccionario(conn):
+    tabla = Activo.__table__
+    for campo in CAMPOS_DICCIONARIO:
+        valores = [fila[0] for fila in conn.exec_driver_sql(
+            f"SELECT DISTINCT {campo} FROM activos WHERE typeof({campo}) = 'text' AND {campo} <> ''"
+        )]
+        filas = [(codigo_valor(campo, valor), campo, valor) for valor in valores]
+        if filas:
+            conn.exec_driver_sql(_INSERTAR_VALOR, filas)
+        for codigo, _, valor in filas:
+            guardado = conn.exec_driver_sql(
+                "SELECT valor FROM diccionario_activos WHERE id = ?", (codigo,)
+            ).scalar()
+            _verificar_codigo(codigo, valor, guardado)
+
+    # Se reconstruye la tabla para quitar la afinidad TEXT, conservando los rowid
+    # (el índice FTS5 apunta a ellos)
+    columnas = [columna.name for columna in tabla.columns]
+    origen = ", ".join(
+        f"CASE WHEN typeof({c}) = 'text' AND {c} <> '' THEN "
+        f"(SELECT id FROM diccionario_activos WHERE campo = '{c}' AND valor = activos.{c}) ELSE {c} END"
+        if c in CAMPOS_DICCIONARIO else c
+        for c in columnas
+    )
+    ddl = _ddl_sin_tipo(tabla, CAMPOS_DICCIONARIO).replace("CREATE TABLE activos", "CREATE TABLE activos_migracion", 1)
+    conn.exec_driver_sql("DROP TABLE IF EXISTS activos_migracion")
+    conn.exec_driver_sql(ddl)
+    conn.exec_driver_sql(
+        f"INSERT INTO activos_migracion (rowid, {', '.join(columnas)}) SELECT rowid, {origen} FROM activos"
+    )
+    conn.exec_driver_sql("DROP TABLE activos")
+    conn.exec_driver_sql("ALTER TABLE activos_migracion RENAME TO activos")
+    for indice in tabla.indexes:
+        indice.create(bind=conn)
+
+    from models.stats import DIMENSIONES_RESUMEN, resumen_activos
+    conn.exec_driver_sql("DROP TABLE IF EXISTS resumen_activos")
+    conn.exec_driver_sql(_ddl_sin_tipo(resumen_activos, DIMENSIONES_RESUMEN))
+
+def _convertir_a_texto(conn):
+    asignaciones = ", ".join(
+        f"{c} = CASE WHEN typeof({c}) = 'integer' THEN "
+        f"(SELECT valor FROM diccionario_activos WHERE id = activos.{c}) ELSE {c} END"
+        for c in CAMPOS_DICCIONARIO
+    )
+    conn.exec_driver_sql(f"UPDATE activos SET {asignaciones}")
+    conn.exec_driver_sql("DELETE FROM resumen_activos")
+
+def migrar_almacenamiento(engine, modo: str, compactar: bool = True):
+    """
+    Convierte la base al modo indicado. Los triggers se quitan durante la conversión (el
+    contenido lógico no cambia, así que no se generan revisiones) y luego se recrean, junto
+    con el resumen de estadísticas y el índice de búsqueda. Ejecutar con la aplicación detenida.
+    """
+    from models.search import crear_indice_busqueda, reconstruir_indice_busqueda
+    from models.stats import crear_resumen_estadisticas
+    from models.sync import crear_registro_cambios
+
+    if modo not in MODOS_ALMACENAMIENTO:
+        raise ValueError(f"Modo no válido: {modo}")
+    with engine.begin() as conn:
+        actual = leer_modo(conn)
+        if actual == modo:
+            logging.info(f"La base ya está en modo {modo}")
+            return False
+        for trigger in _triggers_activos(conn):
+            conn.exec_driver_sql(f"DROP TRIGGER {trigger}")
+        if modo == "diccionario":
+            _convertir_a_diccionario(conn)
+        else:
+            _convertir_a_texto(conn)
+        conn.execute(configuracion_db.delete().where(configuracion_db.c.clave == "almacenamiento"))
+        conn.execute(configuracion_db.insert().values(clave="almacenamiento", valor=modo))
+        # Las tablas se reconstruyeron: el próximo arranque verifica el esquema completo
+        conn.execute(configuracion_db.delete().where(configuracion_db.c.clave == CLAVE_VERSION_ESQUEMA))
+
+    activar_almacenamiento(engine)
+    crear_registro_cambios(engine)
+    crear_resumen_estadisticas(engine)  # sin sus triggers, lo rellena con un recuento completo
+    if compactar:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+    crear_indice_busqueda(engine)
+    # VACUUM puede renumerar rowids, y el área se indexa con su texto decodificado
+    reconstruir_indice_busqueda(engine)
+    logging.info(f"Base convertida de modo {actual} a {modo}")
+    return True
+
+
+if __name__ == "__main__":
+    # models.db importa este módulo; sin esto se ejecutaría dos veces y las tablas se
+    # declararían de nuevo en Base.metadata
+    sys.modules["models.dictionary"] = sys.modules[__name__]
+    from models.db import get_app_db_path, get_engine, init_db
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Convierte el almacenamiento de la tabla de activos")
+    parser.add_argument("--modo", choices=MODOS_ALMACENAMIENTO, required=True)
+    parser.add_argument("--db", default=get_app_db_path(),
+                        help="Ruta de la base (por defecto, la que abre main.py)")
+    parser.add_argument("--sin-vacuum", action="store_true", help="No compactar el archivo al terminar")
+    args = parser.parse_args()
+    if not os.path.isfile(args.db):
+        # init_db crearía una base vacía y la migración no tocaría la de verdad
+        parser.error(f"No existe la base {args.db}")
+    logging.info(f"Base: {args.db}")
+    init_db(args.db)
+    migrar_almacenamiento(get_engine(), args.modo, compactar=not args.sin_vacuum)
@@ -0,0 +1,128 @@
+"""
+Codificación por diccionario de las columnas de baja cardinalidad de `activos`
+(modo de almacenamiento opcional, ver models/dictionary.py).
+
+En modo diccionario cada valor se guarda como un entero estable de 31 bits derivado del
+campo y el texto, y `diccionario_activos` guarda la correspondencia código -> texto.
+Como el código se calcula sin consultar la base, codificar un filtro o una fila nueva
+nunca espera una escritura. Solo los INSERT/UPDATE agregan valores (models/dictionary.py
+los interna en la misma transacción); un filtro de lectura calcula su código sin tocar la
+caché. El tipo TextoDiccionario traduce en ambos sentidos, así que el ORM, los filtros y
+los esquemas de la API siguen viendo texto.
+"""
+
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
+
+CAMPOS_DICCIONARIO = (
+    "categoria", "estado", "sede", "area",
+    "central_de_costos", "nombre_central_costos", "cuenta_contable",
+)
+
+MODO_DICCIONARIO = False
+SIN_COINCIDENCIA = -1  # los códigos son de 31 bits sin signo
+
+# Caché de internado del proceso: código -> texto (y su campo). Son decenas o cientos de valores.
+_valores: Dict[int, str] = {}
+_campos: Dict[int, str] = {}
+_sin_confirmar: Set[int] = set()  # códigos calculados que aún no están en diccionario_activos
+_lock = threading.Lock()
+
+
+class ColisionDiccionario(ValueError):
+    pass
+
+
+def codigo_valor(campo: str, valor: str) -> int:
+    resumen = hashlib.blake2b(f"{campo}\x1f{valor}".encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(resumen, "big") & 0x7FFFFFFF
+
+def codigo_consulta(campo: str, valor: str) -> int:
+    """Código para un parámetro de la sentencia; no agrega nada a la caché."""
+    codigo = codigo_valor(campo, valor)
+    anterior = _valores.get(codigo)
+    if anterior is not None and anterior != valor:
+        # El código ya es de otro valor: este no puede estar guardado, así que no coincide con nada.
+        # Si es una escritura, el internado la rechaza con ColisionDiccionario.
+        return SIN_COINCIDENCIA
+    return codigo
+
+def internar(pares: Iterable[Tuple[str, str]]) -> Set[int]:
+    """Agrega a la caché los (campo, texto) que va a escribir una sentencia; devuelve los
+    códigos que todavía no están en diccionario_activos."""
+    pendientes = set()
+    with _lock:
+        for campo, valor in set(pares):
+            codigo = codigo_valor(campo, valor)
+            anterior = _valores.get(codigo)
+            if anterior is None:
+                _valores[codigo] = valor
+                _campos[codigo] = campo
+                _sin_confirmar.add(codigo)
+            elif anterior != valor:
+                raise ColisionDiccionario(f"El código {codigo} de '{valor}' ya corresponde a '{anterior}'")
+            if codigo in _sin_confirmar:
+                pendientes.add(codigo)
+    return pendientes
+
+def decodificar(codigo: int) -> Optional[str]:
+    valor = _valores.get(codigo)
+    if valor is None:
+        # Escrito por otro proceso después de cargar el diccionario
+        from models.dictionary import recargar_diccionario
+        recargar_diccionario()
+        valor = _valores.get(codigo)
+    return valor
+
+def reiniciar():
+    """Vacía la caché; la de una base no vale para otra (init_db con otra ruta, pruebas)."""
+    with _lock:
+        _valores.clear()
+        _campos.clear()
+        _sin_confirmar.clear()
+
+def cargar_valores(filas: Iterable):
+    """Agrega filas (código, campo, texto) leídas de diccionario_activos a la caché."""
+    with _lock:
+        for codigo, campo, valor in filas:
+            _valores[codigo] = valor
+            _campos[codigo] = campo
+            _sin_confirmar.discard(codigo)
+
+def filas_de(codigos: Iterable[int]):
+    """Filas (código, campo, texto) para insertar en diccionario_activos."""
+    with _lock:
+        return [(codigo, _campos[codigo], _valores[codigo]) for codigo in codigos]
+
+def confirmar(codigos: Iterable[int]):
+    with _lock:
+        _sin_confirmar.difference_update(codigos)
+
+def activar(modo: bool):
+    global MODO_DICCIONARIO
+    MODO_DICCIONARIO = modo
+
+
+class TextoDiccionario(TypeDecorator):
+    """Text que, en modo diccionario, se guarda como el código entero de su valor."""
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, campo: str):
+        super().__init__()
+        self.campo = campo
+
+    def process_bind_param(self, value, dialect):
+        # '' es el "sin valor" del resumen de estadísticas y queda tal cual
+        if not MODO_DICCIONARIO or not isinstance(value, str) or value == "":
+            return value
+        return codigo_consulta(self.campo, value)
+
+    def process_result_value(self, value, dialect):
+        if type(value) is int:
+            return decodificar(value)
+        return value
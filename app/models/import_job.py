@@ -0,0 +1,31 @@
+from sqlalchemy import Boolean, Column, Float, Integer, String, Text
+
+from models.activo import Base
+
+class ImportJob(Base):
+    __tablename__ = 'import_jobs'
+    id = Column(String(32), primary_key=True)
+    # recibiendo -> pendiente -> preparando -> procesando -> completado | fallido
+    estado = Column(String(20), nullable=False, index=True)
+    formato = Column(String(10), nullable=False)
+    nombre_archivo = Column(Text, nullable=True)
+    archivo_original = Column(Text, nullable=True)   # archivo subido (xlsx/csv/jsonl)
+    archivo_filas = Column(Text, nullable=False)     # filas normalizadas, una por línea (JSONL)
+    preparado = Column(Boolean, nullable=False, default=False)  # el JSONL de filas ya está completo
+    url_base = Column(Text, nullable=True)
+    sede_id = Column(Text, nullable=True)
+    total_filas = Column(Integer, nullable=False, default=0)
+    chunks_recibidos = Column(Integer, nullable=False, default=0)
+    # Filas aplicadas en lotes ya confirmados: punto de reanudación tras un reinicio
+    filas_confirmadas = Column(Integer, nullable=False, default=0)
+    creados = Column(Integer, nullable=False, default=0)
+    actualizados = Column(Integer, nullable=False, default=0)
+    sin_cambios = Column(Integer, nullable=False, default=0)
+    filas_con_error = Column(Integer, nullable=False, default=0)
+    errores = Column(Text, nullable=True)  # JSON: [{"fila", "correlativo", "error"}]
+    mensaje = Column(Text, nullable=True)
+    creado_en = Column(Float, nullable=False)
+    iniciado_en = Column(Float, nullable=True)
+    filas_al_iniciar = Column(Integer, nullable=False, default=0)
+    actualizado_en = Column(Float, nullable=True)
+    finalizado_en = Column(Float, nullable=True)
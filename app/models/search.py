@@ -0,0 +1,108 @@
+"""
+Índice de texto completo (FTS5) sobre los campos descriptivos de `activos`.
+Es una tabla de contenido externo: guarda solo el índice y se mantiene con triggers,
+así que cualquier escritura (ORM, upsert masivo, importaciones) queda indexada sin
+código adicional.
+"""
+
+import logging
+import re
+
+from sqlalchemy import literal_column, select, text
+
+from models.encoding import CAMPOS_DICCIONARIO
+
+CAMPOS_BUSQUEDA = ("descripcion", "marca", "modelo", "numero_serie", "codigo_activo", "area")
+
+# Peso de cada campo en bm25 (mismo orden que CAMPOS_BUSQUEDA): un número de serie o
+# código que coincide pesa más que una palabra suelta de la descripción
+PESOS_BM25 = (1.0, 2.0, 2.0, 5.0, 5.0, 1.0)
+
+def _valor(fila: str, campo: str) -> str:
+    """Expresión SQL del texto de `campo`; en modo diccionario (models/encoding.py) se decodifica."""
+    if campo not in CAMPOS_DICCIONARIO:
+        return f"{fila}.{campo}"
+    return (f"CASE WHEN typeof({fila}.{campo}) = 'integer' THEN "
+            f"(SELECT valor FROM diccionario_activos WHERE id = {fila}.{campo}) ELSE {fila}.{campo} END")
+
+_columnas = ", ".join(CAMPOS_BUSQUEDA)
+_nuevos = ", ".join(_valor("new", campo) for campo in CAMPOS_BUSQUEDA)
+_anteriores = ", ".join(_valor("old", campo) for campo in CAMPOS_BUSQUEDA)
+_actuales = ", ".join(_valor("activos", campo) for campo in CAMPOS_BUSQUEDA)
+
+TRIGGERS_BUSQUEDA = ("activos_fts_ai", "activos_fts_ad", "activos_fts_au")
+
+DDL_BUSQUEDA = [
+    # remove_diacritics: "camara" encuentra "Cámara"; prefix: índices para prefijos de 2 y 3 letras
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS activos_fts USING fts5(
+        {_columnas}, content='activos', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER activos_fts_ai AFTER INSERT ON activos BEGIN
+        INSERT INTO activos_fts(rowid, {_columnas}) VALUES (new.rowid, {_nuevos});
+    END""",
+    f"""CREATE TRIGGER activos_fts_ad AFTER DELETE ON activos BEGIN
+        INSERT INTO activos_fts(activos_fts, rowid, {_columnas}) VALUES ('delete', old.rowid, {_anteriores});
+    END""",
+    f"""CREATE TRIGGER activos_fts_au AFTER UPDATE OF {_columnas} ON activos BEGIN
+        INSERT INTO activos_fts(activos_fts, rowid, {_columnas}) VALUES ('delete', old.rowid, {_anteriores});
+        INSERT INTO activos_fts(rowid, {_columnas}) VALUES (new.rowid, {_nuevos});
+    END""",
+]
+
+# 'rebuild' leería los códigos tal como están en `activos`; se reindexa con el texto
+_REINDEXAR = [
+    "INSERT INTO activos_fts(activos_fts) VALUES ('delete-all')",
+    f"INSERT INTO activos_fts(rowid, {_columnas}) SELECT rowid, {_actuales} FROM activos",
+]
+
+def crear_indice_busqueda(engine):
+    """
+    Crea la tabla FTS5 y (re)crea sus triggers, por si cambió su definición; si la tabla
+    es nueva, indexa las filas existentes.
+    """
+    try:
+        with engine.begin() as conn:
+            existia = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='activos_fts'"
+            ).first() is not None
+            for trigger in TRIGGERS_BUSQUEDA:
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+            for sentencia in DDL_BUSQUEDA:
+                conn.exec_driver_sql(sentencia)
+            if not existia:
+                for sentencia in _REINDEXAR:
+                    conn.exec_driver_sql(sentencia)
+                logging.info("Índice de búsqueda FTS5 creado")
+    except Exception as e:
+        # Ej.: SQLite compilado sin FTS5; el resto de la aplicación sigue funcionando
+        logging.warning(f"No se pudo crear el índice de búsqueda: {e}")
+
+def reconstruir_indice_busqueda(engine):
+    """
+    Vuelve a indexar toda la tabla. Necesario tras un VACUUM, que puede renumerar
+    los rowid de `activos` (su clave primaria es texto).
+    """
+    with engine.begin() as conn:
+        for sentencia in _REINDEXAR:
+            conn.exec_driver_sql(sentencia)
+
+def consulta_fts(texto: str, prefijo: bool = True) -> str:
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra va entre
+    comillas (sin operadores ni sintaxis) y todas deben coincidir.
+    """
+    palabras = re.findall(r"\w+", texto)
+    return " ".join(f'"{palabra}"' + ("*" if prefijo else "") for palabra in palabras)
+
+def subconsulta_busqueda(consulta: str):
+    """rowid y puntaje bm25 (menor es mejor) de las filas que coinciden con la consulta."""
+    pesos = ", ".join(str(peso) for peso in PESOS_BM25)
+    return (
+        select(
+            literal_column("activos_fts.rowid").label("fila"),
+            literal_column(f"bm25(activos_fts, {pesos})").label("puntaje"),
+        )
+        .select_from(text("activos_fts"))
+        .where(text("activos_fts MATCH :consulta").bindparams(consulta=consulta))
+        .subquery("coincidencias")
+    )
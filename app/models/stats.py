@@ -0,0 +1,83 @@
+"""
+Resumen de conteos de activos por sede × área × estado × categoría, mantenido por triggers.
+La tabla tiene una fila por combinación existente (decenas o cientos, no importa cuántos
+activos haya), así que cualquier agrupación sobre esas dimensiones se responde sumando el
+resumen, sin recorrer `activos`. Los valores nulos se guardan como '' y se informan como
+"sin valor", igual que en las estadísticas anteriores.
+"""
+
+import logging
+
+from sqlalchemy import Column, Integer, PrimaryKeyConstraint, Table, func, select
+
+from models.activo import Activo, Base
+from models.encoding import TextoDiccionario
+
+DIMENSIONES_RESUMEN = ("sede", "area", "estado", "categoria")
+
+resumen_activos = Table(
+    "resumen_activos", Base.metadata,
+    *[Column(dimension, TextoDiccionario(dimension), nullable=False) for dimension in DIMENSIONES_RESUMEN],
+    Column("total", Integer, nullable=False),
+    PrimaryKeyConstraint(*DIMENSIONES_RESUMEN),
+)
+
+_claves = ", ".join(DIMENSIONES_RESUMEN)
+_nuevas = ", ".join(f"IFNULL(new.{d}, '')" for d in DIMENSIONES_RESUMEN)
+_coincide_anterior = " AND ".join(f"{d} = IFNULL(old.{d}, '')" for d in DIMENSIONES_RESUMEN)
+_cambio_de_grupo = " OR ".join(f"IFNULL(old.{d}, '') <> IFNULL(new.{d}, '')" for d in DIMENSIONES_RESUMEN)
+
+_sumar_nueva = f"""INSERT INTO resumen_activos ({_claves}, total) VALUES ({_nuevas}, 1)
+        ON CONFLICT ({_claves}) DO UPDATE SET total = total + 1"""
+_restar_anterior = f"""UPDATE resumen_activos SET total = total - 1 WHERE {_coincide_anterior};
+        DELETE FROM resumen_activos WHERE {_coincide_anterior} AND total <= 0"""
+
+DDL_RESUMEN = [
+    f"CREATE TRIGGER IF NOT EXISTS activos_resumen_ai AFTER INSERT ON activos BEGIN {_sumar_nueva}; END",
+    f"CREATE TRIGGER IF NOT EXISTS activos_resumen_ad AFTER DELETE ON activos BEGIN {_restar_anterior}; END",
+    f"""CREATE TRIGGER IF NOT EXISTS activos_resumen_au AFTER UPDATE OF {_claves} ON activos
+        WHEN {_cambio_de_grupo} BEGIN {_restar_anterior}; {_sumar_nueva}; END""",
+]
+
+def _recuento(conn):
+    """Conteo completo desde `activos` con el mismo formato que el resumen."""
+    columnas = [
+        func.ifnull(getattr(Activo, d), "", type_=TextoDiccionario(d)).label(d) for d in DIMENSIONES_RESUMEN
+    ]
+    return conn.execute(select(*columnas, func.count().label("total")).group_by(*columnas)).all()
+
+def reconstruir_resumen(conn):
+    conn.execute(resumen_activos.delete())
+    filas = [dict(fila._mapping) for fila in _recuento(conn)]
+    if filas:
+        conn.execute(resumen_activos.insert(), filas)
+    return len(filas)
+
+def crear_resumen_estadisticas(engine):
+    """Crea los triggers; si no existían, llena el resumen con un recuento completo."""
+    with engine.begin() as conn:
+        existia = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='activos_resumen_ai'"
+        ).first() is not None
+        for sentencia in DDL_RESUMEN:
+            conn.exec_driver_sql(sentencia)
+        if not existia:
+            grupos = reconstruir_resumen(conn)
+            logging.info(f"Resumen de estadísticas creado con {grupos} combinaciones")
+
+def verificar_resumen(conn):
+    """Diferencias entre el resumen y un recuento completo: [{dimensiones..., resumen, recuento}]."""
+    recuento = {tuple(fila[:-1]): fila.total for fila in _recuento(conn)}
+    resumen = {
+        tuple(fila[:-1]): fila.total
+        for fila in conn.execute(select(*[resumen_activos.c[d] for d in DIMENSIONES_RESUMEN], resumen_activos.c.total))
+    }
+    diferencias = []
+    for clave in sorted(set(recuento) | set(resumen)):
+        if recuento.get(clave, 0) != resumen.get(clave, 0):
+            diferencias.append({
+                **dict(zip(DIMENSIONES_RESUMEN, clave)),
+                "resumen": resumen.get(clave, 0),
+                "recuento": recuento.get(clave, 0),
+            })
+    return diferencias
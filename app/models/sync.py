@@ -0,0 +1,67 @@
+"""
+Registro de cambios para la sincronización incremental de los clientes.
+Cada inserción, actualización o eliminación en `activos` toma el siguiente valor de un
+contador global y lo guarda en `activos.revision`; las eliminaciones dejan una lápida en
+`activos_eliminados`. Todo lo mantienen triggers, así que ninguna ruta de escritura
+(ORM, upsert masivo, importaciones) puede olvidarse de registrar el cambio.
+"""
+
+import logging
+
+from sqlalchemy import Column, Integer, String, Table
+
+from models.activo import Base
+
+revision_activos = Table(
+    "revision_activos", Base.metadata,
+    Column("id", Integer, primary_key=True),  # una sola fila, id = 1
+    Column("valor", Integer, nullable=False),
+)
+
+activos_eliminados = Table(
+    "activos_eliminados", Base.metadata,
+    Column("id", String(30), primary_key=True),
+    Column("revision", Integer, nullable=False, index=True),
+)
+
+_siguiente = "UPDATE revision_activos SET valor = valor + 1 WHERE id = 1"
+_actual = "(SELECT valor FROM revision_activos WHERE id = 1)"
+
+DDL_REGISTRO_CAMBIOS = [
+    f"""CREATE TRIGGER IF NOT EXISTS activos_revision_ai AFTER INSERT ON activos BEGIN
+        {_siguiente};
+        UPDATE activos SET revision = {_actual} WHERE rowid = new.rowid;
+        DELETE FROM activos_eliminados WHERE id = new.id;
+    END""",
+    # La condición WHEN evita que la propia asignación de la revisión vuelva a contar
+    f"""CREATE TRIGGER IF NOT EXISTS activos_revision_au AFTER UPDATE ON activos
+        WHEN new.revision IS old.revision BEGIN
+        {_siguiente} AND old.id IS NOT new.id;
+        INSERT OR REPLACE INTO activos_eliminados (id, revision)
+            SELECT old.id, {_actual} WHERE old.id IS NOT new.id;
+        DELETE FROM activos_eliminados WHERE id = new.id AND old.id IS NOT new.id;
+        {_siguiente};
+        UPDATE activos SET revision = {_actual} WHERE rowid = new.rowid;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS activos_revision_ad AFTER DELETE ON activos BEGIN
+        {_siguiente};
+        INSERT OR REPLACE INTO activos_eliminados (id, revision) VALUES (old.id, {_actual});
+    END""",
+]
+
+def crear_registro_cambios(engine):
+    """Inicializa el contador, numera las filas que aún no tienen revisión y crea los triggers."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT OR IGNORE INTO revision_activos (id, valor) VALUES (1, 0)")
+        # Filas anteriores al registro de cambios: se numeran después de la revisión actual
+        numeradas = conn.exec_driver_sql(
+            f"UPDATE activos SET revision = {_actual} + rowid WHERE revision IS NULL"
+        ).rowcount
+        if numeradas:
+            conn.exec_driver_sql(
+                "UPDATE revision_activos SET valor = "
+                "MAX(valor, (SELECT COALESCE(MAX(revision), 0) FROM activos)) WHERE id = 1"
+            )
+            logging.info(f"Registro de cambios: {numeradas} activos existentes numerados")
+        for sentencia in DDL_REGISTRO_CAMBIOS:
+            conn.exec_driver_sql(sentencia)
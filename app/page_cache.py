@@ -0,0 +1,115 @@
+"""
+Caché LRU de las páginas HTML de activos que se devuelven al VPS.
+Cada página se guarda con la revisión de la fila (activos.revision) con la que se renderizó.
+Los endpoints de escritura invalidan las entradas después de confirmar la transacción, así
+que un escaneo repetido se responde sin consultar SQLite ni volver a renderizar; además el
+relay compara periódicamente las revisiones (aplicar_revisiones) para descartar las páginas
+de filas que cambiaron por un camino que no invalidó.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+CAPACIDAD_CACHE_PAGINAS = 1024
+
+
+class CachePaginasActivo:
+    def __init__(self, capacidad: int = CAPACIDAD_CACHE_PAGINAS):
+        self.capacidad = capacidad
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (revisión de la fila, html)
+        self._en_vuelo: Dict[str, int] = {}  # id -> versión reservada por la lectura en curso
+        self._siguiente_version = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+        self.obsoletas = 0
+        # Revisión global hasta la que se comparó el contenido; None antes de la primera vez
+        self.revision_verificada: Optional[int] = None
+
+    def obtener(self, asset_id: str) -> Optional[str]:
+        with self._lock:
+            entrada = self._entradas.get(asset_id)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(asset_id)
+            self.aciertos += 1
+            return entrada[1]
+
+    def reservar(self, asset_id: str) -> int:
+        """Versión con la que se guardará el resultado de una lectura que está por empezar."""
+        with self._lock:
+            self._siguiente_version += 1
+            self._en_vuelo[asset_id] = self._siguiente_version
+            return self._siguiente_version
+
+    def guardar(self, asset_id: str, version: int, revision: int, html: str):
+        """Guarda la página solo si no hubo una invalidación desde que se reservó la versión."""
+        with self._lock:
+            if self._en_vuelo.get(asset_id) != version:
+                return
+            del self._en_vuelo[asset_id]
+            self._entradas[asset_id] = (revision, html)
+            self._entradas.move_to_end(asset_id)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def cancelar(self, asset_id: str, version: int):
+        """Libera la reserva de una lectura que no guardó nada (activo inexistente o error)."""
+        with self._lock:
+            if self._en_vuelo.get(asset_id) == version:
+                del self._en_vuelo[asset_id]
+
+    def invalidar(self, asset_ids: Iterable[str]):
+        with self._lock:
+            for asset_id in asset_ids:
+                self._en_vuelo.pop(asset_id, None)
+                if self._entradas.pop(asset_id, None) is not None:
+                    self.invalidaciones += 1
+
+    def aplicar_revisiones(self, hasta: int, cambios: Dict[str, int]):
+        """
+        Descarta las páginas renderizadas con una revisión anterior a la de `cambios`
+        (id -> revisión actual de la fila, o de su borrado) y las lecturas en curso de esos ids.
+        """
+        with self._lock:
+            for asset_id, revision in cambios.items():
+                self._en_vuelo.pop(asset_id, None)
+                entrada = self._entradas.get(asset_id)
+                if entrada is not None and entrada[0] < revision:
+                    del self._entradas[asset_id]
+                    self.obsoletas += 1
+            self.revision_verificada = hasta
+
+    def invalidar_todo(self):
+        with self._lock:
+            self.invalidaciones += len(self._entradas)
+            self._entradas.clear()
+            self._en_vuelo.clear()
+
+    def reiniciar(self):
+        """Vacía la caché y olvida la revisión verificada (otra base de datos)."""
+        self.invalidar_todo()
+        self.revision_verificada = None
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "capacidad": self.capacidad,
+                "entradas": len(self._entradas),
+                "en_vuelo": len(self._en_vuelo),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "invalidaciones": self.invalidaciones,
+                "obsoletas": self.obsoletas,
+                "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else 0.0,
+            }
+
+
+cache_paginas = CachePaginasActivo()
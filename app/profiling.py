@@ -0,0 +1,299 @@
+"""
+Diagnóstico de rendimiento bajo demanda.
+
+- Registro de consultas lentas: cada sentencia SQL que supera el umbral se anota con su
+  SQL, la forma de sus parámetros (tipos y cantidad, no los valores), la duración y el
+  plan de EXPLAIN QUERY PLAN. El plan se obtiene en un hilo aparte con otra conexión,
+  así que la petición que hizo la consulta no espera por él.
+- Perfilado de peticiones: se arma para las próximas N peticiones a una ruta (o se pide
+  con un encabezado en una sola) y cada una se guarda como pila colapsada (.folded, para
+  flamegraph.pl o speedscope) o como .prof de cProfile (pstats, snakeviz).
+
+Todo se escribe bajo la carpeta de datos (APP_DATA_DIR), en diagnostico/.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+UMBRAL_CONSULTA_LENTA_MS = float(os.environ.get("QRIZATE_CONSULTA_LENTA_MS", "250"))
+MAX_CONSULTAS_LENTAS_EN_MEMORIA = 200
+MAX_SQL_REGISTRADO = 4000
+INTERVALO_MUESTREO = 0.005  # segundos entre muestras de las pilas
+ENCABEZADO_PERFILAR = "x-qrizate-perfilar"
+MODOS_PERFILADO = ("muestreo", "cprofile")
+# cProfile instala un único hook de perfilado por proceso: solo una captura a la vez
+_cprofile_en_uso = threading.Lock()
+# Hilos ociosos (workers sin trabajo, el event loop esperando E/S): no aportan al perfil
+FUNCIONES_EN_ESPERA = {"wait", "select", "poll", "_wait_for_tstate_lock", "_worker", "_connection_worker_thread"}
+
+
+def carpeta_diagnostico(subcarpeta: str = "") -> str:
+    from models.db import get_data_dir
+    carpeta = os.path.join(get_data_dir(), "diagnostico", subcarpeta)
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+# --- Consultas lentas ---
+
+def forma_parametros(parametros, executemany: bool) -> Dict:
+    """Tipos y cantidad de los parámetros, sin sus valores (pueden ser datos de activos)."""
+    if executemany:
+        filas = list(parametros or [])
+        primera = filas[0] if filas else ()
+        return {"filas": len(filas), "tipos": [type(valor).__name__ for valor in primera]}
+    valores = parametros.values() if isinstance(parametros, dict) else (parametros or ())
+    return {"filas": 1, "tipos": [type(valor).__name__ for valor in valores]}
+
+
+class RegistroConsultasLentas:
+    def __init__(self, umbral_ms: float = UMBRAL_CONSULTA_LENTA_MS):
+        self.umbral_ms = umbral_ms
+        self.recientes = deque(maxlen=MAX_CONSULTAS_LENTAS_EN_MEMORIA)
+        self.total = 0
+        self._cola: "queue.Queue" = queue.Queue(maxsize=1000)
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def instalar(self, engine, nombre: str):
+        """Escucha las sentencias del engine (para uno async, pasar engine.sync_engine)."""
+        if getattr(engine, "_consultas_lentas_instaladas", False):
+            return
+        engine._consultas_lentas_instaladas = True
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def antes(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("lentas_inicio", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def despues(conn, cursor, statement, parameters, context, executemany):
+            inicios = conn.info.get("lentas_inicio")
+            if not inicios:
+                return
+            duracion_ms = (time.perf_counter() - inicios.pop()) * 1000
+            if self.umbral_ms > 0 and duracion_ms >= self.umbral_ms:
+                self._anotar(nombre, statement, parameters, executemany, duracion_ms)
+
+        @event.listens_for(engine, "handle_error")
+        def error(contexto):
+            inicios = contexto.connection.info.get("lentas_inicio") if contexto.connection is not None else None
+            if inicios:
+                inicios.pop()
+
+    def _anotar(self, engine: str, sql: str, parametros, executemany: bool, duracion_ms: float):
+        entrada = {
+            "fecha": datetime.now().isoformat(timespec="milliseconds"),
+            "engine": engine,
+            "duracion_ms": round(duracion_ms, 2),
+            "sql": sql[:MAX_SQL_REGISTRADO],
+            "parametros": forma_parametros(parametros, executemany),
+        }
+        # Se anota desde varios hilos a la vez (threadpool, relay, worker): un solo escritor
+        with self._lock:
+            self.total += 1
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._escribir, name="consultas-lentas", daemon=True)
+                self._hilo.start()
+        try:
+            # El plan se pide con los mismos parámetros, pero fuera de la petición
+            self._cola.put_nowait((entrada, None if executemany else parametros))
+        except queue.Full:
+            pass
+
+    def _escribir(self):
+        while True:
+            entrada, parametros = self._cola.get()
+            entrada["plan"] = plan_consulta(entrada["sql"], parametros)
+            self.recientes.append(entrada)
+            logging.warning(f"Consulta lenta ({entrada['duracion_ms']} ms): {entrada['sql'][:200]}")
+            try:
+                ruta = os.path.join(carpeta_diagnostico(), "consultas_lentas.jsonl")
+                with open(ruta, "a", encoding="utf-8") as archivo:
+                    archivo.write(json.dumps(entrada, ensure_ascii=False, default=str) + "\n")
+            except Exception as e:
+                logging.error(f"No se pudo guardar la consulta lenta: {e}")
+
+    def estadisticas(self) -> Dict:
+        return {"umbral_ms": self.umbral_ms, "total": self.total, "en_memoria": len(self.recientes)}
+
+
+def plan_consulta(sql: str, parametros) -> Optional[List[str]]:
+    if not re.match(r"\s*(SELECT|UPDATE|DELETE|WITH)\b", sql, re.IGNORECASE) or parametros is None and "?" in sql:
+        return None
+    from models.db import get_engine
+    try:
+        with get_engine().connect() as conn:
+            # Los parámetros vienen ya procesados para el driver (tupla posicional)
+            filas = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", tuple(parametros or ())).all()
+        return [fila[3] for fila in filas]
+    except Exception as e:
+        return [f"(sin plan: {e})"]
+
+# --- Perfilado de peticiones ---
+
+class MuestreadorPilas:
+    """Toma muestras periódicas de las pilas de todos los hilos (event loop, threadpool, aiosqlite)."""
+    def __init__(self, intervalo: float = INTERVALO_MUESTREO):
+        self.intervalo = intervalo
+        self.muestras: Counter = Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="muestreador", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+    def _bucle(self):
+        propio = threading.get_ident()
+        nombres = {}
+        while not self._detener.wait(self.intervalo):
+            for hilo in threading.enumerate():
+                nombres[hilo.ident] = hilo.name
+            for ident, marco in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                if marco.f_code.co_name in FUNCIONES_EN_ESPERA:
+                    continue
+                pila = []
+                while marco is not None:
+                    codigo = marco.f_code
+                    pila.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                    marco = marco.f_back
+                pila.append(nombres.get(ident, str(ident)))
+                self.muestras[";".join(reversed(pila))] += 1
+
+    def colapsado(self) -> str:
+        return "".join(f"{pila} {cantidad}\n" for pila, cantidad in self.muestras.most_common())
+
+
+class Perfilador:
+    """Perfilado armado para las próximas N peticiones a una ruta exacta."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ruta: Optional[str] = None
+        self.restantes = 0
+        self.modo = "muestreo"
+        self.archivos: deque = deque(maxlen=50)
+
+    def armar(self, ruta: str, peticiones: int, modo: str):
+        with self._lock:
+            self.ruta, self.restantes, self.modo = ruta, peticiones, modo
+
+    def desarmar(self):
+        with self._lock:
+            self.ruta, self.restantes = None, 0
+
+    def tomar(self, ruta: str) -> Optional[str]:
+        """Modo a usar si esta petición debe perfilarse (y descuenta una)."""
+        with self._lock:
+            if self.restantes <= 0 or ruta != self.ruta:
+                return None
+            self.restantes -= 1
+            return self.modo
+
+    def estado(self) -> Dict:
+        with self._lock:
+            return {"ruta": self.ruta, "restantes": self.restantes, "modo": self.modo, "archivos": list(self.archivos)}
+
+    def guardar(self, metodo: str, ruta: str, modo: str, duracion: float, resultado) -> str:
+        nombre = re.sub(r"[^\w.-]+", "_", f"{metodo}_{ruta}").strip("_")[:80]
+        marca = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        base = os.path.join(carpeta_diagnostico("perfiles"), f"{marca}_{nombre}")
+        if modo == "cprofile":
+            archivo = base + ".prof"
+            resultado.dump_stats(archivo)
+        else:
+            archivo = base + ".folded"
+            with open(archivo, "w", encoding="utf-8") as salida:
+                salida.write(resultado.colapsado())
+        self.archivos.append({"archivo": archivo, "duracion_ms": round(duracion * 1000, 2)})
+        logging.info(f"Perfil de {metodo} {ruta} ({duracion * 1000:.1f} ms) guardado en {archivo}")
+        return archivo
+
+
+def acceso_permitido(cliente: Optional[str], token: Optional[str]) -> bool:
+    """
+    Solo desde el propio equipo, o con el token de QRIZATE_TOKEN_DIAGNOSTICO si está
+    definido (el servidor escucha en toda la red local).
+    """
+    esperado = os.environ.get("QRIZATE_TOKEN_DIAGNOSTICO")
+    if esperado:
+        return token == esperado
+    return cliente in ("127.0.0.1", "::1", "localhost")
+
+
+class PerfilarPeticiones:
+    """
+    Middleware ASGI: perfila las peticiones armadas con Perfilador o las que traen el
+    encabezado X-Qrizate-Perfilar: muestreo|cprofile (sujeto a acceso_permitido). Los
+    archivos generados se listan en GET /diagnostico/perfilar.
+    """
+    def __init__(self, app, perfilador: "Perfilador" = None):
+        self.app = app
+        self.perfilador = perfilador or perfilador_global
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        modo = self.perfilador.tomar(scope["path"])
+        if modo is None:
+            encabezados = dict(scope.get("headers") or [])
+            pedido = encabezados.get(ENCABEZADO_PERFILAR.encode(), b"").decode().lower()
+            if pedido:
+                cliente = (scope.get("client") or (None,))[0]
+                token = encabezados.get(b"x-qrizate-token", b"").decode() or None
+                if acceso_permitido(cliente, token):
+                    modo = pedido if pedido in MODOS_PERFILADO else "muestreo"
+        if modo is None:
+            await self.app(scope, receive, send)
+            return
+
+        if modo == "cprofile" and not _cprofile_en_uso.acquire(blocking=False):
+            # Otra petición ya tiene el hook: un segundo enable() lo robaría (3.11) o fallaría (3.12+)
+            logging.info(f"cProfile ocupado; {scope['method']} {scope['path']} se perfila por muestreo")
+            modo = "muestreo"
+
+        inicio = time.perf_counter()
+        if modo == "cprofile":
+            # cProfile solo ve el hilo del event loop (incluidas las otras peticiones que se
+            # intercalen en él); el muestreo incluye el threadpool
+            try:
+                resultado = cProfile.Profile()
+                resultado.enable()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    resultado.disable()
+            finally:
+                _cprofile_en_uso.release()
+        else:
+            resultado = MuestreadorPilas()
+            resultado.iniciar()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                resultado.detener()
+        duracion = time.perf_counter() - inicio
+        try:
+            self.perfilador.guardar(scope["method"], scope["path"], modo, duracion, resultado)
+        except Exception as e:
+            logging.error(f"No se pudo guardar el perfil: {e}")
+
+
+consultas_lentas = RegistroConsultasLentas()
+perfilador_global = Perfilador()
@@ -0,0 +1,174 @@
+"""
+Generación de QR por lotes. Las imágenes se renderizan en un pool de procesos (qrcode y
+PIL son puro CPU y no liberan el GIL) y se guardan en una caché en disco direccionada por
+contenido: la clave es el hash de (url, tamaño, corrección de errores, formato), así que
+reimprimir un inventario sin cambios solo lee archivos.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Iterable, Iterator, Optional, Tuple
+
+# qrcode y PIL se importan al renderizar (en los procesos del pool), no al iniciar el servidor
+NIVELES_CORRECCION = ("L", "M", "Q", "H")
+FORMATOS_QR = {"png": "image/png", "svg": "image/svg+xml"}
+BORDE_QR = 2
+TAMANO_TAREA_POOL = 32  # QR por envío al pool; amortiza el costo de serializar cada tarea
+
+# --- Renderizado (se ejecuta en los procesos del pool) ---
+
+def matriz_qr(url: str, ecc: str):
+    import qrcode
+    from qrcode import constants
+    qr = qrcode.QRCode(error_correction=getattr(constants, f"ERROR_CORRECT_{ecc}"), border=BORDE_QR)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+def renderizar_png(matriz, tamano: int) -> bytes:
+    from PIL import Image
+    modulos = len(matriz)
+    img = Image.new("1", (modulos, modulos), 1)
+    img.putdata([0 if celda else 1 for fila in matriz for celda in fila])
+    # Escalado sin interpolación: cada módulo queda como un bloque nítido
+    img = img.resize((tamano, tamano), Image.NEAREST)
+    salida = BytesIO()
+    img.save(salida, format="PNG", optimize=True)
+    return salida.getvalue()
+
+def renderizar_svg(matriz, tamano: int) -> bytes:
+    # Un solo path con un rectángulo de 1x1 por módulo oscuro; escala sin pérdida
+    trazos = "".join(
+        f"M{x},{y}h1v1h-1z"
+        for y, fila in enumerate(matriz) for x, celda in enumerate(fila) if celda
+    )
+    modulos = len(matriz)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{tamano}" height="{tamano}" '
+        f'viewBox="0 0 {modulos} {modulos}" shape-rendering="crispEdges">'
+        f'<rect width="100%" height="100%" fill="#fff"/><path d="{trazos}" fill="#000"/></svg>'
+    ).encode("ascii")
+
+def renderizar_qr(url: str, tamano: int, ecc: str, formato: str) -> bytes:
+    matriz = matriz_qr(url, ecc)
+    if formato == "svg":
+        return renderizar_svg(matriz, tamano)
+    return renderizar_png(matriz, tamano)
+
+def renderizar_varios(tareas):
+    return [renderizar_qr(*tarea) for tarea in tareas]
+
+def matrices_varias(tareas):
+    return [matriz_qr(*tarea) for tarea in tareas]
+
+# --- Caché en disco ---
+
+class CacheQRDisco:
+    def __init__(self, carpeta: str):
+        self.carpeta = carpeta
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clave(url: str, tamano: int, ecc: str, formato: str) -> str:
+        return hashlib.sha256(f"{formato}\n{ecc}\n{tamano}\n{url}".encode("utf-8")).hexdigest()
+
+    def ruta(self, clave: str, formato: str) -> str:
+        return os.path.join(self.carpeta, clave[:2], f"{clave}.{formato}")
+
+    def obtener(self, clave: str, formato: str) -> Optional[bytes]:
+        try:
+            with open(self.ruta(clave, formato), "rb") as archivo:
+                contenido = archivo.read()
+        except FileNotFoundError:
+            contenido = None
+        with self._lock:
+            if contenido is None:
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+        return contenido
+
+    def guardar(self, clave: str, formato: str, contenido: bytes):
+        ruta = self.ruta(clave, formato)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)  # nunca queda un archivo a medio escribir bajo la clave
+
+    def estadisticas(self):
+        with self._lock:
+            return {"aciertos": self.aciertos, "fallos": self.fallos}
+
+_cache: Optional[CacheQRDisco] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_lock_pool = threading.Lock()
+
+def obtener_cache_qr() -> CacheQRDisco:
+    global _cache
+    from models.db import get_data_dir
+    carpeta = os.path.join(get_data_dir(), "qr_cache")
+    if _cache is None or _cache.carpeta != carpeta:
+        _cache = CacheQRDisco(carpeta)
+    return _cache
+
+def obtener_pool() -> Optional[ProcessPoolExecutor]:
+    """Pool de procesos compartido; QRIZATE_QR_PROCESOS=0 renderiza en el hilo actual."""
+    global _pool
+    procesos = int(os.environ.get("QRIZATE_QR_PROCESOS", min(4, os.cpu_count() or 1)))
+    if procesos <= 0:
+        return None
+    with _lock_pool:
+        if _pool is None:
+            # spawn en todas las plataformas: fork con los hilos del servidor activos puede
+            # heredar locks tomados y dejar procesos colgados
+            _pool = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"))
+            logging.info(f"Pool de renderizado QR iniciado con {procesos} procesos")
+        return _pool
+
+def cerrar_pool_qr():
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def en_pool(funcion, tareas):
+    """Aplica `funcion` (que recibe una lista de tareas) en el pool, por grupos, conservando el orden."""
+    pool = obtener_pool()
+    if pool is None:
+        return funcion(tareas)
+    grupos = [tareas[j:j + TAMANO_TAREA_POOL] for j in range(0, len(tareas), TAMANO_TAREA_POOL)]
+    return [resultado for grupo in pool.map(funcion, grupos) for resultado in grupo]
+
+def calcular_matrices(urls, ecc: str):
+    """Matrices de módulos (listas de bool) de varias URL, calculadas en el pool."""
+    return en_pool(matrices_varias, [(url, ecc) for url in urls])
+
+def generar_qr_lote(
+    elementos: Iterable[Tuple[str, str]], tamano: int, ecc: str, formato: str, bloque: int = 256
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Recibe pares (nombre, url) y devuelve (nombre, imagen) en el mismo orden. Procesa por
+    bloques para que el primer resultado salga sin esperar a todo el lote.
+    """
+    cache = obtener_cache_qr()
+    elementos = list(elementos)
+    for inicio in range(0, len(elementos), bloque):
+        parte = elementos[inicio:inicio + bloque]
+        claves = [cache.clave(url, tamano, ecc, formato) for _, url in parte]
+        imagenes = [cache.obtener(clave, formato) for clave in claves]
+        faltantes = [i for i, imagen in enumerate(imagenes) if imagen is None]
+        nuevas = en_pool(renderizar_varios, [(parte[i][1], tamano, ecc, formato) for i in faltantes])
+        for i, imagen in zip(faltantes, nuevas):
+            cache.guardar(claves[i], formato, imagen)
+            imagenes[i] = imagen
+        for (nombre, _), imagen in zip(parte, imagenes):
+            yield nombre, imagen
@@ -6,7 +6,6 @@ Versión optimizada para PyInstaller con GUI como interfaz principal
 import sys
 import os
 import threading
-import time
 import signal
 import logging
 from contextlib import asynccontextmanager
@@ -24,14 +23,18 @@ logging.basicConfig(
 # Imports de FastAPI y dependencias
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-import uvicorn
+from fastapi.responses import HTMLResponse, JSONResponse
 
 # Imports locales
-from models.db import init_db
+from models.db import estado_base_datos, init_db
 from routers.activos import router as activos_router
+from readiness import EstadoServidor, ejecutar_uvicorn
 import ip_and_port
 
+PUERTO = 543
+# Tope de espera del arranque; normalmente termina mucho antes (se espera la señal, no este tiempo)
+TIEMPO_MAXIMO_ARRANQUE = 60
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -105,6 +108,21 @@ def read_root():
     </html>
     """
 
+def motivo_no_listo(base):
+    """None si la base responde y el esquema está aplicado; si no, el motivo."""
+    if not base["abierta"]:
+        return base.get("error") or "La base de datos no responde"
+    if not base["esquema_aplicado"]:
+        return "No se pudo aplicar el esquema de la base de datos"
+    return None
+
+@app.get("/health/ready")
+def health_ready():
+    """Listo para atender: la base responde y el esquema está aplicado."""
+    base = estado_base_datos()
+    listo = motivo_no_listo(base) is None
+    return JSONResponse({"listo": listo, "base_datos": base}, status_code=200 if listo else 503)
+
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
     from fastapi import HTTPException
@@ -114,37 +132,40 @@ class QRizateServer:
     def __init__(self):
         self.server_thread = None
         self.server_running = False
+        self.estado = EstadoServidor()
         
     def start_server(self):
         """Inicia el servidor FastAPI en un hilo separado"""
         try:
-            logging.info("Iniciando servidor QRizate en puerto 543...")
-            self.server_running = True
-            uvicorn.run(
+            logging.info(f"Iniciando servidor QRizate en puerto {PUERTO}...")
+            ejecutar_uvicorn(
                 app, 
                 host="0.0.0.0", 
-                port=543,
+                port=PUERTO,
+                estado=self.estado,
+                comprobar_listo=lambda: motivo_no_listo(estado_base_datos()),
                 log_level="warning",  # Reducir verbosidad en el ejecutable
                 access_log=False
             )
-        except Exception as e:
-            logging.error(f"Error al iniciar servidor: {e}")
+        except BaseException as e:
+            # uvicorn termina con SystemExit si no puede abrir el puerto
+            logging.error(f"Error al iniciar servidor: {e!r}")
+        finally:
             self.server_running = False
     
     def start_background_server(self):
-        """Inicia el servidor en segundo plano"""
+        """Inicia el servidor en segundo plano y espera a que escuche (o a que falle)"""
         self.server_thread = threading.Thread(target=self.start_server, daemon=True)
         self.server_thread.start()
         
-        # Esperar a que el servidor inicie
-        time.sleep(2)
-        
+        self.server_running = self.estado.esperar(timeout=TIEMPO_MAXIMO_ARRANQUE)
         if self.server_running:
             ip = ip_and_port.get_local_ip()
-            logging.info(f"✅ Servidor QRizate iniciado en http://{ip}:543")
+            logging.info(f"✅ Servidor QRizate iniciado en http://{ip}:{self.estado.datos['port']}")
             return True
         else:
-            logging.error("❌ Error al iniciar el servidor")
+            motivo = self.estado.error or f"no respondió en {TIEMPO_MAXIMO_ARRANQUE} s"
+            logging.error(f"❌ Error al iniciar el servidor: {motivo}")
             return False
     
     def show_gui(self):
@@ -0,0 +1,172 @@
+"""
+Registro de las consultas que hacen las rutas de activos, el relay y las importaciones,
+con una verificación de sus planes: ninguna debe recorrer una tabla completa, y las que no
+se registran como recorrido tampoco un índice completo (SCAN ... USING [COVERING] INDEX):
+deben posicionarse por rango. Si un cambio de esquema o de consulta deja alguna sin índice,
+la verificación lo muestra y falla. tests/test_query_plans.py la ejecuta con pytest.
+
+Uso (desde la carpeta app/):
+    python -m query_plans              # sobre una base temporal con el esquema actual
+    python -m query_plans --db ruta    # sobre una base existente (usa sus estadísticas)
+Sale con código 1 si alguna consulta hace un recorrido que no le corresponde.
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from typing import Callable, Dict, List, Set
+
+from sqlalchemy import and_, delete, func, literal_column, select, update
+
+from models.activo import Activo
+from models.search import consulta_fts, subconsulta_busqueda
+from models.sync import activos_eliminados
+from routers.activos import (
+    CAMPOS_ORDEN, FACETAS, aplicar_filtros, aplicar_orden, tramos_despues_de,
+)
+
+tabla = Activo.__table__
+CONSULTAS: Dict[str, Callable] = {}
+# Consultas que leen a propósito un índice entero (agregados sobre todas las filas)
+RECORRIDOS_DE_INDICE: Set[str] = set()
+
+def registrar(nombre: str, recorre_indice: bool = False):
+    def decorador(funcion):
+        CONSULTAS[nombre] = funcion
+        if recorre_indice:
+            RECORRIDOS_DE_INDICE.add(nombre)
+        return funcion
+    return decorador
+
+# --- Listado y cursor ---
+
+for _campo in ("sede", "area", "estado", "categoria"):
+    registrar(f"listado filtrado por {_campo}")(
+        lambda campo=_campo: aplicar_orden(aplicar_filtros(select(Activo), {campo: "x"}), Activo.id, False).limit(100)
+    )
+
+registrar("listado por sede y area")(
+    lambda: aplicar_orden(aplicar_filtros(select(Activo), {"sede": "x", "area": "y"}), Activo.id, False).limit(100)
+)
+
+for _orden in CAMPOS_ORDEN:
+    for _descendente in (False, True):
+        for _valor in ("x", None):
+            _columna = getattr(Activo, _orden)
+            for _i, _condicion in enumerate(tramos_despues_de(_columna, _descendente, _valor, "id")):
+                def _pagina(columna=_columna, descendente=_descendente, condicion=_condicion):
+                    return aplicar_orden(select(Activo).filter(condicion), columna, descendente).limit(101)
+                registrar(
+                    f"página por {_orden} {'desc' if _descendente else 'asc'}"
+                    f" tras {'NULL' if _valor is None else 'valor'}, tramo {_i + 1}"
+                )(_pagina)
+
+# --- Búsquedas directas ---
+
+registrar("detalle por id (rutas y relay)")(lambda: select(Activo).where(Activo.id == "x"))
+registrar("por correlativo")(lambda: select(Activo).filter(Activo.correlativo == "x"))
+registrar("por código")(lambda: select(Activo).filter(Activo.codigo_activo == "x").order_by(Activo.id))
+registrar("por número de serie")(lambda: select(Activo).filter(Activo.numero_serie == "x").order_by(Activo.id))
+registrar("lote por ids")(lambda: select(Activo).filter(Activo.id.in_(["a", "b"])))
+registrar("lote por correlativos")(lambda: select(Activo).filter(Activo.correlativo.in_(["a", "b"])))
+registrar("urls para QR")(lambda: select(Activo.id, Activo.url).filter(Activo.id.in_(["a", "b"])))
+registrar("importación: ids por correlativo")(
+    lambda: select(tabla.c.correlativo, tabla.c.id).where(tabla.c.correlativo.in_(["a", "b"]))
+)
+registrar("búsqueda de texto")(lambda: _busqueda({}))
+registrar("búsqueda de texto filtrada")(lambda: _busqueda({"sede": "x"}))
+
+def _busqueda(filtros):
+    coincidencias = subconsulta_busqueda(consulta_fts("laptop dell"))
+    stmt = select(Activo).join(coincidencias, literal_column("activos.rowid") == coincidencias.c.fila)
+    return aplicar_filtros(stmt, filtros).order_by(coincidencias.c.puntaje, Activo.id).limit(51)
+
+# --- Sincronización ---
+
+registrar("cambios: activos")(
+    lambda: select(Activo).filter(and_(Activo.revision > 1, Activo.revision <= 9))
+    .order_by(Activo.revision).limit(1001)
+)
+registrar("cambios: eliminados")(
+    lambda: select(activos_eliminados).where(
+        and_(activos_eliminados.c.revision > 1, activos_eliminados.c.revision <= 9)
+    ).order_by(activos_eliminados.c.revision).limit(1001)
+)
+registrar("publicador de eventos")(
+    lambda: select(tabla.c.id, tabla.c.revision).where(and_(tabla.c.revision > 1, tabla.c.revision <= 9)).limit(1001)
+)
+
+# --- Exportación y operaciones masivas ---
+
+registrar("exportación por bloques")(lambda: select(tabla).where(tabla.c.id > "x").order_by(tabla.c.id).limit(2000))
+registrar("exportación filtrada")(
+    lambda: select(tabla).where(tabla.c.sede == "x", tabla.c.id > "y").order_by(tabla.c.id).limit(2000)
+)
+registrar("eliminación masiva por filtro")(lambda: delete(Activo).where(Activo.estado == "x").returning(Activo.id))
+registrar("edición masiva por filtro")(
+    lambda: update(Activo).where(Activo.sede == "x", Activo.area == "y").values(estado="z").returning(Activo.id)
+)
+
+# --- Facetas sobre activos (con marca; el resto sale de resumen_activos) ---
+
+registrar("faceta marca", recorre_indice=True)(lambda: select(tabla.c.marca, func.count()).group_by(tabla.c.marca))
+for _campo in ("sede", "area", "estado", "categoria"):
+    registrar(f"faceta marca filtrada por {_campo}")(
+        lambda campo=_campo: select(tabla.c.marca, func.count()).where(tabla.c[campo] == "x").group_by(tabla.c.marca)
+    )
+for _faceta in FACETAS:
+    if _faceta != "marca":
+        registrar(f"faceta {_faceta} filtrada por marca")(
+            lambda faceta=_faceta: select(tabla.c[faceta], func.count())
+            .where(tabla.c.marca == "x").group_by(tabla.c[faceta])
+        )
+
+# --- Verificación ---
+
+def plan_de(conn, stmt) -> List[str]:
+    compilada = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    parametros = tuple(compilada.params[nombre] for nombre in compilada.positiontup)
+    return [fila[3] for fila in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compilada}", parametros)]
+
+def recorridos_completos(plan: List[str], tablas, admite_indice: bool = False) -> List[str]:
+    """
+    Pasos del plan que leen una tabla entera, o un índice entero si no `admite_indice`.
+    Las subconsultas y FTS5 no cuentan.
+    """
+    recorridos = []
+    for paso in plan:
+        coincidencia = re.fullmatch(r"SCAN (\w+)( USING (?:COVERING )?INDEX \w+)?", paso)
+        if coincidencia and coincidencia.group(1) in tablas and (not admite_indice or not coincidencia.group(2)):
+            recorridos.append(paso)
+    return recorridos
+
+def verificar_planes(engine, detallado: bool = False) -> List[str]:
+    """Nombres de las consultas registradas cuyo plan hace un recorrido que no le corresponde."""
+    fallidas = []
+    with engine.connect() as conn:
+        tablas = {fila[0] for fila in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type='table'")}
+        for nombre, construir in CONSULTAS.items():
+            plan = plan_de(conn, construir())
+            recorridos = recorridos_completos(plan, tablas, nombre in RECORRIDOS_DE_INDICE)
+            if recorridos:
+                fallidas.append(nombre)
+            if recorridos or detallado:
+                print(f"{'FALLA' if recorridos else 'ok':5s} {nombre}")
+                for paso in plan:
+                    print(f"        {paso}")
+    return fallidas
+
+
+if __name__ == "__main__":
+    from models.db import get_engine, init_db
+
+    parser = argparse.ArgumentParser(description="Verifica que las consultas registradas usen índices")
+    parser.add_argument("--db", default=None, help="Base a verificar (por defecto, una temporal nueva)")
+    parser.add_argument("-v", "--detallado", action="store_true", help="Mostrar el plan de todas las consultas")
+    args = parser.parse_args()
+    init_db(args.db or os.path.join(tempfile.mkdtemp(), "planes.db"))
+    fallidas = verificar_planes(get_engine(), args.detallado)
+    print(f"{len(CONSULTAS) - len(fallidas)}/{len(CONSULTAS)} consultas usan sus índices")
+    sys.exit(1 if fallidas else 0)
@@ -0,0 +1,139 @@
+"""
+Señal de "servidor listo" para los lanzadores (Electron en main.js, qrizate_main.py).
+
+Se anuncia cuando uvicorn terminó el lifespan y ya tiene el socket escuchando, y solo si
+`comprobar_listo` (el mismo criterio que /health/ready: base abierta, esquema aplicado)
+no informa un problema:
+
+- una línea en stdout: `QRIZATE_READY {"port": 8000, "host": "0.0.0.0", "pid": 1234}`
+- opcionalmente un archivo con el mismo JSON (--ready-file), para cuando el ejecutable
+  empaquetado sin consola no tiene stdout
+- un threading.Event en EstadoServidor, para quien lanza uvicorn en un hilo
+
+Si el arranque falla (puerto ocupado, error en el lifespan, base sin esquema) el servidor
+se detiene y el estado queda terminado sin estar listo, así quien espera no tiene que
+agotar el tiempo de espera para enterarse.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Callable, Dict, Optional
+
+LINEA_LISTO = "QRIZATE_READY"
+
+
+class EstadoServidor:
+    def __init__(self):
+        self.listo = threading.Event()
+        self.terminado = threading.Event()
+        self._cambio = threading.Event()
+        self.datos: Dict = {}
+        self.error: Optional[str] = None
+
+    def marcar_listo(self, datos: Dict):
+        self.datos = datos
+        self.listo.set()
+        self._cambio.set()
+
+    def marcar_terminado(self, error: Optional[str] = None):
+        if error and not self.listo.is_set():
+            self.error = error
+        self.terminado.set()
+        self._cambio.set()
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que el servidor esté listo o haya terminado; True si quedó listo."""
+        self._cambio.wait(timeout)
+        return self.listo.is_set()
+
+
+def puerto_enlazado(servidor) -> Optional[int]:
+    """Puerto real del socket (con --port 0 lo elige el sistema)."""
+    for server in getattr(servidor, "servers", None) or []:
+        for sock in server.sockets or []:
+            return sock.getsockname()[1]
+    return None
+
+
+def escribir_archivo_listo(ruta: str, datos: Dict):
+    # Escritura atómica: el lanzador nunca lee un JSON a medias
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo)
+    os.replace(temporal, ruta)
+
+
+def borrar_archivo_listo(ruta: Optional[str]):
+    if ruta:
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"No se pudo borrar el archivo de servidor listo: {e}")
+
+
+def anunciar_listo(datos: Dict, archivo_listo: Optional[str] = None):
+    # Primero el archivo: quien ve la línea puede contar con que el archivo ya existe
+    if archivo_listo:
+        try:
+            escribir_archivo_listo(archivo_listo, datos)
+        except OSError as e:
+            logging.error(f"No se pudo escribir el archivo de servidor listo: {e}")
+    # Sin consola (PyInstaller con console=False) sys.stdout es None
+    if sys.stdout is not None:
+        try:
+            sys.stdout.write(f"{LINEA_LISTO} {json.dumps(datos)}\n")
+            sys.stdout.flush()
+        except (OSError, ValueError):
+            pass
+    logging.info(f"Servidor listo en el puerto {datos['port']}")
+
+
+def ejecutar_uvicorn(app, host: str, port: int, estado: Optional[EstadoServidor] = None,
+                     archivo_listo: Optional[str] = None,
+                     comprobar_listo: Optional[Callable[[], Optional[str]]] = None, **opciones):
+    """
+    Como uvicorn.run, pero anuncia cuándo el servidor está listo de verdad.
+    `comprobar_listo` devuelve None si se puede atender, o el motivo por el que no; en ese
+    caso no se anuncia y el servidor se detiene.
+    """
+    import uvicorn
+
+    estado = estado or EstadoServidor()
+    motivo = None
+    # Un archivo de una ejecución anterior haría creer al lanzador que ya arrancó
+    borrar_archivo_listo(archivo_listo)
+
+    class ServidorConAviso(uvicorn.Server):
+        async def startup(self, sockets=None):
+            nonlocal motivo
+            await super().startup(sockets=sockets)
+            if not self.started:
+                return
+            motivo = comprobar_listo() if comprobar_listo else None
+            if motivo:
+                logging.error(f"El servidor arrancó pero no puede atender: {motivo}")
+                self.should_exit = True
+                return
+            datos = {"port": puerto_enlazado(self) or port, "host": host, "pid": os.getpid()}
+            estado.marcar_listo(datos)
+            anunciar_listo(datos, archivo_listo)
+
+    servidor = ServidorConAviso(uvicorn.Config(app, host=host, port=port, **opciones))
+    error = None
+    try:
+        servidor.run()
+    except BaseException as e:
+        # uvicorn sale con sys.exit(1) si no puede abrir el puerto (el motivo ya quedó en su log)
+        error = f"uvicorn terminó con código {e.code}" if isinstance(e, SystemExit) else repr(e)
+        raise
+    finally:
+        if error is None and not estado.listo.is_set():
+            error = motivo or "El servidor terminó sin llegar a estar listo"
+        estado.marcar_terminado(error)
+        borrar_archivo_listo(archivo_listo)
+    return estado
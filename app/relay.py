@@ -0,0 +1,304 @@
+"""
+Cliente WebSocket hacia el VPS.
+El VPS reenvía las consultas de los QR escaneados a la sede; cada solicitud se atiende en
+su propia tarea y la lectura de SQLite es async (aiosqlite) o corre en un pool de hilos
+acotado, de modo que una consulta lenta no detiene al resto ni al event loop que comparte
+la API.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from change_events import leer_eventos, leer_revision_actual
+from models.activo import Activo
+from metrics import (
+    relay_conectado, relay_consultas, relay_en_curso, relay_errores, relay_mensajes_enviados,
+    relay_mensajes_recibidos, relay_reconexiones,
+)
+from models.db import get_async_sessionmaker, get_db
+from page_cache import cache_paginas
+
+# Solicitudes atendiéndose a la vez; al llegar al límite se deja de leer del socket
+MAX_SOLICITUDES_EN_CURSO = 32
+MAX_HILOS_DB = 4
+# Cada cuánto se comparan las revisiones de las páginas en caché con las de SQLite
+INTERVALO_VERIFICACION_CACHE = 1.0
+
+executor_db = ThreadPoolExecutor(max_workers=MAX_HILOS_DB, thread_name_prefix="relay-db")
+
+# Estado de la conexión con el VPS, para /health/ready
+estado_conexion = {"estado": "sin_configurar", "sede": None, "desde": None, "ultimo_error": None}
+
+def _cambiar_estado(estado: str, sede=None, error=None):
+    estado_conexion.update(estado=estado, sede=sede, desde=time.time())
+    if error is not None:
+        estado_conexion["ultimo_error"] = error
+
+def estado_relay() -> Dict:
+    return {**estado_conexion, "conectado": estado_conexion["estado"] == "conectado"}
+
+class ConsultasCompartidas:
+    """
+    Single-flight: las solicitudes concurrentes con la misma clave esperan una única
+    ejecución en curso y reciben el mismo resultado. Solo se usa desde el event loop.
+    """
+    MAX_CLAVES_CON_ESTADISTICAS = 256
+
+    def __init__(self):
+        self._en_vuelo: Dict[str, asyncio.Future] = {}
+        self._por_clave: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self.ejecutadas = 0
+        self.compartidas = 0
+
+    async def ejecutar(self, clave: str, funcion: Callable[[], Awaitable]):
+        futuro = self._en_vuelo.get(clave)
+        if futuro is None:
+            futuro = asyncio.ensure_future(funcion())
+            self._en_vuelo[clave] = futuro
+            futuro.add_done_callback(lambda f, clave=clave: self._terminar(clave, f))
+            self._registrar(clave, "ejecutadas")
+        else:
+            self._registrar(clave, "compartidas")
+        # shield: si una de las solicitudes se cancela, las demás siguen esperando el resultado
+        return await asyncio.shield(futuro)
+
+    def _terminar(self, clave: str, futuro: asyncio.Future):
+        if self._en_vuelo.get(clave) is futuro:
+            del self._en_vuelo[clave]
+        if not futuro.cancelled():
+            futuro.exception()  # evita el aviso de excepción no recuperada si nadie la esperó
+
+    def _registrar(self, clave: str, tipo: str):
+        setattr(self, tipo, getattr(self, tipo) + 1)
+        contadores = self._por_clave.pop(clave, None) or {"ejecutadas": 0, "compartidas": 0}
+        contadores[tipo] += 1
+        self._por_clave[clave] = contadores
+        if len(self._por_clave) > self.MAX_CLAVES_CON_ESTADISTICAS:
+            self._por_clave.popitem(last=False)
+
+    def estadisticas(self, top: int = 20) -> Dict:
+        mas_compartidas = sorted(self._por_clave.items(), key=lambda item: item[1]["compartidas"], reverse=True)
+        total = self.ejecutadas + self.compartidas
+        return {
+            "en_vuelo": len(self._en_vuelo),
+            "ejecutadas": self.ejecutadas,
+            "compartidas": self.compartidas,
+            "ahorro": round(self.compartidas / total, 3) if total else 0.0,
+            "por_clave": [
+                {"asset_id": clave, **contadores}
+                for clave, contadores in mas_compartidas[:top] if contadores["compartidas"]
+            ],
+        }
+
+consultas_en_vuelo = ConsultasCompartidas()
+
+def renderizar_html_activo(activo: Activo) -> str:
+    html = f"""
+    <html>
+    <head>
+        <title>Detalle del Activo</title>
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <style>
+            body {{ font-family: 'Segoe UI', Arial, sans-serif; background: #f8fafc; margin: 0; padding: 0; }}
+            .container {{ max-width: 520px; margin: 40px auto; background: #fff; border-radius: 18px; box-shadow: 0 4px 24px #003cb322; padding: 32px 28px; }}
+            h2 {{ color: #003cb3; margin-bottom: 24px; font-size: 2rem; text-align: center; letter-spacing: 1px; }}
+            table {{ border-collapse: collapse; width: 100%; background: #f8fafc; border-radius: 12px; overflow: hidden; box-shadow: 0 2px 8px #003cb312; }}
+            th, td {{ padding: 12px 14px; text-align: left; font-size: 1rem; }}
+            th {{ background-color: #e5eef4; color: #003cb3; font-weight: 600; width: 38%; border-bottom: 1.5px solid #dbe2ea; }}
+            td {{ background: #fff; color: #222; border-bottom: 1px solid #f0f4f8; }}
+            tr:last-child th, tr:last-child td {{ border-bottom: none; }}
+            @media (max-width: 600px) {{
+                .container {{ padding: 16px 4px; }}
+                h2 {{ font-size: 1.3rem; }}
+                th, td {{ padding: 8px 6px; font-size: 0.95rem; }}
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h2>Detalle del Activo</h2>
+            <table>
+                <tr><th>ID</th><td>{activo.id}</td></tr>
+                <tr><th>Correlativo</th><td>{activo.correlativo}</td></tr>
+                <tr><th>Área</th><td>{activo.area}</td></tr>
+                <tr><th>Sede</th><td>{activo.sede}</td></tr>
+                <tr><th>Código Activo</th><td>{activo.codigo_activo}</td></tr>
+                <tr><th>Categoría</th><td>{activo.categoria}</td></tr>
+                <tr><th>Nombre Central de Costos</th><td>{getattr(activo, 'nombre_central_costos', '')}</td></tr>
+                <tr><th>Cuenta Contable</th><td>{activo.cuenta_contable}</td></tr>
+                <tr><th>Estado</th><td>{activo.estado}</td></tr>
+                <tr><th>Descripción</th><td>{activo.descripcion}</td></tr>
+                <tr><th>Marca</th><td>{activo.marca}</td></tr>
+                <tr><th>Modelo</th><td>{activo.modelo}</td></tr>
+                <tr><th>Número Serie</th><td>{activo.numero_serie}</td></tr>
+                <tr><th>Número Central Costo</th><td>{getattr(activo, 'numero_central_costo', '')}</td></tr>
+            </table>
+        </div>
+    </body>
+    </html>
+    """
+    return html
+
+def get_asset_html_from_db(asset_id: str) -> str:
+    version = cache_paginas.reservar(asset_id)
+    db_session: Session = next(get_db())
+    try:
+        activo = db_session.query(Activo).filter(Activo.id == asset_id).first()
+        if not activo:
+            return "<h2>Activo no encontrado</h2>"
+        html = renderizar_html_activo(activo)
+        cache_paginas.guardar(asset_id, version, activo.revision, html)
+        return html
+    finally:
+        # Sin esto, cada id inexistente que llega del VPS dejaría su reserva para siempre
+        cache_paginas.cancelar(asset_id, version)
+        db_session.close()
+
+async def get_asset_html_async(asset_id: str) -> str:
+    """Igual que get_asset_html_from_db con AsyncSession; sin engine async usa el pool de hilos."""
+    sesiones = get_async_sessionmaker()
+    if sesiones is None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor_db, get_asset_html_from_db, asset_id)
+    version = cache_paginas.reservar(asset_id)
+    try:
+        async with sesiones() as db_session:
+            activo = await db_session.get(Activo, asset_id)
+        if not activo:
+            return "<h2>Activo no encontrado</h2>"
+        html = renderizar_html_activo(activo)
+        cache_paginas.guardar(asset_id, version, activo.revision, html)
+        return html
+    finally:
+        cache_paginas.cancelar(asset_id, version)
+
+def verificar_revisiones_cache():
+    """Descarta de cache_paginas las filas modificadas desde la última verificación."""
+    desde = cache_paginas.revision_verificada
+    if desde is None:
+        # Primera vez: no se sabe con qué revisiones se guardó lo que haya
+        cache_paginas.invalidar_todo()
+        cache_paginas.aplicar_revisiones(leer_revision_actual(), {})
+        return
+    hasta, eventos = leer_eventos(desde)
+    if eventos and eventos[0]["op"] == "resync":
+        cache_paginas.invalidar_todo()
+        eventos = []
+    cache_paginas.aplicar_revisiones(hasta, {evento["id"]: evento["revision"] for evento in eventos})
+
+_verificacion: Optional[asyncio.Future] = None
+_proxima_verificacion = 0.0
+
+async def verificar_cache_si_corresponde():
+    """
+    Como mucho una verificación por INTERVALO_VERIFICACION_CACHE; las solicitudes que llegan
+    mientras corre la esperan, para no servir una página que ya se sabe obsoleta.
+    """
+    global _verificacion, _proxima_verificacion
+    if _verificacion is None:
+        ahora = time.monotonic()
+        if ahora < _proxima_verificacion:
+            return
+        _proxima_verificacion = ahora + INTERVALO_VERIFICACION_CACHE
+        loop = asyncio.get_running_loop()
+        _verificacion = loop.run_in_executor(executor_db, verificar_revisiones_cache)
+        _verificacion.add_done_callback(_terminar_verificacion)
+    await asyncio.shield(_verificacion)
+
+def _terminar_verificacion(futuro: asyncio.Future):
+    global _verificacion
+    _verificacion = None
+    if not futuro.cancelled() and futuro.exception() is not None:
+        logging.error(f"Error al verificar las revisiones de la caché de páginas: {futuro.exception()}")
+
+async def atender_solicitud(websocket, data: dict, lock_envio: asyncio.Lock, semaforo: asyncio.Semaphore):
+    relay_en_curso.inc()
+    try:
+        asset_id = data.get("asset_id")
+        inicio = time.perf_counter()
+        try:
+            await verificar_cache_si_corresponde()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # ya quedó registrado; la caché sigue protegida por las invalidaciones
+        asset_html = cache_paginas.obtener(asset_id)
+        if asset_html is None:
+            asset_html = await consultas_en_vuelo.ejecutar(asset_id, lambda: get_asset_html_async(asset_id))
+            relay_consultas.observar(time.perf_counter() - inicio, "fallo")
+        else:
+            relay_consultas.observar(time.perf_counter() - inicio, "acierto")
+        response = {
+            "request_id": data.get("request_id"),
+            "data": {"html": asset_html}
+        }
+        # Las respuestas salen en el orden en que terminan; el VPS las correlaciona por request_id
+        async with lock_envio:
+            await websocket.send(json.dumps(response))
+        relay_mensajes_enviados.inc()
+        logging.info(f"-> Respuesta enviada al VPS (request_id={data.get('request_id')}, asset_id={asset_id})")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        relay_errores.inc()
+        logging.error(f"Error procesando solicitud {data.get('request_id')}: {e}")
+    finally:
+        relay_en_curso.dec()
+        semaforo.release()
+
+async def connect_to_vps_and_listen(sede_id, vps_url):
+    import websockets  # solo hace falta con una sede configurada; no retrasa el arranque
+    uri = f"{vps_url}{sede_id}"
+    _cambiar_estado("conectando", sede_id)
+    try:
+        while True:
+            try:
+                async with websockets.connect(uri) as websocket:
+                    logging.info(f" Conectado al VPS como sede '{sede_id}'")
+                    relay_conectado.inc()
+                    _cambiar_estado("conectado", sede_id)
+                    semaforo = asyncio.Semaphore(MAX_SOLICITUDES_EN_CURSO)
+                    lock_envio = asyncio.Lock()
+                    tareas = set()
+                    try:
+                        async for message in websocket:
+                            logging.info(f"<- Mensaje recibido del VPS: {message}")
+                            relay_mensajes_recibidos.inc()
+                            try:
+                                data = json.loads(message)
+                                if not isinstance(data, dict):
+                                    raise ValueError(f"se esperaba un objeto JSON, llegó {type(data).__name__}")
+                            except Exception as e:
+                                # Un mensaje inválido se descarta sin cortar la conexión
+                                relay_errores.inc()
+                                logging.error(f"Error procesando mensaje: {e}")
+                                continue
+                            if data.get("action") == "get_asset":
+                                # Contrapresión: con el cupo lleno no se leen más mensajes
+                                await semaforo.acquire()
+                                tarea = asyncio.create_task(atender_solicitud(websocket, data, lock_envio, semaforo))
+                                tareas.add(tarea)
+                                tarea.add_done_callback(tareas.discard)
+                    finally:
+                        relay_conectado.dec()
+                        _cambiar_estado("reconectando", sede_id)
+                        for tarea in tareas:
+                            tarea.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _cambiar_estado("reconectando", sede_id, str(e))
+                logging.error(f" Desconectado del VPS. Error: {e}. Reintentando en 5 segundos...")
+                await asyncio.sleep(5)
+                relay_reconexiones.inc()
+    except asyncio.CancelledError:
+        # También si se cancela durante la espera entre reintentos
+        _cambiar_estado("detenido", sede_id)
+        raise
@@ -0,0 +1,66 @@
+"""
+Caché de resultados de consultas agregadas (facetas) con vencimiento corto.
+Cualquier escritura la vacía por completo; un resultado calculado antes de una
+invalidación no se guarda, igual que en la caché de páginas.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+CAPACIDAD_CACHE_RESULTADOS = 256
+TTL_CACHE_RESULTADOS = 30  # segundos
+
+
+class CacheResultados:
+    def __init__(self, capacidad: int = CAPACIDAD_CACHE_RESULTADOS, ttl: float = TTL_CACHE_RESULTADOS):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()  # clave -> (vence, valor)
+        self._generacion = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[0] < time.monotonic():
+                self._entradas.pop(clave, None)
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def generacion(self) -> int:
+        """Token a tomar antes de calcular un resultado y pasar a guardar()."""
+        with self._lock:
+            return self._generacion
+
+    def guardar(self, clave: Hashable, generacion: int, valor: Any):
+        with self._lock:
+            if generacion != self._generacion:
+                return
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def invalidar_todo(self):
+        with self._lock:
+            self._generacion += 1
+            self._entradas.clear()
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "ttl": self.ttl,
+            }
+
+
+cache_facetas = CacheResultados()
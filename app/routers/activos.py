@@ -1,13 +1,18 @@
-from fastapi.responses import HTMLResponse 
-
-import qrcode
 import base64
-from io import BytesIO
-from typing import List, Optional, Dict, Set
+import csv
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import uuid
+import zipfile
+import zlib
+from io import BytesIO, StringIO
+from typing import Any, List, Optional, Dict, Set
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import HTMLResponse
-import socket
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 
 # --- API Router ---
 
@@ -18,12 +23,25 @@ router = APIRouter(
 
 
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, func, literal_column, or_, select, update
 
 from models.activo import Activo
-from models.db import get_db
+from models.bulk import (
+    COLUMNAS_ACTIVO, buscar_ids_por, buscar_repetidos, completar_datos_activo, en_lotes, upsert_activos,
+)
+from models.db import get_async_db, get_db, get_engine
+from models.search import consulta_fts, subconsulta_busqueda
+from models.stats import DIMENSIONES_RESUMEN, reconstruir_resumen, resumen_activos, verificar_resumen
+from models.sync import activos_eliminados, revision_activos
+from change_events import canal_cambios
+from invalidation import invalidar_activos, invalidar_todos_los_activos
+from result_cache import cache_facetas
+from label_pdf import TAMANOS_PAGINA_MM, calcular_grilla, generar_pdf_etiquetas
+from qr_render import FORMATOS_QR, NIVELES_CORRECCION, calcular_matrices, generar_qr_lote
 
 # --- Schemas (Modelos Pydantic) ---
 # Adaptados a tu nuevo modelo de Activo
@@ -69,30 +87,122 @@ class ActivoUpdate(BaseModel):
     url: Optional[str] = None
 
 class ActivoResponse(ActivoBase):
+    revision: Optional[int] = None
+
     class Config:
         from_attributes = True
 
-class ActivoSearch(BaseModel):
-    # Schema para la búsqueda avanzada
-    id: Optional[str] = None
-    categoria: Optional[str] = None
-    estado: Optional[str] = None
-    descripcion: Optional[str] = None
-    marca: Optional[str] = None
-    modelo: Optional[str] = None
-    numero_serie: Optional[str] = None
-    codigo_activo: Optional[str] = None
-    sede: Optional[str] = None
-    responsable: Optional[str] = None
-
 class StatsResponse(BaseModel):
     total_activos: int
     activos_por_estado: Dict[str, int]
 
+class StatsSummaryResponse(BaseModel):
+    agrupado_por: List[str]
+    total: int
+    grupos: List[Dict[str, Any]]   # {dimensión: valor (None = sin valor), ..., "total": n}
+
+class ValorFaceta(BaseModel):
+    valor: Optional[str] = None   # None = sin valor
+    total: int
+
+class FacetsResponse(BaseModel):
+    total: int
+    facetas: Dict[str, List[ValorFaceta]]
+
+class StatsCheckResponse(BaseModel):
+    consistente: bool
+    diferencias: List[Dict[str, Any]]
+    reparado: bool
+
+class ActivoEliminado(BaseModel):
+    id: str
+    revision: int
+
+class ChangesResponse(BaseModel):
+    items: List[ActivoResponse]          # activos creados o modificados
+    eliminados: List[ActivoEliminado]
+    revision: int                        # valor de `since` para la siguiente consulta
+    hay_mas: bool
+
+class FiltrosActivos(BaseModel):
+    sede: Optional[str] = None
+    area: Optional[str] = None
+    estado: Optional[str] = None
+    categoria: Optional[str] = None
+
+class BulkDeleteRequest(BaseModel):
+    ids: Optional[List[str]] = None
+    filtros: FiltrosActivos = FiltrosActivos()
+    devolver_ids: bool = False  # por defecto solo el recuento: un lote grande no vuelve entero
+
+class BulkPatchRequest(BulkDeleteRequest):
+    cambios: ActivoUpdate
+
+class BulkResultResponse(BaseModel):
+    afectados: int
+    ids: Optional[List[str]] = None
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = []
+    correlativos: List[str] = []
+
+class BatchGetResponse(BaseModel):
+    items: List[ActivoResponse]           # en el orden pedido: primero ids, luego correlativos
+    no_encontrados: List[str]
+
+class ActivoSearchPage(BaseModel):
+    items: List[ActivoResponse]
+    next_skip: Optional[int] = None
+
+LISTA_ACTIVOS = TypeAdapter(List[ActivoResponse])
+PAGINA_BUSQUEDA = TypeAdapter(ActivoSearchPage)
+CAMBIOS_ACTIVOS = TypeAdapter(ChangesResponse)
+LOTE_ACTIVOS = TypeAdapter(BatchGetResponse)
+
+async def respuesta_json(adaptador: TypeAdapter, datos) -> Response:
+    """
+    Valida y serializa en el threadpool: en las rutas async un listado grande ocuparía
+    el event loop que comparten la API y el relay con el VPS.
+    """
+    contenido = await run_in_threadpool(
+        lambda: adaptador.dump_json(adaptador.validate_python(datos, from_attributes=True))
+    )
+    return Response(content=contenido, media_type="application/json")
+
+class QRBatchRequest(BaseModel):
+    ids: List[str]
+    formato: str = "png"      # png | svg
+    tamano: int = 256         # lado en píxeles
+    ecc: str = "M"            # L | M | Q | H
+    salida: str = "zip"       # zip | multipart
+
+class LabelSheetRequest(BaseModel):
+    ids: Optional[List[str]] = None   # sin ids se usan los filtros de la consulta
+    pagina: str = "A4"                # A4 | Letter
+    ancho_pagina_mm: Optional[float] = None
+    alto_pagina_mm: Optional[float] = None
+    filas: int = 8
+    columnas: int = 3
+    margen_mm: float = 10
+    espacio_mm: float = 2
+    ancho_etiqueta_mm: Optional[float] = None
+    alto_etiqueta_mm: Optional[float] = None
+    campos: List[str] = ["codigo_activo", "descripcion", "sede"]
+    tamano_fuente: float = 7
+    ecc: str = "M"
+
+class BulkUpsertResponse(BaseModel):
+    total: int
+    creados: int
+    actualizados: int
+    sin_cambios: int
+    ids: Dict[str, List[str]]
+
 # --- API Router ---
 
 # --- Funciones Auxiliares ---
 def generar_qr_base64(texto: str):
+    import qrcode  # con PIL: solo al generar un QR, no al importar el router
     qr = qrcode.QRCode(version=1, box_size=10, border=2)
     qr.add_data(texto)
     qr.make(fit=True)
@@ -102,6 +212,186 @@ def generar_qr_base64(texto: str):
     img_str = base64.b64encode(buffered.getvalue()).decode()
     return f"data:image/png;base64,{img_str}"
 
+# --- Filtros, orden y cursor del listado ---
+
+CAMPOS_ORDEN = ("id", "correlativo", "sede", "area", "estado", "categoria", "descripcion")
+
+def filtros_activos(
+    sede: Optional[str] = None,
+    area: Optional[str] = None,
+    estado: Optional[str] = None,
+    categoria: Optional[str] = None,
+) -> Dict[str, str]:
+    """Filtros exactos comunes a los endpoints de listado (solo los que vienen informados)."""
+    filtros = {"sede": sede, "area": area, "estado": estado, "categoria": categoria}
+    return {campo: valor for campo, valor in filtros.items() if valor is not None}
+
+def aplicar_filtros(query, filtros: Dict[str, str]):
+    for campo, valor in filtros.items():
+        query = query.filter(getattr(Activo, campo) == valor)
+    return query
+
+def validar_orden(orden: str, direccion: str):
+    if orden not in CAMPOS_ORDEN:
+        raise HTTPException(status_code=400, detail=f"Campo de orden no permitido: {orden}")
+    if direccion not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="La dirección debe ser 'asc' o 'desc'")
+    return getattr(Activo, orden), direccion == "desc"
+
+def aplicar_orden(query, columna, descendente: bool):
+    if columna is Activo.id:
+        return query.order_by(Activo.id.desc() if descendente else Activo.id.asc())
+    if descendente:
+        return query.order_by(columna.desc(), Activo.id.desc())
+    return query.order_by(columna.asc(), Activo.id.asc())
+
+def codificar_cursor(orden: str, direccion: str, valor, activo_id: str) -> str:
+    crudo = json.dumps({"o": orden, "d": direccion, "v": valor, "id": activo_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str, orden: str, direccion: str):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valor, activo_id = datos["v"], datos["id"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if datos.get("o") != orden or datos.get("d") != direccion:
+        raise HTTPException(status_code=400, detail="El cursor no corresponde al orden solicitado")
+    return valor, activo_id
+
+def tramos_despues_de(columna, descendente: bool, valor, activo_id: str) -> List:
+    """
+    Condiciones keyset para las filas posteriores a (valor, activo_id) en el orden dado,
+    como tramos consecutivos de ese orden: se leen en secuencia hasta completar la página.
+    SQLite ordena los NULL primero en ASC y al final en DESC; juntar el tramo de los NULL
+    con un OR obliga a recorrer el índice desde el principio, así que cada tramo es un único
+    recorrido por rango. El término redundante `columna >= valor` permite posicionarse
+    directamente en el índice.
+    """
+    if columna is Activo.id:
+        return [Activo.id < activo_id if descendente else Activo.id > activo_id]
+    if not descendente:
+        if valor is None:
+            return [and_(columna.is_(None), Activo.id > activo_id), columna.isnot(None)]
+        return [and_(columna >= valor, or_(columna > valor, Activo.id > activo_id))]
+    if valor is None:
+        return [and_(columna.is_(None), Activo.id < activo_id)]
+    return [and_(columna <= valor, or_(columna < valor, Activo.id < activo_id)), columna.is_(None)]
+
+# --- Exportación en streaming ---
+
+TAMANO_BLOQUE_EXPORT = 2000
+COLUMNAS_EXPORT = [columna.name for columna in Activo.__table__.columns]
+
+def leer_activos_en_bloques(filtros: Dict[str, str], tamano: int = TAMANO_BLOQUE_EXPORT):
+    """
+    Recorre la tabla con SQLAlchemy Core en bloques por id (keyset). Cada bloque es una
+    consulta corta, así que no se mantiene una transacción de lectura abierta durante
+    toda la descarga ni se materializa la tabla completa en memoria.
+    """
+    tabla = Activo.__table__
+    base = select(*[tabla.c[nombre] for nombre in COLUMNAS_EXPORT])
+    for campo, valor in filtros.items():
+        base = base.where(tabla.c[campo] == valor)
+    ultimo_id = None
+    while True:
+        stmt = base.order_by(tabla.c.id).limit(tamano)
+        if ultimo_id is not None:
+            stmt = stmt.where(tabla.c.id > ultimo_id)
+        with get_engine().connect() as conn:
+            filas = conn.execute(stmt).fetchall()
+        if not filas:
+            return
+        yield filas
+        if len(filas) < tamano:
+            return
+        ultimo_id = filas[-1].id
+
+def leer_activos_por_ids(ids: List[str], tamano: int = TAMANO_BLOQUE_EXPORT):
+    """Como leer_activos_en_bloques, pero para una lista de ids y respetando su orden."""
+    tabla = Activo.__table__
+    columnas = [tabla.c[nombre] for nombre in COLUMNAS_EXPORT]
+    for lote in en_lotes(ids, tamano):
+        with get_engine().connect() as conn:
+            filas = {fila.id: fila for fila in conn.execute(select(*columnas).where(tabla.c.id.in_(lote)))}
+        yield [filas[activo_id] for activo_id in lote if activo_id in filas]
+
+def generar_ndjson(bloques):
+    for filas in bloques:
+        yield "".join(json.dumps(dict(fila._mapping), ensure_ascii=False) + "\n" for fila in filas).encode("utf-8")
+
+def generar_csv(bloques):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    # BOM para que Excel reconozca UTF-8 (tildes y ñ)
+    buffer.write("\ufeff")
+    writer.writerow(COLUMNAS_EXPORT)
+    for filas in bloques:
+        writer.writerows(filas)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def comprimir_gzip(partes):
+    # Se vacía el compresor en cada bloque para que el cliente reciba datos de inmediato
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for parte in partes:
+        salida = compresor.compress(parte) + compresor.flush(zlib.Z_SYNC_FLUSH)
+        if salida:
+            yield salida
+    yield compresor.flush()
+
+MAX_QR_POR_LOTE = 20000
+
+def nombre_archivo_seguro(activo_id: str) -> str:
+    """Nombre de archivo para el QR de un activo, distinto para cada id."""
+    nombre = re.sub(r"[^\w.-]", "_", activo_id)
+    if nombre != activo_id:
+        # 'A/1' y 'A_1' quedarían con el mismo nombre dentro del zip
+        nombre = f"{nombre}~{hashlib.blake2b(activo_id.encode('utf-8'), digest_size=4).hexdigest()}"
+    return nombre
+
+class _SalidaEnBloques:
+    """Destino de escritura no posicionable para zipfile; acumula lo escrito hasta que se retira."""
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def retirar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes = []
+        return datos
+
+def empaquetar_zip(resultados, formato: str):
+    # Sin compresión: PNG ya viene comprimido y así cada archivo sale apenas se genera
+    salida = _SalidaEnBloques()
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_STORED) as archivo_zip:
+        for activo_id, imagen in resultados:
+            archivo_zip.writestr(f"{nombre_archivo_seguro(activo_id)}.{formato}", imagen)
+            yield salida.retirar()
+    yield salida.retirar()
+
+def empaquetar_multipart(resultados, formato: str, separador: str):
+    for activo_id, imagen in resultados:
+        encabezado = (
+            f"--{separador}\r\n"
+            f"Content-Type: {FORMATOS_QR[formato]}\r\n"
+            f'Content-Disposition: attachment; filename="{nombre_archivo_seguro(activo_id)}.{formato}"\r\n'
+            f"X-Activo-Id: {activo_id}\r\n"
+            f"Content-Length: {len(imagen)}\r\n\r\n"
+        )
+        yield encabezado.encode("utf-8") + imagen + b"\r\n"
+    yield f"--{separador}--\r\n".encode("ascii")
+
 # --- Endpoints CRUD ---
 
 
@@ -133,19 +423,390 @@ def crear_activo(activo: ActivoCreate, request: Request, db: Session = Depends(g
     db_activo = Activo(**data)
     db.add(db_activo)
     db.commit()
+    invalidar_activos([db_activo.id])
     db.refresh(db_activo)
     return ActivoResponse.model_validate(db_activo)
 
 @router.get("/", response_model=List[ActivoResponse])
-def obtener_todos_los_activos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    print(f"DEBUG: Buscando activos con skip={skip}, limit={limit}")
-    activos = db.query(Activo).offset(skip).limit(limit).all()
-    print(f"DEBUG: Encontrados {len(activos)} activos")
-    return activos
+async def obtener_todos_los_activos(
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1),
+    orden: str = "id",
+    direccion: str = "asc",
+    filtros: Dict[str, str] = Depends(filtros_activos),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Listado paginado por cursor (keyset): si quedan filas, la respuesta trae la cabecera
+    X-Next-Cursor y la página siguiente se pide con `cursor`. Cada página continúa después
+    de la última fila de la anterior, así que las inserciones concurrentes no desplazan ni
+    repiten filas. `skip` se mantiene para los clientes anteriores y no se combina con `cursor`.
+    """
+    logging.debug(f"Listado de activos: skip={skip}, limit={limit}, cursor={cursor is not None}, filtros={sorted(filtros)}")
+    columna, descendente = validar_orden(orden, direccion)
+    stmt = aplicar_filtros(select(Activo), filtros)
+    if cursor:
+        if skip:
+            raise HTTPException(status_code=400, detail="No se puede combinar 'cursor' con 'skip'")
+        valor, activo_id = decodificar_cursor(cursor, orden, direccion)
+        activos = []
+        for condicion in tramos_despues_de(columna, descendente, valor, activo_id):
+            tramo = aplicar_orden(stmt.filter(condicion), columna, descendente).limit(limit + 1 - len(activos))
+            activos += (await db.execute(tramo)).scalars().all()
+            if len(activos) > limit:
+                break
+    else:
+        stmt = aplicar_orden(stmt, columna, descendente).offset(skip).limit(limit + 1)
+        activos = (await db.execute(stmt)).scalars().all()
+    logging.debug(f"Listado de activos: {len(activos)} resultados")
+
+    next_cursor = None
+    if len(activos) > limit:
+        activos = activos[:limit]
+        ultimo = activos[-1]
+        next_cursor = codificar_cursor(orden, direccion, getattr(ultimo, orden), ultimo.id)
+    respuesta = await respuesta_json(LISTA_ACTIVOS, activos)
+    if next_cursor:
+        respuesta.headers["X-Next-Cursor"] = next_cursor
+    return respuesta
+
+ESPERA_LATIDO = 15  # segundos sin cambios antes de enviar un latido
+
+@router.get("/events")
+async def eventos_de_cambios(request: Request):
+    """
+    Server-Sent Events con los cambios de activos: eventos "cambios" con una lista de
+    {id, op: upsert|delete, revision}, o {op: "resync", revision} cuando hubo demasiados
+    cambios juntos; en ese caso el cliente debe consultar /activos/changes.
+    """
+    suscriptor = await run_in_threadpool(canal_cambios.suscribir, asyncio.get_running_loop())
+
+    async def flujo():
+        try:
+            yield f"event: listo\ndata: {json.dumps({'revision': canal_cambios.ultima_revision or 0})}\n\n"
+            while not await request.is_disconnected():
+                eventos = await suscriptor.siguiente(ESPERA_LATIDO)
+                if eventos is None:
+                    yield ": latido\n\n"
+                    continue
+                yield f"id: {eventos[-1]['revision']}\nevent: cambios\ndata: {json.dumps(eventos)}\n\n"
+        finally:
+            canal_cambios.desuscribir(suscriptor)
+
+    return StreamingResponse(flujo(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.websocket("/events/ws")
+async def eventos_de_cambios_ws(websocket: WebSocket):
+    """Los mismos eventos que /activos/events, como mensajes JSON por WebSocket."""
+    await websocket.accept()
+    suscriptor = await run_in_threadpool(canal_cambios.suscribir, asyncio.get_running_loop())
+    # El cliente no envía nada; leer del socket solo sirve para enterarse de que se cerró
+    cierre = asyncio.ensure_future(websocket.receive())
+    try:
+        await websocket.send_json({"tipo": "listo", "revision": canal_cambios.ultima_revision or 0})
+        while True:
+            siguiente = asyncio.ensure_future(suscriptor.siguiente(ESPERA_LATIDO))
+            await asyncio.wait({siguiente, cierre}, return_when=asyncio.FIRST_COMPLETED)
+            if cierre.done():
+                siguiente.cancel()
+                break
+            eventos = siguiente.result()
+            await websocket.send_json({"tipo": "latido"} if eventos is None else {"tipo": "cambios", "eventos": eventos})
+    except (WebSocketDisconnect, RuntimeError, OSError):
+        pass
+    finally:
+        cierre.cancel()
+        canal_cambios.desuscribir(suscriptor)
+
+@router.get("/changes", response_model=ChangesResponse)
+async def obtener_cambios(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cambios posteriores a la revisión `since`, en orden de revisión. El cliente aplica
+    `items` y `eliminados` sobre su copia local y guarda `revision` para la próxima consulta;
+    con `hay_mas` debe repetir la consulta desde esa revisión. since=0 descarga todo.
+    """
+    # Primero se fija el tope: lo que se confirme después queda con una revisión mayor
+    # y llega en la siguiente consulta, aunque las dos lecturas no compartan transacción
+    hasta = await db.scalar(select(revision_activos.c.valor).where(revision_activos.c.id == 1)) or 0
+    if since > hasta:
+        raise HTTPException(status_code=410, detail="Revisión desconocida para esta base de datos; sincronice desde since=0")
+
+    rango = lambda columna: and_(columna > since, columna <= hasta)
+    activos = (await db.execute(
+        select(Activo).filter(rango(Activo.revision)).order_by(Activo.revision).limit(limit + 1)
+    )).scalars().all()
+    eliminados = (await db.execute(
+        select(activos_eliminados).where(rango(activos_eliminados.c.revision))
+        .order_by(activos_eliminados.c.revision).limit(limit + 1)
+    )).all()
+
+    cambios = sorted(
+        [(activo.revision, activo) for activo in activos] +
+        [(fila.revision, {"id": fila.id, "revision": fila.revision}) for fila in eliminados],
+        key=lambda cambio: cambio[0]
+    )
+    hay_mas = len(cambios) > limit
+    cambios = cambios[:limit]
+    return await respuesta_json(CAMBIOS_ACTIVOS, {
+        "items": [cambio for _, cambio in cambios if isinstance(cambio, Activo)],
+        "eliminados": [cambio for _, cambio in cambios if isinstance(cambio, dict)],
+        "revision": cambios[-1][0] if hay_mas else hasta,
+        "hay_mas": hay_mas,
+    })
+
+MAX_BATCH_GET = 1000
+
+async def buscar_por_campo(db: AsyncSession, columna, valores: List[str]) -> Dict[str, Activo]:
+    """{valor: activo} con un IN indexado por lote."""
+    encontrados = {}
+    for lote in en_lotes(valores):
+        resultado = await db.execute(select(Activo).filter(columna.in_(lote)))
+        encontrados.update((getattr(activo, columna.key), activo) for activo in resultado.scalars().all())
+    return encontrados
+
+@router.get("/correlativo/{correlativo}", response_model=ActivoResponse)
+async def obtener_activo_por_correlativo(correlativo: str, db: AsyncSession = Depends(get_async_db)):
+    activo = (await db.execute(select(Activo).filter(Activo.correlativo == correlativo))).scalars().first()
+    if not activo:
+        raise HTTPException(status_code=404, detail="Activo no encontrado")
+    return activo
+
+@router.get("/codigo/{codigo_activo}", response_model=List[ActivoResponse])
+async def obtener_activos_por_codigo(codigo_activo: str, db: AsyncSession = Depends(get_async_db)):
+    """El código no es único: devuelve todos los activos que lo tienen (lista vacía si ninguno)."""
+    activos = (await db.execute(
+        select(Activo).filter(Activo.codigo_activo == codigo_activo).order_by(Activo.id)
+    )).scalars().all()
+    return await respuesta_json(LISTA_ACTIVOS, activos)
+
+@router.get("/serie/{numero_serie}", response_model=List[ActivoResponse])
+async def obtener_activos_por_serie(numero_serie: str, db: AsyncSession = Depends(get_async_db)):
+    """Un mismo número de serie puede repetirse entre sedes; devuelve todas las coincidencias."""
+    activos = (await db.execute(
+        select(Activo).filter(Activo.numero_serie == numero_serie).order_by(Activo.id)
+    )).scalars().all()
+    return await respuesta_json(LISTA_ACTIVOS, activos)
+
+@router.post("/batch-get", response_model=BatchGetResponse)
+async def obtener_activos_en_lote(solicitud: BatchGetRequest, db: AsyncSession = Depends(get_async_db)):
+    """Hasta MAX_BATCH_GET activos por id y/o correlativo en una sola llamada."""
+    ids = list(dict.fromkeys(solicitud.ids))
+    correlativos = list(dict.fromkeys(solicitud.correlativos))
+    if len(ids) + len(correlativos) > MAX_BATCH_GET:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_BATCH_GET} activos por consulta")
+
+    por_id = await buscar_por_campo(db, Activo.id, ids)
+    por_correlativo = await buscar_por_campo(db, Activo.correlativo, correlativos)
+    items, vistos = [], set()
+    for valor, encontrados in [(valor, por_id) for valor in ids] + [(valor, por_correlativo) for valor in correlativos]:
+        activo = encontrados.get(valor)
+        if activo is not None and activo.id not in vistos:
+            vistos.add(activo.id)
+            items.append(activo)
+    no_encontrados = [v for v in ids if v not in por_id] + [v for v in correlativos if v not in por_correlativo]
+    return await respuesta_json(LOTE_ACTIVOS, {"items": items, "no_encontrados": no_encontrados})
+
+FACETAS = ("sede", "area", "estado", "categoria", "marca")
+MAX_VALORES_FACETA = 500
+
+async def contar_por_faceta(db: AsyncSession, faceta: Optional[str], filtros: Dict[str, str]):
+    """
+    [(valor, total)] agrupado por `faceta` (o el total si es None). Las dimensiones del
+    resumen se cuentan sobre resumen_activos; marca, sobre activos con sus índices.
+    """
+    if faceta != "marca" and "marca" not in filtros:
+        tabla, conteo = resumen_activos, func.sum(resumen_activos.c.total)
+    else:
+        tabla, conteo = Activo.__table__, func.count()
+    columnas = [tabla.c[faceta]] if faceta else []
+    stmt = select(*columnas, conteo.label("total"))
+    for campo, valor in filtros.items():
+        stmt = stmt.where(tabla.c[campo] == valor)
+    if faceta:
+        stmt = stmt.group_by(*columnas).order_by(conteo.desc(), *columnas).limit(MAX_VALORES_FACETA)
+    return (await db.execute(stmt)).all()
+
+@router.get("/facets", response_model=FacetsResponse)
+async def obtener_facetas(
+    marca: Optional[str] = None,
+    filtros: Dict[str, str] = Depends(filtros_activos),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Valores y conteos de sede, area, estado, categoria y marca para los filtros actuales,
+    de mayor a menor total (en empate, por valor; "sin valor" al final).
+    Cada faceta se cuenta sin su propio filtro, para que el panel siga mostrando las
+    alternativas del valor elegido. Resultados en caché por 30 s o hasta la próxima escritura.
+    """
+    if marca is not None:
+        filtros = {**filtros, "marca": marca}
+    clave = tuple(sorted(filtros.items()))
+    respuesta = cache_facetas.obtener(clave)
+    if respuesta is None:
+        generacion = cache_facetas.generacion()
+        facetas = {}
+        for faceta in FACETAS:
+            otros = {campo: valor for campo, valor in filtros.items() if campo != faceta}
+            totales: Dict[Optional[str], int] = {}
+            for valor, total in await contar_por_faceta(db, faceta, otros):
+                # '' (resumen) y NULL (activos) son el mismo "sin valor"
+                totales[valor or None] = totales.get(valor or None, 0) + (total or 0)
+            # Mismo orden por ambos caminos: mayor total primero; en empate, por valor y "sin valor" al final
+            ordenados = sorted(totales.items(), key=lambda par: (-par[1], par[0] is None, par[0] or ""))
+            facetas[faceta] = [{"valor": valor, "total": total} for valor, total in ordenados]
+        total = (await contar_por_faceta(db, None, filtros))[0].total or 0
+        respuesta = {"total": total, "facetas": facetas}
+        cache_facetas.guardar(clave, generacion, respuesta)
+    return respuesta
+
+@router.get("/search", response_model=ActivoSearchPage)
+async def buscar_activos(
+    q: str = Query(..., min_length=1, max_length=200),
+    prefijo: bool = True,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    filtros: Dict[str, str] = Depends(filtros_activos),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Búsqueda de texto completo en descripción, marca, modelo, número de serie, código
+    y área, ordenada por relevancia (bm25). Con `prefijo` cada palabra coincide también
+    como inicio de palabra ("lap" encuentra "Laptop"). Admite los filtros exactos del listado.
+    """
+    consulta = consulta_fts(q, prefijo)
+    if not consulta:
+        raise HTTPException(status_code=400, detail="La búsqueda debe contener al menos una palabra")
+    coincidencias = subconsulta_busqueda(consulta)
+    stmt = select(Activo).join(coincidencias, literal_column("activos.rowid") == coincidencias.c.fila)
+    stmt = aplicar_filtros(stmt, filtros).order_by(coincidencias.c.puntaje, Activo.id)
+    activos = (await db.execute(stmt.offset(skip).limit(limit + 1))).scalars().all()
+
+    next_skip = None
+    if len(activos) > limit:
+        activos = activos[:limit]
+        next_skip = skip + limit
+    return await respuesta_json(PAGINA_BUSQUEDA, {"items": activos, "next_skip": next_skip})
+
+@router.get("/export")
+def exportar_activos(
+    formato: str = "ndjson",
+    gzip: bool = False,
+    filtros: Dict[str, str] = Depends(filtros_activos)
+):
+    """Exporta la tabla completa (o filtrada) en NDJSON o CSV sin armarla en memoria."""
+    if formato == "ndjson":
+        contenido = generar_ndjson(leer_activos_en_bloques(filtros))
+        media_type = "application/x-ndjson"
+    elif formato == "csv":
+        contenido = generar_csv(leer_activos_en_bloques(filtros))
+        media_type = "text/csv; charset=utf-8"
+    else:
+        raise HTTPException(status_code=400, detail="Formato no soportado. Use 'ndjson' o 'csv'")
+
+    headers = {"Content-Disposition": f'attachment; filename="activos.{formato}"'}
+    if gzip:
+        contenido = comprimir_gzip(contenido)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(contenido, media_type=media_type, headers=headers)
+
+@router.post("/qr/batch")
+def generar_qr_en_lote(solicitud: QRBatchRequest, db: Session = Depends(get_db)):
+    """
+    Genera los QR de varios activos en un pool de procesos y los devuelve en un ZIP o en
+    una respuesta multipart/mixed, en el orden pedido. Los QR ya generados con la misma
+    URL, tamaño y corrección de errores se leen de la caché en disco.
+    """
+    if solicitud.formato not in FORMATOS_QR:
+        raise HTTPException(status_code=400, detail="Formato no soportado. Use 'png' o 'svg'")
+    if solicitud.ecc not in NIVELES_CORRECCION:
+        raise HTTPException(status_code=400, detail="Nivel de corrección no válido. Use L, M, Q o H")
+    if solicitud.salida not in ("zip", "multipart"):
+        raise HTTPException(status_code=400, detail="Salida no soportada. Use 'zip' o 'multipart'")
+    if not 32 <= solicitud.tamano <= 2048:
+        raise HTTPException(status_code=400, detail="El tamaño debe estar entre 32 y 2048 píxeles")
+    if len(solicitud.ids) > MAX_QR_POR_LOTE:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_QR_POR_LOTE} activos por lote")
+
+    ids = list(dict.fromkeys(solicitud.ids))
+    urls = {}
+    for lote in en_lotes(ids):
+        urls.update(db.query(Activo.id, Activo.url).filter(Activo.id.in_(lote)).all())
+    faltantes = [activo_id for activo_id in ids if activo_id not in urls]
+    if faltantes:
+        raise HTTPException(status_code=404, detail={"mensaje": "Activos no encontrados", "ids": faltantes[:100]})
+
+    resultados = generar_qr_lote(
+        ((activo_id, urls[activo_id] or activo_id) for activo_id in ids),
+        solicitud.tamano, solicitud.ecc, solicitud.formato
+    )
+    if solicitud.salida == "zip":
+        return StreamingResponse(
+            empaquetar_zip(resultados, solicitud.formato), media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="qr.zip"'}
+        )
+    separador = uuid.uuid4().hex
+    return StreamingResponse(
+        empaquetar_multipart(resultados, solicitud.formato, separador),
+        media_type=f"multipart/mixed; boundary={separador}"
+    )
+
+@router.post("/labels/pdf")
+def generar_hojas_de_etiquetas(
+    solicitud: LabelSheetRequest,
+    filtros: Dict[str, str] = Depends(filtros_activos),
+    db: Session = Depends(get_db)
+):
+    """
+    Hojas de etiquetas en PDF (QR vectorial + campos de texto) para los activos indicados
+    o, sin `ids`, para todos los que cumplan los filtros. Se genera y envía página por
+    página, así que la memoria no crece con la cantidad de etiquetas.
+    """
+    if solicitud.ecc not in NIVELES_CORRECCION:
+        raise HTTPException(status_code=400, detail="Nivel de corrección no válido. Use L, M, Q o H")
+    campos_invalidos = [campo for campo in solicitud.campos if campo not in COLUMNAS_EXPORT]
+    if campos_invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(campos_invalidos)}")
+    if not (1 <= solicitud.filas <= 50 and 1 <= solicitud.columnas <= 20 and 3 <= solicitud.tamano_fuente <= 36):
+        raise HTTPException(status_code=400, detail="Grilla o tamaño de fuente fuera de rango")
+    if solicitud.ancho_pagina_mm and solicitud.alto_pagina_mm:
+        ancho_pagina, alto_pagina = solicitud.ancho_pagina_mm, solicitud.alto_pagina_mm
+    elif solicitud.pagina in TAMANOS_PAGINA_MM:
+        ancho_pagina, alto_pagina = TAMANOS_PAGINA_MM[solicitud.pagina]
+    else:
+        raise HTTPException(status_code=400, detail="Página no soportada. Use A4, Letter o un tamaño en mm")
+
+    diseno = solicitud.model_dump(exclude={"ids", "pagina"})
+    diseno.update(ancho_pagina_mm=ancho_pagina, alto_pagina_mm=alto_pagina)
+    try:
+        calcular_grilla(diseno)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if solicitud.ids is not None:
+        ids = list(dict.fromkeys(solicitud.ids))
+        existentes = set()
+        for lote in en_lotes(ids):
+            existentes.update(fila[0] for fila in db.query(Activo.id).filter(Activo.id.in_(lote)).all())
+        faltantes = [activo_id for activo_id in ids if activo_id not in existentes]
+        if faltantes:
+            raise HTTPException(status_code=404, detail={"mensaje": "Activos no encontrados", "ids": faltantes[:100]})
+        bloques = leer_activos_por_ids(ids)
+    else:
+        bloques = leer_activos_en_bloques(filtros)
+
+    return StreamingResponse(
+        generar_pdf_etiquetas(bloques, diseno, calcular_matrices), media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="etiquetas.pdf"'}
+    )
 
 @router.get("/{activo_id}", response_model=ActivoResponse)
-def obtener_activo(activo_id: str, db: Session = Depends(get_db)):
-    activo = db.query(Activo).filter(Activo.id == activo_id).first()
+async def obtener_activo(activo_id: str, db: AsyncSession = Depends(get_async_db)):
+    activo = (await db.execute(select(Activo).where(Activo.id == activo_id))).scalars().first()
     if not activo:
         raise HTTPException(status_code=404, detail="Activo no encontrado")
     return activo
@@ -173,6 +834,7 @@ def actualizar_activo(activo_id: str, activo_update: ActivoUpdate, db: Session =
     db.add(db_activo)
     try:
         db.commit()
+        invalidar_activos([activo_id])
         db.refresh(db_activo)
     except Exception as e:
         db.rollback()
@@ -188,6 +850,7 @@ def eliminar_activo(activo_id: str, db: Session = Depends(get_db)):
     db.delete(db_activo)
     try:
         db.commit()
+        invalidar_activos([activo_id])
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Error al eliminar: {e}")
@@ -195,12 +858,73 @@ def eliminar_activo(activo_id: str, db: Session = Depends(get_db)):
 
 @router.delete("/", status_code=204)
 def eliminar_todos_los_activos(db: Session = Depends(get_db)):
-    activos = db.query(Activo).all()
-    for activo in activos:
-        db.delete(activo)
+    # Un solo DELETE; los triggers de búsqueda y del registro de cambios corren por fila
+    db.execute(delete(Activo).execution_options(synchronize_session=False))
     db.commit()
+    invalidar_todos_los_activos()
     return None
 
+# Campos que no se pueden asignar en bloque: la clave y el correlativo (único)
+CAMPOS_NO_MASIVOS = {"id", "correlativo"}
+
+def condiciones_seleccion(solicitud: BulkDeleteRequest):
+    """Condiciones de los filtros; exige al menos un filtro o una lista de ids."""
+    filtros = solicitud.filtros.model_dump(exclude_none=True)
+    if solicitud.ids is None and not filtros:
+        raise HTTPException(status_code=400, detail="Indique ids o al menos un filtro")
+    return [getattr(Activo, campo) == valor for campo, valor in filtros.items()]
+
+def ejecutar_por_seleccion(db: Session, stmt, solicitud: BulkDeleteRequest) -> List[str]:
+    """
+    Ejecuta el UPDATE/DELETE sobre la selección y devuelve los ids afectados (RETURNING).
+    Con filtros es una sola sentencia; con ids, una por lote de 500, en la misma transacción.
+    """
+    stmt = stmt.where(*condiciones_seleccion(solicitud)).returning(Activo.id) \
+        .execution_options(synchronize_session=False)
+    if solicitud.ids is None:
+        return list(db.execute(stmt).scalars().all())
+    afectados = []
+    for lote in en_lotes(list(dict.fromkeys(solicitud.ids))):
+        afectados.extend(db.execute(stmt.where(Activo.id.in_(lote))).scalars().all())
+    return afectados
+
+def resultado_masivo(ids: List[str], solicitud: BulkDeleteRequest) -> dict:
+    return {"afectados": len(ids), "ids": ids if solicitud.devolver_ids else None}
+
+@router.post("/bulk-delete", response_model=BulkResultResponse)
+def eliminar_activos_en_lote(solicitud: BulkDeleteRequest, db: Session = Depends(get_db)):
+    """Elimina los activos indicados por ids y/o filtros sin cargarlos como objetos ORM."""
+    try:
+        ids = ejecutar_por_seleccion(db, delete(Activo), solicitud)
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Error al eliminar: {e}")
+    invalidar_activos(ids)
+    return resultado_masivo(ids, solicitud)
+
+@router.post("/bulk-patch", response_model=BulkResultResponse)
+def actualizar_activos_en_lote(solicitud: BulkPatchRequest, db: Session = Depends(get_db)):
+    """Asigna los mismos valores (ej. estado o área) a todos los activos seleccionados."""
+    cambios = solicitud.cambios.model_dump(exclude_unset=True)
+    no_permitidos = [campo for campo in cambios if campo in CAMPOS_NO_MASIVOS or campo not in COLUMNAS_ACTIVO]
+    if no_permitidos:
+        raise HTTPException(status_code=400, detail=f"Campos no modificables en bloque: {', '.join(no_permitidos)}")
+    if not cambios:
+        raise HTTPException(status_code=400, detail="No hay cambios que aplicar")
+    try:
+        ids = ejecutar_por_seleccion(db, update(Activo).values(**cambios), solicitud)
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Error al actualizar: {e}")
+    invalidar_activos(ids)
+    return resultado_masivo(ids, solicitud)
+
 # --- Endpoints Avanzados ---
 
 def detalle_activo_html(codigo: str, request: Request):
@@ -239,12 +963,8 @@ def detalle_activo_html(codigo: str, request: Request):
 @router.post("/bulk-create", response_model=List[ActivoResponse], status_code=201)
 def crear_o_actualizar_activos_en_lote(activos: List[ActivoCreate], request: Request, db: Session = Depends(get_db)):
     correlativos_excel = [a.correlativo for a in activos if a.correlativo]
-    repetidos_excel = set([c for c in correlativos_excel if correlativos_excel.count(c) > 1])
-    if correlativos_excel:
-        existentes_db = db.query(Activo.correlativo).filter(Activo.correlativo.in_(correlativos_excel)).all()
-        existentes_db = set([c[0] for c in existentes_db if c[0]])
-    else:
-        existentes_db = set()
+    repetidos_excel = buscar_repetidos(correlativos_excel)
+    existentes_db = set(buscar_ids_por(db.connection(), "correlativo", correlativos_excel))
     todos_repetidos = repetidos_excel.union(existentes_db)
     if todos_repetidos:
         raise HTTPException(
@@ -254,33 +974,71 @@ def crear_o_actualizar_activos_en_lote(activos: List[ActivoCreate], request: Req
                 "repeated_correlativos": list(todos_repetidos)
             }
         )
-    creados = []
-    actualizados = []
-    errores = []
-    for activo_data in activos:
-        data = activo_data.model_dump()
-        correlativo = data.get('correlativo', '')
-        area = data.get('area', '')
-        sede = data.get('sede', '')
-        if not data.get('id'):
-            data['id'] = f"{correlativo}{area}{sede}"
-        if not data.get('codigo_activo'):
-            data['codigo_activo'] = f"{correlativo}-{area}-{sede}"
-        if not data.get('url'):
-            public_url_base = getattr(request.app.state, 'PUBLIC_URL_BASE', '')
-            sede_id_global = getattr(request.app.state, 'SEDE_ID', '')
-            data['url'] = f"{public_url_base}?sede={sede_id_global}&id={data['id']}"
-        db_activo = db.query(Activo).filter(Activo.id == data['id']).first()
-        if db_activo:
-            for key, value in data.items():
-                setattr(db_activo, key, value)
-            actualizados.append(db_activo)
-        else:
-            db_activo = Activo(**data)
-            db.add(db_activo)
-            creados.append(db_activo)
+    filas = preparar_filas_lote(activos, request)
+    resultado = ejecutar_upsert_lote(filas, db)
+    por_id = {fila['id']: fila for fila in filas}
+    existentes = resultado["actualizados"] + resultado["sin_cambios"]
+    return [ActivoResponse(**por_id[i]) for i in resultado["creados"]] + [ActivoResponse(**por_id[i]) for i in existentes]
+
+@router.post("/bulk-upsert", response_model=BulkUpsertResponse)
+def upsert_activos_en_lote(activos: List[ActivoCreate], request: Request, db: Session = Depends(get_db)):
+    """
+    Inserta o actualiza el lote por id. A diferencia de bulk-create, un correlativo que ya
+    existe en la base no es un error si pertenece al mismo activo.
+    """
+    correlativos_excel = [a.correlativo for a in activos if a.correlativo]
+    repetidos_excel = buscar_repetidos(correlativos_excel)
+    if repetidos_excel:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "detail": "El lote contiene correlativos repetidos.",
+                "repeated_correlativos": list(repetidos_excel)
+            }
+        )
+    filas = preparar_filas_lote(activos, request)
+    ids_por_correlativo = buscar_ids_por(db.connection(), "correlativo", correlativos_excel)
+    en_conflicto = [
+        fila['correlativo'] for fila in filas
+        if fila['correlativo'] in ids_por_correlativo and ids_por_correlativo[fila['correlativo']] != fila['id']
+    ]
+    if en_conflicto:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "detail": "Hay correlativos que ya pertenecen a otros activos.",
+                "repeated_correlativos": en_conflicto
+            }
+        )
+    resultado = ejecutar_upsert_lote(filas, db)
+    return BulkUpsertResponse(
+        total=len(filas),
+        creados=len(resultado["creados"]),
+        actualizados=len(resultado["actualizados"]),
+        sin_cambios=len(resultado["sin_cambios"]),
+        ids=resultado,
+    )
+
+def preparar_filas_lote(activos: List[ActivoCreate], request: Request) -> List[dict]:
+    public_url_base = getattr(request.app.state, 'PUBLIC_URL_BASE', '')
+    sede_id_global = getattr(request.app.state, 'SEDE_ID', '')
+    filas = [completar_datos_activo(a.model_dump(), public_url_base, sede_id_global) for a in activos]
+    ids_repetidos = buscar_repetidos(fila['id'] for fila in filas)
+    if ids_repetidos:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "detail": "Sus QR no se generaron porque hay activos con el mismo id.",
+                "repeated_ids": list(ids_repetidos)
+            }
+        )
+    return filas
+
+def ejecutar_upsert_lote(filas: List[dict], db: Session) -> Dict[str, List[str]]:
     try:
+        resultado = upsert_activos(db.connection(), filas)
         db.commit()
+        invalidar_activos(resultado["creados"] + resultado["actualizados"])
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -290,20 +1048,59 @@ def crear_o_actualizar_activos_en_lote(activos: List[ActivoCreate], request: Req
                 "errores": [str(e)]
             }
         )
-    return [ActivoResponse.model_validate(a) for a in creados] + [ActivoResponse.model_validate(a) for a in actualizados]
+    return resultado
 
 @router.get("/stats/", response_model=StatsResponse)
-def obtener_estadisticas(db: Session = Depends(get_db)):
-    total_activos = db.query(func.count(Activo.id)).scalar()
-    
-    query_estado = db.query(Activo.estado, func.count(Activo.estado)).group_by(Activo.estado).all()
+async def obtener_estadisticas(db: AsyncSession = Depends(get_async_db)):
+    # Se lee del resumen mantenido por triggers (models/stats.py), no de la tabla completa
+    query_estado = (await db.execute(
+        select(resumen_activos.c.estado, func.sum(resumen_activos.c.total)).group_by(resumen_activos.c.estado)
+    )).all()
     activos_por_estado = {estado if estado else "No definido": count for estado, count in query_estado}
     
     return {
-        "total_activos": total_activos,
+        "total_activos": sum(activos_por_estado.values()),
         "activos_por_estado": activos_por_estado
     }
 
+@router.get("/stats/resumen", response_model=StatsSummaryResponse)
+async def obtener_resumen_estadisticas(
+    agrupar: List[str] = Query([]),
+    filtros: Dict[str, str] = Depends(filtros_activos),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Conteos agrupados por cualquier combinación de sede, area, estado y categoria
+    (ej. ?agrupar=sede&agrupar=estado), opcionalmente filtrados. Se calcula sobre el
+    resumen, cuyo tamaño depende de las combinaciones existentes y no de la cantidad de activos.
+    """
+    invalidas = [dimension for dimension in agrupar if dimension not in DIMENSIONES_RESUMEN]
+    if invalidas:
+        raise HTTPException(status_code=400, detail=f"Dimensiones no válidas: {', '.join(invalidas)}")
+    agrupar = list(dict.fromkeys(agrupar))
+    columnas = [resumen_activos.c[dimension] for dimension in agrupar]
+    stmt = select(*columnas, func.sum(resumen_activos.c.total).label("total"))
+    for campo, valor in filtros.items():
+        stmt = stmt.where(resumen_activos.c[campo] == valor)
+    filas = (await db.execute(stmt.group_by(*columnas).order_by(*columnas))).all()
+
+    grupos = [
+        {**{dimension: (valor or None) for dimension, valor in zip(agrupar, fila[:-1])}, "total": fila.total or 0}
+        for fila in filas
+    ]
+    return {"agrupado_por": agrupar, "total": sum(grupo["total"] for grupo in grupos), "grupos": grupos}
+
+@router.get("/stats/verificar", response_model=StatsCheckResponse)
+def verificar_estadisticas(reparar: bool = False):
+    """Compara el resumen con un recuento completo de `activos`; con reparar=true lo reconstruye."""
+    with get_engine().begin() as conn:
+        diferencias = verificar_resumen(conn)
+        if diferencias and reparar:
+            reconstruir_resumen(conn)
+    if diferencias and reparar:
+        cache_facetas.invalidar_todo()  # las facetas se calcularon sobre el resumen anterior
+    return {"consistente": not diferencias, "diferencias": diferencias, "reparado": bool(diferencias and reparar)}
+
 @router.post("/{activo_id}/regenerate-qr", response_model=ActivoResponse)
 def regenerar_y_guardar_qr(activo_id: str, db: Session = Depends(get_db)):
     db_activo = db.query(Activo).filter(Activo.id == activo_id).first()
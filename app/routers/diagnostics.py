@@ -0,0 +1,65 @@
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+
+from profiling import MODOS_PERFILADO, acceso_permitido, consultas_lentas, perfilador_global
+
+# --- API Router ---
+
+def verificar_acceso(request: Request, x_qrizate_token: Optional[str] = Header(None)):
+    """Solo el propio equipo o quien tenga el token de diagnóstico (ver profiling.acceso_permitido)."""
+    if not acceso_permitido(request.client.host if request.client else None, x_qrizate_token):
+        raise HTTPException(status_code=403, detail="Diagnóstico permitido solo desde el servidor o con token")
+
+router = APIRouter(
+    prefix="/diagnostico",
+    tags=["Diagnóstico"],
+    dependencies=[Depends(verificar_acceso)],
+)
+
+# --- Schemas (Modelos Pydantic) ---
+
+class PerfiladoRequest(BaseModel):
+    ruta: str = Field(..., description="Ruta exacta, ej. /activos/")
+    peticiones: int = Field(1, ge=1, le=100)
+    modo: str = "muestreo"
+
+class UmbralRequest(BaseModel):
+    umbral_ms: float = Field(..., ge=0, description="Nuevo umbral (0 desactiva el registro)")
+
+class ConsultasLentasResponse(BaseModel):
+    umbral_ms: float
+    total: int
+    en_memoria: int
+    consultas: List[Dict]
+
+# --- Endpoints ---
+
+@router.get("/consultas-lentas", response_model=ConsultasLentasResponse)
+def obtener_consultas_lentas(limit: int = Query(50, ge=1, le=200)):
+    """Últimas consultas que superaron el umbral, con su plan. También en diagnostico/consultas_lentas.jsonl."""
+    recientes = list(consultas_lentas.recientes)[-limit:]
+    return {**consultas_lentas.estadisticas(), "consultas": list(reversed(recientes))}
+
+@router.put("/consultas-lentas/umbral")
+def cambiar_umbral_consultas_lentas(solicitud: UmbralRequest):
+    consultas_lentas.umbral_ms = solicitud.umbral_ms
+    return consultas_lentas.estadisticas()
+
+@router.post("/perfilar")
+def armar_perfilado(solicitud: PerfiladoRequest):
+    """Perfila las próximas `peticiones` a `ruta`; los archivos quedan en diagnostico/perfiles."""
+    if solicitud.modo not in MODOS_PERFILADO:
+        raise HTTPException(status_code=400, detail=f"Modo no válido; use {', '.join(MODOS_PERFILADO)}")
+    perfilador_global.armar(solicitud.ruta, solicitud.peticiones, solicitud.modo)
+    return perfilador_global.estado()
+
+@router.get("/perfilar")
+def estado_perfilado():
+    return perfilador_global.estado()
+
+@router.delete("/perfilar")
+def cancelar_perfilado():
+    perfilador_global.desarmar()
+    return perfilador_global.estado()
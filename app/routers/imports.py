@@ -0,0 +1,154 @@
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from import_worker import (carpeta_importaciones, encolar_job, escribir_atomico,
+                           normalizar_fila, resumen_job, ruta_chunk)
+from models.db import get_db
+from models.import_job import ImportJob
+
+# --- API Router ---
+
+router = APIRouter(
+    prefix="/imports",
+    tags=["Importaciones"]
+)
+
+FORMATOS_ARCHIVO = {".xlsx": "xlsx", ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# --- Schemas (Modelos Pydantic) ---
+
+class ErrorFila(BaseModel):
+    fila: int
+    correlativo: Optional[str] = None
+    error: str
+
+class ImportJobResponse(BaseModel):
+    id: str
+    estado: str
+    formato: str
+    nombre_archivo: Optional[str] = None
+    total_filas: int
+    filas_procesadas: int
+    porcentaje: float
+    filas_por_segundo: Optional[float] = None
+    creados: int
+    actualizados: int
+    sin_cambios: int
+    filas_con_error: int
+    errores: List[ErrorFila]
+    mensaje: Optional[str] = None
+
+# --- Funciones Auxiliares ---
+
+def nuevo_job(request: Request, formato: str, estado: str, nombre_archivo: Optional[str] = None) -> ImportJob:
+    job_id = uuid.uuid4().hex
+    return ImportJob(
+        id=job_id,
+        estado=estado,
+        formato=formato,
+        nombre_archivo=nombre_archivo,
+        archivo_filas=os.path.join(carpeta_importaciones(), f"{job_id}.filas.jsonl"),
+        url_base=getattr(request.app.state, 'PUBLIC_URL_BASE', ''),
+        sede_id=getattr(request.app.state, 'SEDE_ID', ''),
+        creado_en=time.time(),
+    )
+
+def obtener_job(job_id: str, db: Session) -> ImportJob:
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Importación no encontrada")
+    return job
+
+# --- Endpoints ---
+
+@router.post("/", response_model=ImportJobResponse, status_code=202)
+def subir_archivo_importacion(
+    request: Request,
+    archivo: UploadFile = File(...),
+    formato: Optional[str] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """Recibe un archivo XLSX, CSV o JSONL y lo deja en cola para el worker."""
+    extension = os.path.splitext(archivo.filename or "")[1].lower()
+    formato = formato or FORMATOS_ARCHIVO.get(extension)
+    if formato not in FORMATOS_ARCHIVO.values():
+        raise HTTPException(status_code=400, detail="Formato no soportado. Use XLSX, CSV o JSONL")
+
+    job = nuevo_job(request, formato, "pendiente", archivo.filename)
+    job.archivo_original = os.path.join(carpeta_importaciones(), f"{job.id}.original.{formato}")
+    with open(job.archivo_original, "wb") as destino:
+        shutil.copyfileobj(archivo.file, destino, 1024 * 1024)
+    db.add(job)
+    db.commit()
+    encolar_job(job.id)
+    return resumen_job(job)
+
+@router.post("/stream", response_model=ImportJobResponse, status_code=201)
+def iniciar_importacion_por_chunks(request: Request, db: Session = Depends(get_db)):
+    """Crea un trabajo que recibe las filas en varios envíos; se procesa al llamar a /finalizar."""
+    job = nuevo_job(request, "chunks", "recibiendo")
+    db.add(job)
+    db.commit()
+    return resumen_job(job)
+
+@router.post("/{job_id}/chunks", response_model=ImportJobResponse)
+def recibir_chunk(job_id: str, filas: List[Dict[str, Any]], secuencia: Optional[int] = None, db: Session = Depends(get_db)):
+    """
+    Agrega un bloque de filas al trabajo. `secuencia` (0, 1, 2...) hace que reintentar
+    un envío ya recibido no duplique filas.
+    """
+    job = obtener_job(job_id, db)
+    if job.estado != "recibiendo":
+        raise HTTPException(status_code=409, detail=f"La importación ya no recibe datos (estado: {job.estado})")
+    if secuencia is None:
+        secuencia = job.chunks_recibidos
+    if secuencia < job.chunks_recibidos:
+        return resumen_job(job)
+    if secuencia > job.chunks_recibidos:
+        raise HTTPException(status_code=409, detail=f"Se esperaba el chunk {job.chunks_recibidos}")
+
+    # El chunk se escribe completo antes de contarlo; si algo falla, el reintento lo reescribe
+    job.total_filas += escribir_atomico(ruta_chunk(job, secuencia), (normalizar_fila(f) for f in filas))
+    job.chunks_recibidos += 1
+    job.actualizado_en = time.time()
+    db.commit()
+    return resumen_job(job)
+
+@router.post("/{job_id}/finalizar", response_model=ImportJobResponse, status_code=202)
+def finalizar_importacion(job_id: str, db: Session = Depends(get_db)):
+    job = obtener_job(job_id, db)
+    if job.estado != "recibiendo":
+        raise HTTPException(status_code=409, detail=f"La importación no está recibiendo datos (estado: {job.estado})")
+    job.estado = "pendiente"
+    job.actualizado_en = time.time()
+    db.commit()
+    encolar_job(job.id)
+    return resumen_job(job)
+
+@router.post("/{job_id}/reanudar", response_model=ImportJobResponse, status_code=202)
+def reanudar_importacion(job_id: str, db: Session = Depends(get_db)):
+    """Vuelve a encolar un trabajo fallido; continúa desde el último lote confirmado."""
+    job = obtener_job(job_id, db)
+    if job.estado != "fallido":
+        raise HTTPException(status_code=409, detail=f"Solo se pueden reanudar importaciones fallidas (estado: {job.estado})")
+    job.estado = "pendiente"
+    job.mensaje = None
+    db.commit()
+    encolar_job(job.id)
+    return resumen_job(job)
+
+@router.get("/", response_model=List[ImportJobResponse])
+def listar_importaciones(limit: int = 20, db: Session = Depends(get_db)):
+    jobs = db.query(ImportJob).order_by(ImportJob.creado_en.desc()).limit(limit).all()
+    return [resumen_job(job) for job in jobs]
+
+@router.get("/{job_id}", response_model=ImportJobResponse)
+def obtener_importacion(job_id: str, db: Session = Depends(get_db)):
+    return resumen_job(obtener_job(job_id, db))
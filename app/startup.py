@@ -0,0 +1,168 @@
+"""
+Tiempos de arranque del servidor (--profile-startup).
+
+- Importaciones: un buscador en sys.meta_path mide cuánto tarda en ejecutarse cada módulo
+  y descuenta lo que tardan los que importa a su vez; el tiempo propio se suma por paquete
+  de primer nivel (fastapi, sqlalchemy, pydantic...), así que los totales no se repiten.
+- Fases: init_db, instrumentación, worker, relay... medidas con `arranque.fase(nombre)`.
+
+Solo mide importaciones si se activa antes de importar el resto (al principio de main.py);
+sin la opción, las fases se siguen midiendo (cuesta un perf_counter) pero no se reportan.
+Usa solo la biblioteca estándar para poder importarse primero.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+OPCION_PERFILAR_ARRANQUE = "--profile-startup"
+MAX_PAQUETES_REPORTE = 25
+
+
+class _CargadorMedido:
+    """Envuelve el loader de un módulo solo mientras se ejecuta; luego restaura el original."""
+    def __init__(self, cargador, medidor: "MedidorImportaciones"):
+        self._cargador = cargador
+        self._medidor = medidor
+
+    def __getattr__(self, nombre):
+        return getattr(self._cargador, nombre)
+
+    def create_module(self, spec):
+        return self._cargador.create_module(spec)
+
+    def exec_module(self, modulo):
+        self._medidor._entrar()
+        inicio = time.perf_counter()
+        try:
+            self._cargador.exec_module(modulo)
+        finally:
+            self._medidor._salir(modulo.__name__, time.perf_counter() - inicio)
+            modulo.__loader__ = self._cargador
+            if getattr(modulo, "__spec__", None) is not None:
+                modulo.__spec__.loader = self._cargador
+
+
+class MedidorImportaciones:
+    def __init__(self):
+        self.propio: Dict[str, float] = defaultdict(float)  # paquete de primer nivel -> segundos propios
+        self.modulos = 0
+        self._hijos: List[float] = []  # tiempo de los imports anidados, por nivel
+
+    def find_spec(self, nombre, ruta=None, objetivo=None):
+        for buscador in sys.meta_path:
+            if buscador is self or not hasattr(buscador, "find_spec"):
+                continue
+            spec = buscador.find_spec(nombre, ruta, objetivo)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _CargadorMedido(spec.loader, self)
+                return spec
+        return None
+
+    def _entrar(self):
+        self._hijos.append(0.0)
+
+    def _salir(self, nombre: str, duracion: float):
+        hijos = self._hijos.pop()
+        self.propio[nombre.partition(".")[0]] += max(0.0, duracion - hijos)
+        self.modulos += 1
+        if self._hijos:
+            self._hijos[-1] += duracion
+
+    def instalar(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def desinstalar(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+class Arranque:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases: Dict[str, float] = {}
+        self.hitos: Dict[str, float] = {}  # ms desde que se importó este módulo (primera línea de main.py)
+        self.detalle: Dict[str, Dict[str, float]] = {}
+        self.importaciones: Optional[MedidorImportaciones] = None
+        self.listo_en: Optional[float] = None
+
+    @property
+    def perfilando(self) -> bool:
+        return self.importaciones is not None
+
+    def activar_si_pedido(self, argv=None):
+        """Mide las importaciones si el proceso recibió --profile-startup."""
+        if OPCION_PERFILAR_ARRANQUE in (argv if argv is not None else sys.argv) and self.importaciones is None:
+            self.importaciones = MedidorImportaciones()
+            self.importaciones.instalar()
+
+    @contextmanager
+    def fase(self, nombre: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nombre] = round((time.perf_counter() - inicio) * 1000, 2)
+
+    def hito(self, nombre: str):
+        self.hitos[nombre] = round((time.perf_counter() - self.inicio) * 1000, 2)
+
+    def marcar_listo(self):
+        """Fin del arranque: deja de medir importaciones (las de primer uso ya no son de arranque)."""
+        self.listo_en = time.perf_counter()
+        self.hito("listo")
+        if self.importaciones is not None:
+            self.importaciones.desinstalar()
+
+    def reporte(self) -> Dict:
+        datos = {
+            "total_ms": round(((self.listo_en or time.perf_counter()) - self.inicio) * 1000, 2),
+            "hitos_ms": dict(self.hitos),
+            "fases_ms": dict(self.fases),
+            "detalle_ms": {fase: dict(tiempos) for fase, tiempos in self.detalle.items()},
+        }
+        if self.importaciones is not None:
+            paquetes = sorted(self.importaciones.propio.items(), key=lambda par: par[1], reverse=True)
+            datos["importaciones"] = {
+                "modulos": self.importaciones.modulos,
+                "total_ms": round(sum(self.importaciones.propio.values()) * 1000, 2),
+                "por_paquete_ms": {
+                    paquete: round(segundos * 1000, 2) for paquete, segundos in paquetes[:MAX_PAQUETES_REPORTE]
+                },
+            }
+        return datos
+
+    def registrar_reporte(self, ruta: Optional[str] = None) -> Dict:
+        """Escribe el reporte en el log y, si se indica, en un archivo JSON."""
+        datos = self.reporte()
+        logging.info(f"Arranque en {datos['total_ms']} ms")
+        for hito, ms in datos["hitos_ms"].items():
+            logging.info(f"  hito {hito:<29} {ms:>10.2f} ms")
+        for fase, ms in datos["fases_ms"].items():
+            logging.info(f"  fase {fase:<28} {ms:>10.2f} ms")
+            for sub, sub_ms in datos["detalle_ms"].get(fase, {}).items():
+                logging.info(f"    {sub:<28} {sub_ms:>10.2f} ms")
+        if "importaciones" in datos:
+            importaciones = datos["importaciones"]
+            logging.info(f"  importaciones: {importaciones['modulos']} módulos, {importaciones['total_ms']} ms")
+            for paquete, ms in importaciones["por_paquete_ms"].items():
+                logging.info(f"    {paquete:<28} {ms:>10.2f} ms")
+        if ruta:
+            try:
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                with open(ruta, "w", encoding="utf-8") as archivo:
+                    json.dump(datos, archivo, indent=2, ensure_ascii=False)
+                logging.info(f"Reporte de arranque guardado en {ruta}")
+            except OSError as e:
+                logging.error(f"No se pudo guardar el reporte de arranque: {e}")
+        return datos
+
+
+arranque = Arranque()
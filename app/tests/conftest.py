@@ -0,0 +1,54 @@
+"""
+Fixtures comunes: cada prueba usa una base SQLite temporal propia y la app mínima con
+el router de activos, como en bench/bench_endpoints.py.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# La aplicación se ejecuta desde app/ (imports como `from models.db import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db as database  # noqa: E402
+from models import encoding  # noqa: E402
+
+
+@pytest.fixture
+def base(tmp_path):
+    database.init_db(str(tmp_path / "activos.db"))
+    from page_cache import cache_paginas
+    from result_cache import cache_facetas
+    cache_paginas.reiniciar()
+    cache_facetas.invalidar_todo()
+    yield database.get_engine()
+    asyncio.run(database.cerrar_db_async())
+    database.get_engine().dispose()
+    encoding.activar(False)
+
+
+@pytest.fixture
+def cliente(base):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routers.activos import router
+
+    app = FastAPI()
+    app.state.PUBLIC_URL_BASE = "https://qrizate.example/activo"
+    app.state.SEDE_ID = "pruebas"
+    app.include_router(router)
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def crear(cliente):
+    """crear("C1", "C2", estado="Bueno") da de alta activos en Lima/TI y devuelve sus ids."""
+    def crear(*correlativos, sede="Lima", area="TI", **campos):
+        lote = [{"correlativo": c, "sede": sede, "area": area, **campos} for c in correlativos]
+        respuesta = cliente.post("/activos/bulk-create", json=lote)
+        assert respuesta.status_code == 201, respuesta.text
+        return [f"{c}{area}{sede}" for c in correlativos]
+    return crear
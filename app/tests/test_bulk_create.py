@@ -0,0 +1,42 @@
+from sqlalchemy import func, select
+
+from models.activo import Activo
+
+
+def activo(correlativo, **campos):
+    return {"correlativo": correlativo, "sede": "Lima", "area": "TI", "estado": "Bueno", **campos}
+
+
+def contar(base):
+    with base.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Activo)).scalar()
+
+
+def test_crea_el_lote(cliente, base):
+    respuesta = cliente.post("/activos/bulk-create", json=[activo("C1"), activo("C2")])
+    assert respuesta.status_code == 201
+    assert sorted(a["id"] for a in respuesta.json()) == ["C1TILima", "C2TILima"]
+    assert contar(base) == 2
+
+
+def test_rechaza_ids_repetidos_en_el_lote(cliente, base):
+    lote = [activo("C1", id="A-1"), activo("C2", id="A-1"), activo("C3")]
+    respuesta = cliente.post("/activos/bulk-create", json=lote)
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"]["repeated_ids"] == ["A-1"]
+    assert contar(base) == 0
+
+
+def test_rechaza_correlativos_repetidos_en_el_lote(cliente, base):
+    respuesta = cliente.post("/activos/bulk-create", json=[activo("C1"), activo("C1", area="RRHH")])
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"]["repeated_correlativos"] == ["C1"]
+    assert contar(base) == 0
+
+
+def test_rechaza_correlativos_que_ya_existen(cliente, base):
+    assert cliente.post("/activos/bulk-create", json=[activo("C1")]).status_code == 201
+    respuesta = cliente.post("/activos/bulk-create", json=[activo("C1", area="RRHH"), activo("C2")])
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"]["repeated_correlativos"] == ["C1"]
+    assert contar(base) == 1
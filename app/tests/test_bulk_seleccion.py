@@ -0,0 +1,15 @@
+def test_bulk_patch_devuelve_solo_el_recuento(cliente, crear):
+    crear(*[f"C{i}" for i in range(5)], estado="Bueno")
+    respuesta = cliente.post("/activos/bulk-patch", json={"filtros": {"sede": "Lima"}, "cambios": {"estado": "Malo"}})
+    assert respuesta.status_code == 200
+    assert respuesta.json() == {"afectados": 5, "ids": None}
+    assert cliente.get("/activos/C0TILima").json()["estado"] == "Malo"
+
+
+def test_bulk_delete_con_ids_si_se_piden(cliente, crear):
+    crear("C0", "C1", "C2")
+    respuesta = cliente.post("/activos/bulk-delete", json={"ids": ["C0TILima", "C1TILima", "X"], "devolver_ids": True})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["afectados"] == 2
+    assert sorted(respuesta.json()["ids"]) == ["C0TILima", "C1TILima"]
+    assert cliente.post("/activos/bulk-delete", json={"ids": ["C2TILima"]}).json() == {"afectados": 1, "ids": None}
@@ -0,0 +1,41 @@
+def test_since_cero_devuelve_todo(cliente, crear):
+    crear("C1", "C2")
+    cambios = cliente.get("/activos/changes", params={"since": 0}).json()
+    assert sorted(a["id"] for a in cambios["items"]) == ["C1TILima", "C2TILima"]
+    assert cambios["eliminados"] == []
+    assert cambios["hay_mas"] is False
+    assert cambios["revision"] > 0
+
+
+def test_revision_posterior_a_la_actual_da_410(cliente, crear):
+    crear("C1")
+    revision = cliente.get("/activos/changes").json()["revision"]
+    assert cliente.get("/activos/changes", params={"since": revision}).status_code == 200
+    respuesta = cliente.get("/activos/changes", params={"since": revision + 1})
+    assert respuesta.status_code == 410
+
+
+def test_base_vacia_da_410_a_cualquier_revision(cliente):
+    # Una base nueva (p. ej. restaurada) no reconoce la revisión que guardó el cliente
+    assert cliente.get("/activos/changes", params={"since": 0}).status_code == 200
+    assert cliente.get("/activos/changes", params={"since": 5}).status_code == 410
+
+
+def test_solo_cambios_posteriores_y_eliminados(cliente, crear):
+    crear("C1", "C2")
+    revision = cliente.get("/activos/changes").json()["revision"]
+    crear("C3")
+    assert cliente.delete("/activos/C1TILima").status_code in (200, 204)
+    cambios = cliente.get("/activos/changes", params={"since": revision}).json()
+    assert [a["id"] for a in cambios["items"]] == ["C3TILima"]
+    assert [e["id"] for e in cambios["eliminados"]] == ["C1TILima"]
+
+
+def test_paginacion_con_hay_mas(cliente, crear):
+    crear("C1", "C2", "C3")
+    primera = cliente.get("/activos/changes", params={"since": 0, "limit": 2}).json()
+    assert primera["hay_mas"] is True and len(primera["items"]) == 2
+    resto = cliente.get("/activos/changes", params={"since": primera["revision"], "limit": 2}).json()
+    assert resto["hay_mas"] is False
+    ids = [a["id"] for a in primera["items"] + resto["items"]]
+    assert sorted(ids) == ["C1TILima", "C2TILima", "C3TILima"]
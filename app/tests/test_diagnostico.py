@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from profiling import RegistroConsultasLentas, consultas_lentas
+
+
+@pytest.fixture
+def diagnostico(base, monkeypatch):
+    from routers.diagnostics import router
+
+    monkeypatch.setenv("QRIZATE_TOKEN_DIAGNOSTICO", "secreto")
+    monkeypatch.setattr(consultas_lentas, "umbral_ms", consultas_lentas.umbral_ms)
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app, headers={"X-Qrizate-Token": "secreto"}) as cliente:
+        yield cliente
+
+
+def test_el_umbral_se_cambia_con_put(diagnostico):
+    anterior = diagnostico.get("/diagnostico/consultas-lentas").json()["umbral_ms"]
+    assert diagnostico.get("/diagnostico/consultas-lentas", params={"umbral_ms": 1}).json()["umbral_ms"] == anterior
+    respuesta = diagnostico.put("/diagnostico/consultas-lentas/umbral", json={"umbral_ms": 5})
+    assert respuesta.status_code == 200 and respuesta.json()["umbral_ms"] == 5
+    assert diagnostico.put("/diagnostico/consultas-lentas/umbral", json={"umbral_ms": -1}).status_code == 422
+    assert diagnostico.get("/diagnostico/consultas-lentas").json()["umbral_ms"] == 5
+
+
+def test_sin_token_no_hay_acceso(diagnostico):
+    respuesta = diagnostico.put("/diagnostico/consultas-lentas/umbral", json={"umbral_ms": 5},
+                                headers={"X-Qrizate-Token": "otro"})
+    assert respuesta.status_code == 403
+
+
+def test_un_solo_hilo_escritor_con_anotaciones_concurrentes(base, monkeypatch):
+    registro = RegistroConsultasLentas()
+    iniciados = []
+    monkeypatch.setattr(registro, "_escribir", lambda: iniciados.append(threading.current_thread()))
+    salida = threading.Barrier(16)
+
+    def anotar():
+        salida.wait()
+        registro._anotar("sync", "SELECT 1", (), False, 500.0)
+
+    hilos = [threading.Thread(target=anotar) for _ in range(16)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    registro._hilo.join(5)
+    assert len(iniciados) == 1
+    assert registro.total == 16
+
+
+def test_una_sola_captura_cprofile_a_la_vez(monkeypatch):
+    import asyncio
+
+    from profiling import Perfilador, PerfilarPeticiones
+
+    perfilador = Perfilador()
+    guardados = []
+    monkeypatch.setattr(perfilador, "guardar", lambda metodo, ruta, modo, duracion, resultado: guardados.append(modo))
+
+    async def ejecutar():
+        liberar = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await liberar.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        async def enviar(mensaje):
+            pass
+
+        middleware = PerfilarPeticiones(app, perfilador)
+        scope = {"type": "http", "method": "GET", "path": "/x", "client": ("127.0.0.1", 1),
+                 "headers": [(b"x-qrizate-perfilar", b"cprofile")]}
+        peticiones = [asyncio.create_task(middleware(dict(scope), None, enviar)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        liberar.set()
+        await asyncio.gather(*peticiones)
+        # Terminadas las anteriores, la siguiente vuelve a poder usar cProfile
+        await middleware(dict(scope), None, enviar)
+
+    asyncio.run(ejecutar())
+    assert sorted(guardados[:3]) == ["cprofile", "muestreo", "muestreo"]
+    assert guardados[3] == "cprofile"
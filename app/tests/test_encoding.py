@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from models import db as database
+from models import dictionary, encoding
+from models.activo import Activo
+from models.dictionary import diccionario_activos, migrar_almacenamiento
+from routers.activos import codificar_cursor
+
+ACTIVOS = [
+    {"correlativo": "C1", "sede": "Lima", "area": "Logística", "estado": "Bueno", "categoria": "MUEBLES"},
+    {"correlativo": "C2", "sede": "Piura", "area": "Logística", "estado": "Malo", "categoria": "VEHÍCULOS"},
+]
+
+
+def crudos(base, columna):
+    with base.connect() as conn:
+        return {fila[0]: fila[1] for fila in conn.exec_driver_sql(f"SELECT id, {columna} FROM activos")}
+
+
+def test_codigo_valor_es_estable_y_depende_del_campo():
+    assert encoding.codigo_valor("sede", "Lima") == encoding.codigo_valor("sede", "Lima")
+    assert encoding.codigo_valor("sede", "Lima") != encoding.codigo_valor("area", "Lima")
+    assert 0 <= encoding.codigo_valor("sede", "Lima") < 2 ** 31
+
+
+@pytest.mark.parametrize("modo_inicial", ["texto", "diccionario"])
+def test_ida_y_vuelta(cliente, base, modo_inicial):
+    if modo_inicial == "diccionario":
+        migrar_almacenamiento(base, "diccionario", compactar=False)
+    assert cliente.post("/activos/bulk-create", json=ACTIVOS).status_code == 201
+    if modo_inicial == "texto":
+        migrar_almacenamiento(base, "diccionario", compactar=False)
+    assert encoding.MODO_DICCIONARIO
+
+    # En disco, enteros; por la API, el texto original
+    sedes = crudos(base, "sede")
+    assert sedes["C1LogísticaLima"] == encoding.codigo_valor("sede", "Lima")
+    activo = cliente.get("/activos/C2LogísticaPiura").json()
+    assert (activo["sede"], activo["area"], activo["categoria"]) == ("Piura", "Logística", "VEHÍCULOS")
+    filtrados = cliente.get("/activos/", params={"area": "Logística", "estado": "Malo"}).json()
+    assert [a["id"] for a in filtrados] == ["C2LogísticaPiura"]
+
+    migrar_almacenamiento(base, "texto", compactar=False)
+    assert not encoding.MODO_DICCIONARIO
+    assert crudos(base, "sede") == {"C1LogísticaLima": "Lima", "C2LogísticaPiura": "Piura"}
+    assert cliente.get("/activos/C1LogísticaLima").json()["estado"] == "Bueno"
+
+
+def test_valores_nuevos_se_guardan_en_el_diccionario(cliente, base):
+    migrar_almacenamiento(base, "diccionario", compactar=False)
+    assert cliente.post("/activos/bulk-create", json=ACTIVOS[:1]).status_code == 201
+    with base.connect() as conn:
+        valores = set(conn.execute(select(diccionario_activos.c.campo, diccionario_activos.c.valor)).all())
+    assert {("sede", "Lima"), ("area", "Logística"), ("estado", "Bueno")} <= valores
+    with base.connect() as conn:
+        assert conn.execute(select(Activo.sede)).scalar() == "Lima"
+
+
+def valores_guardados(base):
+    with base.connect() as conn:
+        return set(conn.execute(select(diccionario_activos.c.campo, diccionario_activos.c.valor)).all())
+
+
+def test_las_lecturas_no_internan_valores(cliente, base):
+    migrar_almacenamiento(base, "diccionario", compactar=False)
+    assert cliente.post("/activos/bulk-create", json=ACTIVOS).status_code == 201
+    en_cache = len(encoding._valores)
+    for i in range(50):
+        assert cliente.get("/activos/", params={"area": f"área {i}"}).json() == []
+        cursor = codificar_cursor("sede", "asc", f"sede {i}", "x")
+        assert cliente.get("/activos/", params={"orden": "sede", "cursor": cursor}).status_code == 200
+        assert cliente.get("/activos/facets", params={"estado": f"estado {i}"}).status_code == 200
+    assert len(encoding._valores) == en_cache
+    assert not encoding._sin_confirmar
+    assert ("area", "área 0") not in valores_guardados(base)
+
+
+def test_cada_escritura_interna_lo_que_escribe(cliente, base):
+    migrar_almacenamiento(base, "diccionario", compactar=False)
+    assert cliente.post("/activos/", json={"correlativo": "C9", "sede": "Cusco", "area": "Archivo"}).status_code == 201
+    assert cliente.put("/activos/C9ArchivoCusco", json={"estado": "Regular"}).status_code == 200
+    patch = {"filtros": {"sede": "Cusco", "area": "No existe"}, "cambios": {"categoria": "OTROS"}}
+    assert cliente.post("/activos/bulk-patch", json=patch).json()["afectados"] == 0
+    patch = {"filtros": {"sede": "Cusco"}, "cambios": {"categoria": "MAQUINARIA"}}
+    assert cliente.post("/activos/bulk-patch", json=patch).json()["afectados"] == 1
+
+    guardados = valores_guardados(base)
+    assert {("sede", "Cusco"), ("area", "Archivo"), ("estado", "Regular"), ("categoria", "MAQUINARIA")} <= guardados
+    # El SET de un UPDATE se interna aunque no afecte filas (es una escritura); el WHERE nunca
+    assert ("categoria", "OTROS") in guardados
+    assert ("area", "No existe") not in guardados
+    activo = cliente.get("/activos/C9ArchivoCusco").json()
+    assert (activo["estado"], activo["categoria"]) == ("Regular", "MAQUINARIA")
+
+
+def test_filtro_que_colisiona_no_coincide_con_nada(cliente, base):
+    migrar_almacenamiento(base, "diccionario", compactar=False)
+    assert cliente.post("/activos/bulk-create", json=ACTIVOS).status_code == 201
+    # Simula un valor guardado cuyo código coincide con el del filtro
+    encoding.cargar_valores([(encoding.codigo_valor("area", "Fantasma"), "area", "Otra área")])
+    respuesta = cliente.get("/activos/", params={"area": "Fantasma"})
+    assert respuesta.status_code == 200 and respuesta.json() == []
+    with pytest.raises(encoding.ColisionDiccionario):
+        cliente.post("/activos/", json={"correlativo": "C5", "area": "Fantasma"})
+
+
+def test_codigo_desconocido_en_el_event_loop_no_usa_el_engine_sincrono(base, tmp_path, monkeypatch):
+    monkeypatch.setenv("QRIZATE_ASYNC_DB", "1")
+    database.init_db(str(tmp_path / "async.db"))
+    if database.get_async_engine() is None:
+        pytest.skip("aiosqlite no está instalado")
+    migrar_almacenamiento(database.get_engine(), "diccionario", compactar=False)
+    with database.get_engine().begin() as conn:
+        conn.execute(Activo.__table__.insert().values(id="X1", sede="Lima", area="Logística"))
+    encoding.reiniciar()  # como si otro proceso hubiera escrito los valores
+
+    cargar = dictionary.cargar_diccionario
+    def cargar_fuera_del_loop(*args):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return cargar(*args)
+    monkeypatch.setattr(dictionary, "cargar_diccionario", cargar_fuera_del_loop)
+
+    async def leer():
+        async with database.get_async_sessionmaker()() as sesion:
+            activo = await sesion.get(Activo, "X1")
+        await database.cerrar_db_async()
+        return activo
+    activo = asyncio.run(leer())
+    assert (activo.sede, activo.area) == ("Lima", "Logística")
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+
+from change_events import Suscriptor, canal_cambios
+
+
+@pytest.fixture
+def servidor(base, monkeypatch):
+    """La app de pruebas en un uvicorn real: el TestClient no entrega un stream SSE por partes."""
+    import uvicorn
+    from fastapi import FastAPI
+    from routers import activos
+
+    monkeypatch.setattr(activos, "ESPERA_LATIDO", 0.3)
+    app = FastAPI()
+    app.include_router(activos.router)
+    with socket.socket() as libre:
+        libre.bind(("127.0.0.1", 0))
+        puerto = libre.getsockname()[1]
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning"))
+    hilo = threading.Thread(target=servidor.run, daemon=True)
+    hilo.start()
+    while not servidor.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{puerto}"
+    servidor.should_exit = True
+    hilo.join(10)
+
+
+def leer_eventos(lineas):
+    """Generador de (evento, datos) de un stream SSE; los comentarios salen como ("comentario", texto)."""
+    evento, datos = None, None
+    for linea in lineas:
+        if linea.startswith(":"):
+            yield "comentario", linea[1:].strip()
+        elif linea.startswith("event: "):
+            evento = linea[7:]
+        elif linea.startswith("data: "):
+            datos = json.loads(linea[6:])
+        elif linea == "" and evento:
+            yield evento, datos
+            evento, datos = None, None
+
+
+def esperar_suscriptores(cantidad):
+    limite = time.monotonic() + 5
+    while canal_cambios.estadisticas()["suscriptores"] != cantidad:
+        assert time.monotonic() < limite
+        time.sleep(0.02)
+
+
+def test_sse_envia_los_cambios_y_latidos(servidor):
+    with httpx.Client(base_url=servidor, timeout=10) as http:
+        with http.stream("GET", "/activos/events") as respuesta:
+            assert respuesta.headers["content-type"].startswith("text/event-stream")
+            eventos = leer_eventos(respuesta.iter_lines())
+            assert next(eventos) == ("listo", {"revision": 0})
+
+            lote = [{"correlativo": f"C{i}", "sede": "Lima", "area": "TI"} for i in range(3)]
+            assert http.post("/activos/bulk-create", json=lote).status_code == 201
+            tipo, datos = next(e for e in eventos if e[0] != "comentario")
+            assert tipo == "cambios"
+            assert sorted(e["id"] for e in datos) == ["C0TILima", "C1TILima", "C2TILima"]
+            assert {e["op"] for e in datos} == {"upsert"}
+            revision = max(e["revision"] for e in datos)
+
+            assert http.delete("/activos/C1TILima").status_code == 204
+            tipo, datos = next(e for e in eventos if e[0] != "comentario")
+            assert datos == [{"id": "C1TILima", "op": "delete", "revision": revision + 1}]
+
+            # Sin cambios llegan latidos
+            assert next(eventos) == ("comentario", "latido")
+    esperar_suscriptores(0)
+
+
+def test_websocket_envia_los_mismos_eventos(cliente, crear):
+    with cliente.websocket_connect("/activos/events/ws") as ws:
+        assert ws.receive_json() == {"tipo": "listo", "revision": 0}
+        crear("C1")
+        mensaje = ws.receive_json()
+        assert mensaje["tipo"] == "cambios"
+        assert [(e["id"], e["op"]) for e in mensaje["eventos"]] == [("C1TILima", "upsert")]
+    esperar_suscriptores(0)
+
+
+def test_la_cola_combina_cambios_del_mismo_activo_y_desborda_en_resync(monkeypatch):
+    import change_events
+
+    async def ejecutar():
+        suscriptor = Suscriptor(asyncio.get_running_loop())
+        suscriptor.agregar([{"id": "A", "op": "upsert", "revision": 1}, {"id": "B", "op": "upsert", "revision": 2}])
+        suscriptor.agregar([{"id": "A", "op": "delete", "revision": 3}])
+        combinados = await suscriptor.siguiente(1)
+        assert await suscriptor.siguiente(0.01) is None
+
+        monkeypatch.setattr(change_events, "MAX_PENDIENTES_POR_SUSCRIPTOR", 2)
+        suscriptor.agregar([{"id": f"X{i}", "op": "upsert", "revision": 10 + i} for i in range(4)])
+        return combinados, await suscriptor.siguiente(1), suscriptor.descartados
+
+    combinados, desbordado, descartados = asyncio.run(ejecutar())
+    assert combinados == [{"id": "B", "op": "upsert", "revision": 2}, {"id": "A", "op": "delete", "revision": 3}]
+    assert desbordado == [{"op": "resync", "revision": 13}]
+    assert descartados == 3
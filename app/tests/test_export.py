@@ -0,0 +1,60 @@
+import csv
+import gzip
+import io
+import json
+
+from routers.activos import COLUMNAS_EXPORT, leer_activos_en_bloques
+
+DESCRIPCION = 'Escritorio "gerencia", 2 cajones\nroble — año 2020'
+
+
+def test_ndjson_una_fila_por_activo_con_todas_las_columnas(cliente, crear):
+    crear("C1", "C2", descripcion=DESCRIPCION)
+    crear("C3", sede="Piura")
+    respuesta = cliente.get("/activos/export", params={"formato": "ndjson"})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("application/x-ndjson")
+    filas = [json.loads(linea) for linea in respuesta.text.splitlines()]
+    assert [fila["id"] for fila in filas] == ["C1TILima", "C2TILima", "C3TIPiura"]
+    assert list(filas[0]) == COLUMNAS_EXPORT
+    assert filas[0]["descripcion"] == DESCRIPCION
+    assert "año" in respuesta.text  # sin escapar a ñ
+
+    filtrado = cliente.get("/activos/export", params={"sede": "Piura"}).text.splitlines()
+    assert [json.loads(linea)["id"] for linea in filtrado] == ["C3TIPiura"]
+
+
+def test_csv_con_bom_encabezado_y_campos_escapados(cliente, crear):
+    crear("C1", "C2", descripcion=DESCRIPCION)
+    respuesta = cliente.get("/activos/export", params={"formato": "csv"})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-disposition"] == 'attachment; filename="activos.csv"'
+    texto = respuesta.content.decode("utf-8")
+    assert texto.startswith("\ufeff")
+    filas = list(csv.reader(io.StringIO(texto[1:])))
+    assert filas[0] == COLUMNAS_EXPORT
+    assert len(filas) == 3
+    assert filas[1][COLUMNAS_EXPORT.index("descripcion")] == DESCRIPCION
+
+
+def test_gzip_comprime_el_mismo_contenido(cliente, crear):
+    crear(*[f"C{i}" for i in range(20)], descripcion=DESCRIPCION)
+    for formato in ("ndjson", "csv"):
+        plano = cliente.get("/activos/export", params={"formato": formato}).content
+        with cliente.stream("GET", "/activos/export", params={"formato": formato, "gzip": True}) as respuesta:
+            assert respuesta.headers["content-encoding"] == "gzip"
+            crudo = b"".join(respuesta.iter_raw())
+        assert crudo[:2] == b"\x1f\x8b"
+        assert gzip.decompress(crudo) == plano
+
+
+def test_formato_no_soportado(cliente):
+    assert cliente.get("/activos/export", params={"formato": "xlsx"}).status_code == 400
+
+
+def test_lectura_por_bloques_sin_repetir_filas(cliente, crear):
+    crear("C1", "C2", "C3", "C4", "C5")
+    crear("C6", sede="Piura")
+    bloques = list(leer_activos_en_bloques({"sede": "Lima"}, tamano=2))
+    assert [len(filas) for filas in bloques] == [2, 2, 1]
+    assert [fila.id for filas in bloques for fila in filas] == [f"C{i}TILima" for i in range(1, 6)]
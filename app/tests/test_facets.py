@@ -0,0 +1,61 @@
+import pytest
+
+from models.dictionary import migrar_almacenamiento
+
+
+def facetas(cliente, **params):
+    respuesta = cliente.get("/activos/facets", params=params)
+    assert respuesta.status_code == 200
+    return respuesta.json()
+
+
+def valores(lista):
+    return [(v["valor"], v["total"]) for v in lista]
+
+
+@pytest.fixture
+def inventario(crear):
+    # Todos de marca HP: filtrar por marca cuenta sobre activos y da los mismos números
+    crear("C1", "C2", estado="Bueno", marca="HP")
+    crear("C3", "C4", marca="HP")  # sin estado ni categoría
+    crear("C5", sede="Piura", estado="Malo", categoria="MUEBLES", marca="HP")
+
+
+@pytest.mark.parametrize("modo", ["texto", "diccionario"])
+def test_resumen_y_marca_dan_el_mismo_orden(cliente, base, inventario, modo):
+    if modo == "diccionario":
+        migrar_almacenamiento(base, "diccionario", compactar=False)
+    desde_resumen = facetas(cliente)
+    desde_activos = facetas(cliente, marca="HP")
+    assert desde_resumen["total"] == desde_activos["total"] == 5
+    for faceta in ("sede", "area", "estado", "categoria"):
+        assert desde_resumen["facetas"][faceta] == desde_activos["facetas"][faceta], faceta
+
+    # Mayor total primero; en empate, por valor y "sin valor" al final
+    assert valores(desde_resumen["facetas"]["estado"]) == [("Bueno", 2), (None, 2), ("Malo", 1)]
+    assert valores(desde_resumen["facetas"]["categoria"]) == [(None, 4), ("MUEBLES", 1)]
+    assert valores(desde_resumen["facetas"]["marca"]) == [("HP", 5)]
+
+
+def test_cada_faceta_ignora_su_propio_filtro(cliente, inventario, crear):
+    crear("C6", estado="Bueno", marca="Dell")
+    respuesta = facetas(cliente, sede="Piura", estado="Malo")
+    assert respuesta["total"] == 1
+    assert valores(respuesta["facetas"]["sede"]) == [("Piura", 1)]
+    assert valores(respuesta["facetas"]["estado"]) == [("Malo", 1)]
+    assert valores(facetas(cliente, sede="Lima")["facetas"]["estado"]) == [("Bueno", 3), (None, 2)]
+
+    respuesta = facetas(cliente, marca="Dell")
+    assert respuesta["total"] == 1
+    assert valores(respuesta["facetas"]["marca"]) == [("HP", 5), ("Dell", 1)]
+    assert valores(respuesta["facetas"]["estado"]) == [("Bueno", 1)]
+
+
+def test_las_escrituras_invalidan_la_cache(cliente, inventario, crear):
+    assert facetas(cliente, marca="HP")["total"] == 5
+    assert facetas(cliente)["total"] == 5
+    crear("C6", estado="Malo", marca="HP")
+    assert cliente.put("/activos/C3TILima", json={"estado": "Malo"}).status_code == 200
+    for respuesta in (facetas(cliente), facetas(cliente, marca="HP")):
+        assert respuesta["total"] == 6
+        assert valores(respuesta["facetas"]["estado"]) == [("Malo", 3), ("Bueno", 2), (None, 1)]
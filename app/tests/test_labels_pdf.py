@@ -0,0 +1,78 @@
+import re
+import zlib
+
+
+def leer_pdf(contenido: bytes):
+    """Verifica la tabla xref y devuelve, por página, los textos dibujados y si tiene QR."""
+    assert contenido.startswith(b"%PDF-1.4")
+    inicio_xref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", contenido).group(1))
+    tabla = contenido[inicio_xref:].split(b"trailer")[0].split(b"\n")[2:]
+    for numero_objeto, entrada in enumerate(tabla[1:], start=1):
+        if entrada:
+            posicion = int(entrada[:10])
+            assert contenido[posicion:].startswith(b"%d 0 obj" % numero_objeto)
+    kids = re.search(rb"/Kids \[([^\]]*)\] /Count (\d+)", contenido)
+    paginas = [int(n) for n in re.findall(rb"(\d+) 0 R", kids.group(1))]
+    assert len(paginas) == int(kids.group(2))
+    resultado = []
+    for pagina in paginas:
+        objeto = re.search(rb"\n%d 0 obj\n(.*?)\nendobj" % pagina, contenido, re.S).group(1)
+        flujo_numero = int(re.search(rb"/Contents (\d+) 0 R", objeto).group(1))
+        flujo = re.search(rb"\n%d 0 obj\n<< /Length (\d+) /Filter /FlateDecode >>\nstream\n" % flujo_numero, contenido)
+        datos = zlib.decompress(contenido[flujo.end():flujo.end() + int(flujo.group(1))])
+        textos = [t.decode("cp1252") for t in re.findall(rb"\(((?:[^()\\]|\\.)*)\) Tj", datos)]
+        resultado.append({"textos": textos, "qr": b" re\n" in datos})
+    return resultado
+
+
+def pedir(cliente, params=None, **solicitud):
+    return cliente.post("/activos/labels/pdf", params=params or {}, json=solicitud)
+
+
+def test_etiquetas_por_ids_en_el_orden_pedido(cliente, crear):
+    ids = crear(*[f"C{i}" for i in range(7)], descripcion="Silla ergonómica")
+    pedidos = list(reversed(ids))
+    respuesta = pedir(cliente, ids=pedidos, filas=3, columnas=2, campos=["id", "descripcion"])
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "application/pdf"
+    paginas = leer_pdf(respuesta.content)
+    assert len(paginas) == 2
+    textos = [t for pagina in paginas for t in pagina["textos"]]
+    assert textos[0::2] == pedidos
+    assert set(textos[1::2]) == {"Silla ergonómica"}
+    assert all(pagina["qr"] for pagina in paginas)
+
+
+def test_sin_ids_usa_los_filtros(cliente, crear):
+    crear("C1", "C2")
+    crear("P1", sede="Piura")
+    paginas = leer_pdf(pedir(cliente, params={"sede": "Piura"}, campos=["id"]).content)
+    assert paginas[0]["textos"] == ["P1TIPiura"]
+
+
+def test_una_pagina_llena_no_agrega_una_vacia(cliente, crear):
+    ids = crear("C1", "C2", "C3", "C4")
+    assert len(leer_pdf(pedir(cliente, ids=ids, filas=2, columnas=2).content)) == 1
+    # Sin activos sale un PDF válido con una página en blanco
+    assert leer_pdf(pedir(cliente, params={"sede": "Nadie"}).content) == [{"textos": [], "qr": False}]
+
+
+def test_textos_largos_se_recortan(cliente, crear):
+    ids = crear("C1", descripcion="x" * 500)
+    texto = leer_pdf(pedir(cliente, ids=ids, campos=["descripcion"]).content)[0]["textos"][0]
+    assert texto.endswith("…") and len(texto) < 100
+
+
+def test_ids_inexistentes_dan_404(cliente, crear):
+    crear("C1")
+    respuesta = pedir(cliente, ids=["C1TILima", "X1", "X2"])
+    assert respuesta.status_code == 404
+    assert respuesta.json()["detail"]["ids"] == ["X1", "X2"]
+
+
+def test_parametros_invalidos_dan_400(cliente, crear):
+    ids = crear("C1")
+    for solicitud in ({"ecc": "Z"}, {"campos": ["clave"]}, {"filas": 0}, {"pagina": "A3"},
+                      {"ancho_etiqueta_mm": 150, "columnas": 2}):
+        assert pedir(cliente, ids=ids, **solicitud).status_code == 400, solicitud
+    assert pedir(cliente, ids=ids, pagina="A3", ancho_pagina_mm=100, alto_pagina_mm=50, filas=1, columnas=1).status_code == 200
@@ -0,0 +1,76 @@
+import pytest
+
+from routers.activos import codificar_cursor
+
+
+def crear_inventario(cliente):
+    lote = [
+        {"correlativo": f"C{i:02d}", "sede": "Lima", "area": "TI" if i % 3 else "RRHH",
+         "estado": [None, "Bueno", "Malo", "Regular"][i % 4]}
+        for i in range(25)
+    ]
+    assert cliente.post("/activos/bulk-create", json=lote).status_code == 201
+
+
+def recorrer(cliente, **params):
+    ids, cursor, paginas = [], None, 0
+    while True:
+        respuesta = cliente.get("/activos/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert respuesta.status_code == 200
+        ids += [activo["id"] for activo in respuesta.json()]
+        paginas += 1
+        cursor = respuesta.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids, paginas
+
+
+@pytest.mark.parametrize("orden", ["id", "estado", "area"])
+@pytest.mark.parametrize("direccion", ["asc", "desc"])
+def test_el_cursor_recorre_todo_en_el_mismo_orden(cliente, orden, direccion):
+    crear_inventario(cliente)
+    completo = [a["id"] for a in cliente.get(
+        "/activos/", params={"orden": orden, "direccion": direccion, "limit": 1000}).json()]
+    ids, paginas = recorrer(cliente, orden=orden, direccion=direccion, limit=7)
+    assert ids == completo
+    assert len(completo) == 25 and paginas == 4
+
+
+def test_el_cursor_respeta_los_filtros(cliente):
+    crear_inventario(cliente)
+    ids, _ = recorrer(cliente, area="TI", orden="estado", limit=4)
+    completo = cliente.get("/activos/", params={"area": "TI", "limit": 1000}).json()
+    assert sorted(ids) == sorted(a["id"] for a in completo)
+    assert len(ids) == len(set(ids)) == 16
+
+
+def test_las_inserciones_no_desplazan_las_paginas(cliente):
+    crear_inventario(cliente)
+    primera = cliente.get("/activos/", params={"limit": 10})
+    assert len(primera.json()) == 10
+    # Filas que quedan antes y después de la posición del cursor
+    cliente.post("/activos/bulk-create", json=[
+        {"correlativo": "A0", "sede": "Lima", "area": "TI"},
+        {"correlativo": "Z9", "sede": "Lima", "area": "TI"},
+    ])
+    ids, _ = recorrer(cliente, cursor=primera.headers["X-Next-Cursor"], limit=10)
+    vistos = [a["id"] for a in primera.json()] + ids
+    assert len(vistos) == len(set(vistos)) == 26
+    assert "A0TILima" not in vistos and "Z9TILima" in vistos
+
+
+def test_la_ultima_pagina_no_trae_cursor(cliente):
+    crear_inventario(cliente)
+    assert "X-Next-Cursor" not in cliente.get("/activos/", params={"limit": 25}).headers
+    assert "X-Next-Cursor" in cliente.get("/activos/", params={"limit": 24}).headers
+
+
+@pytest.mark.parametrize("params", [
+    {"cursor": "no-es-un-cursor"},
+    {"cursor": "bm8tanNvbg"},                                              # base64 de algo que no es JSON
+    {"cursor": codificar_cursor("estado", "asc", "Bueno", "C01TILima")},   # otro orden
+    {"cursor": codificar_cursor("id", "desc", None, "C01TILima")},         # otra dirección
+    {"cursor": codificar_cursor("id", "asc", None, "C01TILima"), "skip": 10},
+])
+def test_cursor_invalido_da_400(cliente, params):
+    crear_inventario(cliente)
+    assert cliente.get("/activos/", params=params).status_code == 400
@@ -0,0 +1,52 @@
+from urllib.parse import quote
+
+from routers import activos
+
+
+def test_por_correlativo(cliente, crear):
+    crear("C1")
+    crear("Año 2024-01", sede="Piura")
+    assert cliente.get("/activos/correlativo/C1").json()["id"] == "C1TILima"
+    assert cliente.get(f"/activos/correlativo/{quote('Año 2024-01')}").json()["sede"] == "Piura"
+    assert cliente.get("/activos/correlativo/C9").status_code == 404
+    # Exacto: ni prefijos ni mayúsculas distintas
+    assert cliente.get("/activos/correlativo/c1").status_code == 404
+
+
+def test_por_codigo_y_serie_devuelven_todas_las_coincidencias(cliente, crear):
+    crear("C2", "C1", codigo_activo="740899", numero_serie="SN-1")
+    crear("P1", sede="Piura", numero_serie="SN-1")
+    assert [a["id"] for a in cliente.get("/activos/codigo/740899").json()] == ["C1TILima", "C2TILima"]
+    assert [a["id"] for a in cliente.get("/activos/serie/SN-1").json()] == ["C1TILima", "C2TILima", "P1TIPiura"]
+    assert cliente.get("/activos/codigo/000").json() == []
+    assert cliente.get("/activos/serie/otra").json() == []
+
+
+def test_batch_get_en_el_orden_pedido(cliente, crear):
+    crear("C1", "C2", "C3")
+    respuesta = cliente.post("/activos/batch-get", json={
+        "ids": ["C3TILima", "X1", "C1TILima", "C3TILima"],
+        "correlativos": ["C2", "C1", "X2"],
+    })
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    # Repetidos y el C1 pedido por id y por correlativo salen una sola vez
+    assert [a["id"] for a in cuerpo["items"]] == ["C3TILima", "C1TILima", "C2TILima"]
+    assert cuerpo["no_encontrados"] == ["X1", "X2"]
+
+
+def test_batch_get_en_varios_lotes(cliente, crear):
+    ids = crear(*[f"C{i:04d}" for i in range(1200)])
+    pedidos = ids[::-2] + [f"X{i}" for i in range(300)]
+    cuerpo = cliente.post("/activos/batch-get", json={"ids": pedidos}).json()
+    assert [a["id"] for a in cuerpo["items"]] == ids[::-2]
+    assert len(cuerpo["no_encontrados"]) == 300
+
+
+def test_batch_get_con_demasiados_valores(cliente, monkeypatch):
+    monkeypatch.setattr(activos, "MAX_BATCH_GET", 3)
+    solicitud = {"ids": ["a", "b"], "correlativos": ["c", "d"]}
+    assert cliente.post("/activos/batch-get", json=solicitud).status_code == 400
+    # Los repetidos no cuentan para el límite
+    solicitud = {"ids": ["a", "a", "b"], "correlativos": ["c", "c"]}
+    assert cliente.post("/activos/batch-get", json=solicitud).status_code == 200
@@ -0,0 +1,63 @@
+import logging
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from metrics import MedirPeticiones, Registro, registro
+
+
+@pytest.fixture
+def cliente_metricas(base):
+    from routers.activos import router
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(MedirPeticiones)
+
+    @app.get("/metrics")
+    def metricas():
+        return PlainTextResponse(registro.exportar())
+
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def conteo(texto, metodo, ruta, estado):
+    patron = (r'qrizate_http_request_duration_seconds_count\{method="%s",route="%s",status="%s"\} (\S+)'
+              % (metodo, re.escape(ruta), estado))
+    coincidencia = re.search(patron, texto)
+    return float(coincidencia.group(1)) if coincidencia else 0.0
+
+
+def test_las_peticiones_se_etiquetan_con_la_plantilla_de_la_ruta(cliente_metricas):
+    antes = cliente_metricas.get("/metrics").text
+    cliente_metricas.post("/activos/bulk-create", json=[{"correlativo": "C1", "sede": "Lima", "area": "TI"}])
+    for activo_id in ("C1TILima", "otro-1", "otro-2"):
+        cliente_metricas.get(f"/activos/{activo_id}")
+    cliente_metricas.get("/no-existe")
+    despues = cliente_metricas.get("/metrics").text
+
+    def nuevas(metodo, ruta, estado):
+        return conteo(despues, metodo, ruta, estado) - conteo(antes, metodo, ruta, estado)
+
+    assert nuevas("POST", "/activos/bulk-create", "201") == 1
+    assert nuevas("GET", "/activos/{activo_id}", "200") == 1
+    assert nuevas("GET", "/activos/{activo_id}", "404") == 2
+    assert nuevas("GET", "sin_ruta", "404") == 1
+    # Ni los ids ni las URLs concretas llegan a las etiquetas, y /metrics no se mide
+    assert "C1TILima" not in despues and "otro-1" not in despues and "/no-existe" not in despues
+    assert 'route="/metrics"' not in despues
+
+
+def test_un_recolector_que_falla_se_registra_y_no_corta_la_exportacion(caplog):
+    propio = Registro()
+    propio.recolector("roto", "Falla siempre", lambda: {}["x"])
+    propio.recolector("sano", "Funciona", lambda: {"valor": 3, "texto": "no", "activo": True})
+    with caplog.at_level(logging.ERROR):
+        texto = propio.exportar()
+    assert "sano_valor 3" in texto
+    assert "sano_texto" not in texto and "sano_activo" not in texto and "roto" not in texto
+    assert any("roto" in registro_log.getMessage() for registro_log in caplog.records)
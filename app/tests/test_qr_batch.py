@@ -0,0 +1,22 @@
+import io
+import zipfile
+
+from routers.activos import nombre_archivo_seguro
+
+
+def test_nombres_distintos_para_ids_que_se_sanitizan_igual():
+    nombres = [nombre_archivo_seguro(i) for i in ("A/1", "A_1", "A 1", "A\\1")]
+    assert len(set(nombres)) == 4
+    assert nombre_archivo_seguro("A_1") == "A_1"
+    assert nombre_archivo_seguro("A/1") == nombre_archivo_seguro("A/1")
+
+
+def test_zip_sin_entradas_duplicadas(cliente):
+    ids = ["A/1", "A_1", "A 1"]
+    lote = [{"id": i, "correlativo": f"C{n}", "sede": "Lima"} for n, i in enumerate(ids)]
+    assert cliente.post("/activos/bulk-create", json=lote).status_code == 201
+    respuesta = cliente.post("/activos/qr/batch", json={"ids": ids, "formato": "svg"})
+    assert respuesta.status_code == 200
+    nombres = zipfile.ZipFile(io.BytesIO(respuesta.content)).namelist()
+    assert len(nombres) == len(set(nombres)) == 3
+    assert "A_1.svg" in nombres
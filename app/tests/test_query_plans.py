@@ -0,0 +1,34 @@
+from sqlalchemy import select
+
+import query_plans
+from models.activo import Activo
+
+
+def test_las_consultas_registradas_usan_sus_indices(base):
+    assert query_plans.verificar_planes(base) == []
+
+
+def test_un_recorrido_completo_del_indice_falla_si_se_esperaba_un_rango(base, monkeypatch):
+    # Sin filtro, el orden por sede recorre ix_activos_sede_id de punta a punta
+    monkeypatch.setitem(query_plans.CONSULTAS, "orden por sede sin filtro",
+                        lambda: select(Activo.sede, Activo.id).order_by(Activo.sede, Activo.id))
+    assert query_plans.verificar_planes(base) == ["orden por sede sin filtro"]
+    monkeypatch.setattr(query_plans, "RECORRIDOS_DE_INDICE",
+                        query_plans.RECORRIDOS_DE_INDICE | {"orden por sede sin filtro"})
+    assert query_plans.verificar_planes(base) == []
+
+
+def test_un_recorrido_de_la_tabla_siempre_falla(base, monkeypatch):
+    monkeypatch.setitem(query_plans.CONSULTAS, "por modelo", lambda: select(Activo).where(Activo.modelo == "x"))
+    monkeypatch.setattr(query_plans, "RECORRIDOS_DE_INDICE", query_plans.RECORRIDOS_DE_INDICE | {"por modelo"})
+    assert query_plans.verificar_planes(base) == ["por modelo"]
+
+
+def test_recorridos_completos():
+    tablas = {"activos"}
+    assert query_plans.recorridos_completos(["SCAN activos"], tablas, True) == ["SCAN activos"]
+    cubriente = ["SCAN activos USING COVERING INDEX ix_activos_marca"]
+    assert query_plans.recorridos_completos(cubriente, tablas) == cubriente
+    assert query_plans.recorridos_completos(cubriente, tablas, True) == []
+    assert query_plans.recorridos_completos(["SEARCH activos USING INDEX ix_activos_sede_id (sede>?)"], tablas) == []
+    assert query_plans.recorridos_completos(["SCAN activos_fts VIRTUAL TABLE INDEX 0:M6"], tablas | {"activos_fts"}) == []
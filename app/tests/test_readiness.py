@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LANZADOR = """
+import sys
+sys.argv = ["main.py", "--port", "0", "--ready-file", sys.argv[1]]
+import models.db
+if {romper}:
+    def romper(engine):
+        raise RuntimeError("trigger inválido")
+    models.db.crear_registro_cambios = romper
+import main
+main.run_server(main.leer_argumentos())
+"""
+
+
+def lanzar(tmp_path, romper: bool):
+    entorno = {**os.environ, "HOME": str(tmp_path), "USERPROFILE": str(tmp_path), "PYTHONUNBUFFERED": "1"}
+    archivo_listo = tmp_path / "listo.json"
+    proceso = subprocess.Popen(
+        [sys.executable, "-c", LANZADOR.format(romper=romper), str(archivo_listo)],
+        cwd=APP, env=entorno, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    return proceso, archivo_listo
+
+
+def test_anuncia_listo_cuando_health_ready_responde_200(tmp_path):
+    proceso, archivo_listo = lanzar(tmp_path, romper=False)
+    try:
+        linea = ""
+        limite = time.monotonic() + 60
+        while not linea.startswith("QRIZATE_READY") and time.monotonic() < limite:
+            linea = proceso.stdout.readline()
+            assert linea, "el proceso terminó sin anunciar que estaba listo"
+        datos = json.loads(linea.split(" ", 1)[1])
+        assert json.loads(archivo_listo.read_text()) == datos
+        with urllib.request.urlopen(f"http://127.0.0.1:{datos['port']}/health/ready", timeout=10) as respuesta:
+            assert respuesta.status == 200
+            assert json.loads(respuesta.read())["listo"] is True
+    finally:
+        proceso.kill()
+        proceso.wait()
+
+
+def test_sin_esquema_no_anuncia_y_termina(tmp_path):
+    proceso, archivo_listo = lanzar(tmp_path, romper=True)
+    try:
+        salida, _ = proceso.communicate(timeout=60)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+        pytest.fail("el proceso siguió vivo con la base sin esquema")
+    assert proceso.returncode == 1
+    assert "QRIZATE_READY" not in salida
+    assert not archivo_listo.exists()
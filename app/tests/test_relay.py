@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("websockets")
+
+import relay  # noqa: E402
+from bench.fake_vps import VPSFalso  # noqa: E402
+
+
+def conversar(conversacion):
+    """Conecta la sede a un VPS falso local, ejecuta `conversacion(vps)` y desconecta."""
+    async def ejecutar():
+        vps = VPSFalso()
+        await vps.iniciar()
+        sede = asyncio.create_task(relay.connect_to_vps_and_listen("pruebas", vps.url))
+        try:
+            await vps.esperar_sede()
+            return await conversacion(vps)
+        finally:
+            sede.cancel()
+            try:
+                await sede
+            except asyncio.CancelledError:
+                pass
+            await vps.detener()
+    return asyncio.run(ejecutar())
+
+
+def test_mensajes_que_no_son_objetos_no_cortan_la_conexion(crear):
+    crear("C1")
+
+    async def conversacion(vps):
+        conexion = vps._conexion
+        for mensaje in ("[]", '"x"', "1", "null", "no es json"):
+            await conexion.send(mensaje)
+        latencia = await asyncio.wait_for(vps.solicitar("C1TILima"), 5)
+        return conexion, vps._conexion, latencia
+
+    antes, despues, latencia = conversar(conversacion)
+    assert despues is antes
+    assert latencia >= 0
+
+
+def test_ids_inexistentes_no_dejan_reservas(crear):
+    from page_cache import cache_paginas
+
+    crear("C1")
+    for i in range(50):
+        assert "no encontrado" in relay.get_asset_html_from_db(f"no-existe-{i}")
+        assert "no encontrado" in asyncio.run(relay.get_asset_html_async(f"tampoco-{i}"))
+    assert "C1" in relay.get_asset_html_from_db("C1TILima")
+    assert cache_paginas.estadisticas()["en_vuelo"] == 0
+    assert cache_paginas.obtener("C1TILima") is not None
+
+
+def test_cancelar_no_libera_una_reserva_mas_nueva():
+    from page_cache import CachePaginasActivo
+
+    cache = CachePaginasActivo()
+    vieja = cache.reservar("A")
+    nueva = cache.reservar("A")
+    cache.cancelar("A", vieja)
+    cache.guardar("A", nueva, 1, "<p>A</p>")
+    assert cache.obtener("A") == "<p>A</p>"
+
+
+def test_una_escritura_que_no_invalida_se_detecta_por_revision(crear, base):
+    from sqlalchemy import text
+    from page_cache import cache_paginas
+
+    crear("C1", "C2", marca="HP")
+    relay.verificar_revisiones_cache()
+    assert "HP" in relay.get_asset_html_from_db("C1TILima")
+    assert "HP" in relay.get_asset_html_from_db("C2TILima")
+    # Escritura por fuera de los endpoints: nadie llama a invalidar_activos
+    with base.begin() as conn:
+        conn.execute(text("UPDATE activos SET marca = 'Epson' WHERE id = 'C1TILima'"))
+    assert "HP" in cache_paginas.obtener("C1TILima")
+
+    relay._proxima_verificacion = 0.0
+    asyncio.run(relay.verificar_cache_si_corresponde())
+    assert cache_paginas.obtener("C1TILima") is None
+    assert cache_paginas.obtener("C2TILima") is not None
+    assert cache_paginas.estadisticas()["obsoletas"] == 1
+    assert "Epson" in relay.get_asset_html_from_db("C1TILima")
+    # Dentro del intervalo no se vuelve a consultar la base
+    with base.begin() as conn:
+        conn.execute(text("DELETE FROM activos WHERE id = 'C2TILima'"))
+    asyncio.run(relay.verificar_cache_si_corresponde())
+    assert cache_paginas.obtener("C2TILima") is not None
+    relay._proxima_verificacion = 0.0
+    asyncio.run(relay.verificar_cache_si_corresponde())
+    assert cache_paginas.obtener("C2TILima") is None
+
+
+def test_una_lectura_en_curso_no_guarda_una_fila_que_cambio(crear):
+    from page_cache import cache_paginas
+
+    crear("C1")
+    relay.verificar_revisiones_cache()
+    version = cache_paginas.reservar("C1TILima")
+    cache_paginas.aplicar_revisiones(cache_paginas.revision_verificada + 1, {"C1TILima": 99})
+    cache_paginas.guardar("C1TILima", version, 1, "<p>vieja</p>")
+    assert cache_paginas.obtener("C1TILima") is None
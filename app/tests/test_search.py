@@ -0,0 +1,76 @@
+from models.dictionary import migrar_almacenamiento
+
+
+def buscar(cliente, q, **params):
+    respuesta = cliente.get("/activos/search", params={"q": q, **params})
+    assert respuesta.status_code == 200, respuesta.text
+    return [activo["id"] for activo in respuesta.json()["items"]]
+
+
+def inventario(crear):
+    crear("C1", descripcion="Cámara de seguridad", marca="Hikvision")
+    crear("C2", descripcion="Laptop", marca="Dell", modelo="Latitude 5420")
+    crear("C3", descripcion="Laptop", marca="HP", numero_serie="CND123")
+    crear("C4", descripcion="Proyector", marca="Epson", area="Logística")
+
+
+def test_sin_tildes_ni_mayusculas(cliente, crear):
+    inventario(crear)
+    assert buscar(cliente, "camara") == ["C1TILima"]
+    assert buscar(cliente, "CÁMARA") == ["C1TILima"]
+    assert buscar(cliente, "logistica") == ["C4LogísticaLima"]
+
+
+def test_prefijos(cliente, crear):
+    inventario(crear)
+    assert sorted(buscar(cliente, "lap")) == ["C2TILima", "C3TILima"]
+    assert buscar(cliente, "lati") == ["C2TILima"]
+    assert buscar(cliente, "lap", prefijo=False) == []
+    assert sorted(buscar(cliente, "laptop", prefijo=False)) == ["C2TILima", "C3TILima"]
+
+
+def test_todas_las_palabras_deben_coincidir(cliente, crear):
+    inventario(crear)
+    assert buscar(cliente, "laptop dell") == ["C2TILima"]
+    assert buscar(cliente, "laptop epson") == []
+
+
+def test_numero_de_serie_pesa_mas_que_la_descripcion(cliente, crear):
+    crear("C1", descripcion="Repuesto para CND123")
+    crear("C2", descripcion="Laptop", numero_serie="CND123")
+    assert buscar(cliente, "cnd123") == ["C2TILima", "C1TILima"]
+
+
+def test_la_sintaxis_fts_se_trata_como_texto(cliente, crear):
+    inventario(crear)
+    assert buscar(cliente, 'laptop OR "proyector') == []
+    assert buscar(cliente, "dell-latitude") == ["C2TILima"]
+    assert cliente.get("/activos/search", params={"q": "!!"}).status_code == 400
+
+
+def test_filtros_y_paginas(cliente, crear):
+    crear(*[f"L{i}" for i in range(5)], descripcion="Laptop")
+    crear("P1", descripcion="Laptop", sede="Piura")
+    assert buscar(cliente, "laptop", sede="Piura") == ["P1TIPiura"]
+    primera = cliente.get("/activos/search", params={"q": "laptop", "limit": 4}).json()
+    segunda = cliente.get("/activos/search", params={"q": "laptop", "limit": 4, "skip": primera["next_skip"]}).json()
+    ids = [a["id"] for a in primera["items"] + segunda["items"]]
+    assert primera["next_skip"] == 4 and segunda["next_skip"] is None
+    assert len(ids) == len(set(ids)) == 6
+
+
+def test_las_ediciones_y_bajas_se_reindexan(cliente, crear):
+    inventario(crear)
+    assert cliente.put("/activos/C1TILima", json={"descripcion": "Monitor"}).status_code == 200
+    assert buscar(cliente, "camara") == []
+    assert buscar(cliente, "monitor") == ["C1TILima"]
+    assert cliente.delete("/activos/C2TILima").status_code == 204
+    assert buscar(cliente, "dell") == []
+
+
+def test_modo_diccionario_busca_por_el_texto(cliente, crear, base):
+    inventario(crear)
+    migrar_almacenamiento(base, "diccionario", compactar=False)
+    assert buscar(cliente, "logistica") == ["C4LogísticaLima"]
+    crear("C5", descripcion="Silla", area="Contabilidad")
+    assert buscar(cliente, "contab") == ["C5ContabilidadLima"]
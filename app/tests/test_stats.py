@@ -0,0 +1,77 @@
+import pytest
+
+from models.dictionary import migrar_almacenamiento
+
+
+def verificar(cliente, **params):
+    respuesta = cliente.get("/activos/stats/verificar", params=params)
+    assert respuesta.status_code == 200
+    return respuesta.json()
+
+
+def test_los_triggers_mantienen_el_resumen(cliente, crear):
+    crear("C1", "C2", estado="Bueno")
+    crear("C3", sede="Piura")  # sin estado ni categoría
+    assert cliente.put("/activos/C1TILima", json={"estado": "Malo", "categoria": "MUEBLES"}).status_code == 200
+    patch = {"filtros": {"sede": "Piura"}, "cambios": {"estado": "Regular"}}
+    assert cliente.post("/activos/bulk-patch", json=patch).json()["afectados"] == 1
+    assert cliente.delete("/activos/C2TILima").status_code == 204
+
+    assert verificar(cliente) == {"consistente": True, "diferencias": [], "reparado": False}
+    assert cliente.get("/activos/stats/").json() == {
+        "total_activos": 2, "activos_por_estado": {"Malo": 1, "Regular": 1},
+    }
+
+
+@pytest.mark.parametrize("modo", ["texto", "diccionario"])
+def test_verificar_detecta_y_repara(cliente, base, crear, modo):
+    if modo == "diccionario":
+        migrar_almacenamiento(base, "diccionario", compactar=False)
+    crear("C1", "C2", estado="Bueno")
+    crear("C3")
+    with base.begin() as conn:
+        conn.exec_driver_sql("UPDATE resumen_activos SET total = total + 5 WHERE estado != ''")
+        conn.exec_driver_sql("DELETE FROM resumen_activos WHERE estado = ''")
+    assert cliente.get("/activos/facets").json()["total"] == 7  # queda en caché con el resumen dañado
+
+    # Sin reparar solo informa, y no toca el resumen
+    for _ in range(2):
+        resultado = verificar(cliente)
+        assert not resultado["consistente"] and not resultado["reparado"]
+        assert sorted((d["estado"], d["resumen"], d["recuento"]) for d in resultado["diferencias"]) == [
+            ("", 0, 1), ("Bueno", 7, 2),
+        ]
+        assert resultado["diferencias"][0]["sede"] == "Lima"
+
+    resultado = verificar(cliente, reparar="true")
+    assert resultado["reparado"] and len(resultado["diferencias"]) == 2
+    assert verificar(cliente) == {"consistente": True, "diferencias": [], "reparado": False}
+    assert cliente.get("/activos/stats/").json()["activos_por_estado"] == {"Bueno": 2, "No definido": 1}
+    # Las facetas calculadas sobre el resumen dañado no sobreviven a la reparación
+    facetas = cliente.get("/activos/facets").json()
+    assert facetas["total"] == 3
+    assert sorted(facetas["facetas"]["estado"], key=lambda v: v["total"]) == [
+        {"valor": None, "total": 1}, {"valor": "Bueno", "total": 2},
+    ]
+
+
+def test_reparar_sin_diferencias_no_reconstruye(cliente, crear):
+    crear("C1")
+    assert verificar(cliente, reparar="true") == {"consistente": True, "diferencias": [], "reparado": False}
+
+
+def test_resumen_agrupado(cliente, crear):
+    crear("C1", "C2", estado="Bueno")
+    crear("C3", sede="Piura", estado="Bueno")
+    crear("C4", sede="Piura")
+
+    respuesta = cliente.get("/activos/stats/resumen", params={"agrupar": ["sede", "estado"]}).json()
+    assert respuesta["total"] == 4
+    assert respuesta["grupos"] == [
+        {"sede": "Lima", "estado": "Bueno", "total": 2},
+        {"sede": "Piura", "estado": None, "total": 1},
+        {"sede": "Piura", "estado": "Bueno", "total": 1},
+    ]
+    filtrado = cliente.get("/activos/stats/resumen", params={"agrupar": "estado", "sede": "Piura"}).json()
+    assert filtrado["total"] == 2
+    assert cliente.get("/activos/stats/resumen", params={"agrupar": "marca"}).status_code == 400
@@ -1,6 +1,7 @@
-const { app, BrowserWindow, Menu, Tray, ipcMain } = require('electron/main');
+const { app, BrowserWindow, Menu, Tray, dialog, ipcMain } = require('electron/main');
 const path = require('node:path');
 const { spawn } = require('child_process');
+const fs = require('node:fs');
 const os = require('node:os');
 const portfinder = require('portfinder');
 
@@ -9,6 +10,11 @@ let backendProcess = null;
 let mainWindow = null;
 let tray = null;
 let backendPort = null;
+let backendReady = false;
+
+// El backend imprime esta línea (y escribe --ready-file) cuando ya escucha en el puerto
+const READY_PREFIX = 'QRIZATE_READY ';
+const BACKEND_READY_TIMEOUT_MS = 60000;
 
 // Configuración de recarga solo en desarrollo
 if (!app.isPackaged) {
@@ -36,6 +42,62 @@ function getLocalIp() {
   return '127.0.0.1';
 }
 
+// Espera la señal de "listo" del backend: la línea QRIZATE_READY en stdout o, si el
+// ejecutable no tiene consola, el archivo --ready-file. Falla si el proceso termina antes.
+function waitForBackendReady(proc, readyFile, timeoutMs) {
+  return new Promise((resolve, reject) => {
+    let buffer = '';
+    let finished = false;
+
+    const finish = (error, info) => {
+      if (finished) return;
+      finished = true;
+      clearInterval(filePoll);
+      clearTimeout(timer);
+      proc.stdout.off('data', onData);
+      proc.off('exit', onExit);
+      if (error) reject(error); else resolve(info);
+    };
+
+    const onData = (data) => {
+      buffer += data.toString();
+      const lines = buffer.split(/\r?\n/);
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (line.startsWith(READY_PREFIX)) {
+          try {
+            finish(null, JSON.parse(line.slice(READY_PREFIX.length)));
+          } catch (err) {
+            finish(new Error(`Señal de listo inválida: ${line}`));
+          }
+          return;
+        }
+      }
+    };
+
+    const onExit = (code) => finish(new Error(`El backend terminó (código ${code}) antes de estar listo`));
+
+    const filePoll = setInterval(() => {
+      fs.readFile(readyFile, 'utf8', (err, content) => {
+        if (err) return;
+        try {
+          finish(null, JSON.parse(content));
+        } catch (parseErr) {
+          // Se escribe de forma atómica; un error aquí es un archivo ajeno, se sigue esperando
+        }
+      });
+    }, 100);
+
+    const timer = setTimeout(
+      () => finish(new Error(`El backend no estuvo listo en ${timeoutMs / 1000} s`)),
+      timeoutMs
+    );
+
+    proc.stdout.on('data', onData);
+    proc.on('exit', onExit);
+  });
+}
+
 // Función para iniciar el backend de Python
 // main.js - NUEVA VERSIÓN DE startBackend
 
@@ -48,7 +110,9 @@ async function startBackend() {
     const PUBLIC_URL_BASE = 'http://qrizate.systempiura.com/asset.html';
     
     let command;
-    let args = ['--port', port, '--public-url', PUBLIC_URL_BASE]; // Los argumentos son los mismos
+    const readyFile = path.join(os.tmpdir(), `qrizate-backend-${process.pid}.ready.json`);
+    fs.rmSync(readyFile, { force: true });
+    let args = ['--port', port, '--public-url', PUBLIC_URL_BASE, '--ready-file', readyFile];
 
     if (app.isPackaged) {
       // --- MODO PRODUCCIÓN (SIN CAMBIOS) ---
@@ -76,14 +140,11 @@ async function startBackend() {
 
     console.log(`Comando a ejecutar: ${command} ${args.join(' ')}`);
 
-    // --- EL RESTO DE LA FUNCIÓN QUEDA IGUAL ---
+    const startedAt = Date.now();
     backendProcess = spawn(command, args);
 
     backendProcess.stdout.on('data', (data) => {
       console.log(`Backend stdout: ${data}`);
-      if (mainWindow) {
-        mainWindow.webContents.send('set-api-port', port);
-      }
     });
     
     backendProcess.stderr.on('data', (data) => {
@@ -91,15 +152,40 @@ async function startBackend() {
     });
     
     backendProcess.on('close', (code) => {
+      backendReady = false;
       console.log(`Backend process exited with code ${code}`);
     });
 
+    // El puerto se entrega a la ventana solo cuando el backend ya acepta conexiones
+    try {
+      const info = await waitForBackendReady(backendProcess, readyFile, BACKEND_READY_TIMEOUT_MS);
+      backendPort = info.port;
+      backendReady = true;
+      console.log(`Backend listo en el puerto ${backendPort} tras ${Date.now() - startedAt} ms`);
+      if (mainWindow) {
+        mainWindow.webContents.send('set-api-port', backendPort);
+      }
+    } catch (err) {
+      console.error('El backend no llegó a estar listo:', err.message);
+      abortStartup(`El servidor de QRizate no pudo iniciar: ${err.message}`);
+    } finally {
+      fs.rmSync(readyFile, { force: true });
+    }
+
   } catch (err) {
     console.error('Error al iniciar el backend:', err);
-    app.quit();
+    abortStartup(`Error al iniciar el servidor de QRizate: ${err.message}`);
   }
 }
 
+// Sin backend la aplicación no sirve: se avisa y se cierra (before-quit detiene el proceso)
+function abortStartup(message) {
+  dialog.showErrorBox('QRizate', message);
+  // Sin esto, el cierre de la ventana solo la ocultaría en la bandeja
+  app.isQuitting = true;
+  app.quit();
+}
+
 // Función para crear la ventana principal
 function createWindow() {
   mainWindow = new BrowserWindow({
@@ -139,7 +225,9 @@ function createWindow() {
   mainWindow.webContents.on('did-finish-load', () => {
     const localIp = getLocalIp();
     mainWindow.webContents.send('set-local-ip', localIp);
-    mainWindow.webContents.send('set-api-port', backendPort);
+    if (backendReady) {
+      mainWindow.webContents.send('set-api-port', backendPort);
+    }
   });
 
   // Abrir DevTools en desarrollo
@@ -0,0 +1,90 @@
+/**
+ * Copia local de la tabla de activos en IndexedDB, actualizada con /activos/changes.
+ * La primera carga descarga todo (since=0); las siguientes traen solo lo creado,
+ * modificado o eliminado desde la última revisión guardada.
+ */
+const SYNC_DB_NOMBRE = 'qrizate-activos';
+const SYNC_LIMITE = 5000;
+
+function abrirBaseLocal() {
+  return new Promise((resolve, reject) => {
+    const req = indexedDB.open(SYNC_DB_NOMBRE, 1);
+    req.onupgradeneeded = () => {
+      req.result.createObjectStore('activos', { keyPath: 'id' });
+      req.result.createObjectStore('meta');
+    };
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+function esperarTransaccion(tx) {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error);
+  });
+}
+
+function leerEstadoSync(db) {
+  return new Promise((resolve, reject) => {
+    const req = db.transaction('meta').objectStore('meta').get('estado');
+    req.onsuccess = () => resolve(req.result || null);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+function leerActivosLocales(db) {
+  return new Promise((resolve, reject) => {
+    const req = db.transaction('activos').objectStore('activos').getAll();
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+async function sincronizarActivos(baseUrl) {
+  const db = await abrirBaseLocal();
+  try {
+    const estado = await leerEstadoSync(db);
+    // Otro servidor (o base recreada): se descarta la copia y se empieza desde cero
+    let since = estado && estado.origen === baseUrl ? estado.revision : 0;
+    let hayMas = true;
+    while (hayMas) {
+      const resp = await fetch(`${baseUrl}/activos/changes?since=${since}&limit=${SYNC_LIMITE}`);
+      if (resp.status === 410 && since !== 0) {
+        since = 0;
+        continue;
+      }
+      if (!resp.ok) throw new Error(await resp.text());
+      const cambios = await resp.json();
+      const tx = db.transaction(['activos', 'meta'], 'readwrite');
+      const activos = tx.objectStore('activos');
+      if (since === 0) activos.clear();
+      cambios.items.forEach(activo => activos.put(activo));
+      cambios.eliminados.forEach(eliminado => activos.delete(eliminado.id));
+      tx.objectStore('meta').put({ origen: baseUrl, revision: cambios.revision }, 'estado');
+      await esperarTransaccion(tx);
+      since = cambios.revision;
+      hayMas = cambios.hay_mas;
+    }
+    return await leerActivosLocales(db);
+  } finally {
+    db.close();
+  }
+}
+window.sincronizarActivos = sincronizarActivos;
+
+/**
+ * Escucha /activos/events y llama a `alCambiar` (una vez por ráfaga de cambios) cuando
+ * otro operador crea, modifica o elimina activos. EventSource reconecta solo.
+ */
+function escucharCambiosActivos(baseUrl, alCambiar, esperaMs = 300) {
+  const fuente = new EventSource(`${baseUrl}/activos/events`);
+  let temporizador = null;
+  fuente.addEventListener('cambios', () => {
+    clearTimeout(temporizador);
+    temporizador = setTimeout(alCambiar, esperaMs);
+  });
+  return fuente;
+}
+window.escucharCambiosActivos = escucharCambiosActivos;
@@ -149,9 +149,8 @@ async function cargarQRs(forceApi = false) {
       }
     }
     // 2. Siempre intentar cargar desde la API
-  const response = await fetch(`http://${ip}:${port}/activos/?skip=0&limit=100000`);
-    if (!response.ok) throw new Error("Network response was not ok");
-    const data = await response.json();
+    // Copia local incremental: solo se descargan los cambios desde la última carga
+    const data = await sincronizarActivos(`http://${ip}:${port}`);
     console.log("Datos recibidos de la API:", data); // DEPURADOR
     qrRawData = data.filter(item => (item.id || item.codigo_activo || item.codigo) && (item.codigo_activo !== 'string' && item.codigo !== 'string'));
     console.log("Datos filtrados:", qrRawData); // DEPURADOR
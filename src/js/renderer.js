@@ -198,11 +198,10 @@ async function handleQrFormSubmit(event) {
             if (userConfirmed) {
                 // Si el usuario acepta, actualiza el activo
                 const correlativo = dataObject.correlativo;
-                // Busca el activo por correlativo para obtener el id
-                const getActivoUrl = `${AppState.apiBaseUrl}/activos/?skip=0&limit=100000`;
+                // Busca el activo por correlativo (consulta indexada) para obtener el id
+                const getActivoUrl = `${AppState.apiBaseUrl}/activos/correlativo/${encodeURIComponent(correlativo)}`;
                 const activosResp = await fetch(getActivoUrl);
-                const activos = await activosResp.json();
-                const existente = activos.find(a => a.correlativo === correlativo);
+                const existente = activosResp.ok ? await activosResp.json() : null;
                 if (existente) {
                     const putUrl = `${AppState.apiBaseUrl}/activos/${existente.id}`;
                     const putResp = await fetch(putUrl, {
@@ -50,17 +50,32 @@ function getIpPort() {
 function cargarDatos() {
   const {ip, port} = getIpPort();
   document.getElementById('tabla-datos').innerHTML = '<em>Cargando...</em>';
-  fetch(`http://${ip}:${port}/activos/?skip=0&limit=100000`)
-    .then(res => res.ok ? res.json() : res.text().then(t => {throw new Error(t)}))
+  // Copia local incremental: solo se descargan los cambios desde la última carga
+  sincronizarActivos(`http://${ip}:${port}`)
     .then(data => {
       datosGlobal = Array.isArray(data) ? data : [];
       renderTabla(datosGlobal);
+      escucharCambiosEnVivo(`http://${ip}:${port}`);
     })
     .catch(err => {
       document.getElementById('tabla-datos').innerHTML = `<span style='color:red;'>Error al obtener los datos: ${err.message}</span>`;
     });
 }
 
+// Cambios hechos desde otras ventanas: se aplica solo el delta y se conserva el filtro
+let fuenteCambios = null;
+function escucharCambiosEnVivo(baseUrl) {
+  if (fuenteCambios) return;
+  fuenteCambios = escucharCambiosActivos(baseUrl, () => {
+    sincronizarActivos(baseUrl).then(data => {
+      datosGlobal = data;
+      const filtro = document.getElementById('filtro');
+      if (filtro) filtro.dispatchEvent(new Event('input'));
+      else renderTabla(datosGlobal);
+    }).catch(() => {});
+  });
+}
+
 function renderTabla(datos) {
   if (!Array.isArray(datos) || !datos.length) {
     document.getElementById('tabla-datos').innerHTML = '<em>No hay datos para mostrar.</em>';